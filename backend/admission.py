@@ -0,0 +1,262 @@
+"""
+Admission control for the persistence path.
+
+- ConcurrencyLimiter: at most `max_concurrent` saves in flight with a bounded
+  wait queue. When the queue is full (or a waiter times out) callers are
+  rejected immediately so the endpoint can answer 503 + Retry-After instead of
+  piling up requests behind a slow database.
+- TokenBucketLimiter: per-client token buckets (keyed by client IP, see client_key).
+- BodyLimitMiddleware: per-route request body limits. A declared
+  Content-Length over the limit is answered 413 before the app runs; a body
+  sent without one (chunked) is counted as it streams in and rejected with 413
+  at the first chunk past the limit, so an oversized payload is never
+  buffered or parsed.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+SUBMIT_MAX_CONCURRENCY = int(os.getenv("SUBMIT_MAX_CONCURRENCY", "8"))
+SUBMIT_MAX_QUEUE = int(os.getenv("SUBMIT_MAX_QUEUE", "32"))
+SUBMIT_QUEUE_TIMEOUT_S = float(os.getenv("SUBMIT_QUEUE_TIMEOUT_S", "5"))
+SUBMIT_RETRY_AFTER_S = int(os.getenv("SUBMIT_RETRY_AFTER_S", "2"))
+SUBMIT_RATE_PER_MINUTE = float(os.getenv("SUBMIT_RATE_PER_MINUTE", "10"))
+SUBMIT_RATE_BURST = float(os.getenv("SUBMIT_RATE_BURST", "5"))
+UPLOAD_RATE_PER_MINUTE = float(os.getenv("UPLOAD_RATE_PER_MINUTE", "30"))
+UPLOAD_RATE_BURST = float(os.getenv("UPLOAD_RATE_BURST", "10"))
+BODY_MAX_BYTES = int(os.getenv("BODY_MAX_BYTES", str(64 * 1024)))
+SUBMIT_BODY_MAX_BYTES = int(os.getenv("SUBMIT_BODY_MAX_BYTES", str(16 * 1024)))
+CHAT_BODY_MAX_BYTES = int(os.getenv("CHAT_BODY_MAX_BYTES", str(8 * 1024)))
+CHAT_BATCH_BODY_MAX_BYTES = int(os.getenv("CHAT_BATCH_BODY_MAX_BYTES", str(128 * 1024)))
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries a Retry-After hint in seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """Async concurrency limit with a bounded FIFO wait queue"""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float, retry_after: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("queue full", self.retry_after)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise AdmissionRejected("queue timeout", self.retry_after)
+        except asyncio.CancelledError:
+            # Cancelled right after being handed a slot: pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        # The slot was handed over by release(); `active` already counts it
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets. A bucket that has refilled is the same as a new one,
+    so the least recently seen keys are dropped once theirs are full again: only
+    clients seen in the last `burst / rate` seconds are kept, and never more
+    than max_keys.
+    """
+
+    def __init__(self, rate_per_second: float, burst: float, max_keys: int = 100000):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.max_keys = max_keys
+        self.rejected = 0
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, tokens: float = 1.0) -> Tuple[bool, int]:
+        """Take tokens from the key's bucket. Returns (allowed, retry_after_seconds)"""
+        if self.rate <= 0:
+            return True, 0
+
+        now = time.monotonic()
+        with self._lock:
+            available, updated = self._buckets.pop(key, (self.burst, now))
+            available = min(self.burst, available + (now - updated) * self.rate)
+
+            if available >= tokens:
+                self._buckets[key] = (available - tokens, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (available, now)
+                self.rejected += 1
+                allowed, retry_after = False, max(1, math.ceil((tokens - available) / self.rate))
+
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            while self._buckets:
+                oldest_available, oldest_updated = next(iter(self._buckets.values()))
+                if oldest_available + (now - oldest_updated) * self.rate < self.burst:
+                    break
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+submit_limiter = ConcurrencyLimiter(
+    SUBMIT_MAX_CONCURRENCY, SUBMIT_MAX_QUEUE, SUBMIT_QUEUE_TIMEOUT_S, SUBMIT_RETRY_AFTER_S
+)
+submit_rate_limiter = TokenBucketLimiter(SUBMIT_RATE_PER_MINUTE / 60.0, SUBMIT_RATE_BURST)
+# Photo uploads started per client, separate from complaint submissions
+upload_rate_limiter = TokenBucketLimiter(UPLOAD_RATE_PER_MINUTE / 60.0, UPLOAD_RATE_BURST)
+
+
+class BodyTooLarge(HTTPException):
+    """Raised from the wrapped receive channel once a streamed body passes its route's limit"""
+
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=f"Request body must be at most {limit} bytes",
+                         headers={"Connection": "close"})
+
+
+class BodyLimits:
+    """
+    Per-route body limits: `routes` maps exact paths to their limit in bytes,
+    paths starting with one of `unlimited_prefixes` are passed through (routes
+    that stream their body and enforce their own limit), and every other path
+    gets `default`.
+    """
+
+    def __init__(self, routes: Dict[str, int], default: int, unlimited_prefixes: Tuple = ()):
+        self.routes = routes
+        self.default = default
+        self.unlimited_prefixes = tuple(unlimited_prefixes)
+        self.rejected_declared = 0
+        self.rejected_streamed = 0
+
+    def limit_for(self, path: str) -> Optional[int]:
+        if path.startswith(self.unlimited_prefixes):
+            return None
+        return self.routes.get(path, self.default)
+
+    def stats(self) -> Dict:
+        return {
+            "default_max_bytes": self.default,
+            "routes": self.routes,
+            "rejected_declared": self.rejected_declared,
+            "rejected_streamed": self.rejected_streamed,
+        }
+
+
+class BodyLimitMiddleware:
+    """Pure ASGI middleware - one header scan per request, and a counter per body chunk"""
+
+    def __init__(self, app, limits: Optional[BodyLimits] = None):
+        self.app = app
+        self.limits = limits if limits is not None else body_limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.limit_for(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > limit:
+                    # Answered without reading a byte of the body; the connection is closed
+                    # rather than drained, so the client cannot keep us reading
+                    self.limits.rejected_declared += 1
+                    too_large = BodyTooLarge(limit)
+                    response = JSONResponse({"detail": too_large.detail}, status_code=413, headers=too_large.headers)
+                    return await response(scope, receive, send)
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    self.limits.rejected_streamed += 1
+                    # An HTTPException, so FastAPI lets it through body parsing and its
+                    # exception handler answers 413
+                    raise BodyTooLarge(limit)
+            return message
+
+        return await self.app(scope, limited_receive, send)
+
+
+# Photo chunks (PATCH /attachments/uploads/...) are streamed to disk and capped at
+# ATTACHMENT_CHUNK_MAX_BYTES by the upload store itself
+body_limits = BodyLimits(
+    {"/submit-complaint": SUBMIT_BODY_MAX_BYTES, "/chat": CHAT_BODY_MAX_BYTES, "/chat-test": CHAT_BODY_MAX_BYTES,
+     "/chat/batch": CHAT_BATCH_BODY_MAX_BYTES},
+    BODY_MAX_BYTES,
+    unlimited_prefixes=("/attachments/uploads/",),
+)
+
+
+def client_key(client_host) -> str:
+    """
+    Rate-limit key: the client's IP. Not the session id, which the client
+    chooses: a fresh id per request would get a fresh bucket every time.
+    """
+    return f"ip:{client_host or 'unknown'}"
@@ -0,0 +1,348 @@
+"""
+Monthly archival of old complaints, and reads that span live and archived months.
+
+`complaints` is range-partitioned by month (see supabase_schema.sql). The
+archival job exports every month older than ARCHIVE_AFTER_MONTHS to a
+compressed columnar file in ARCHIVE_DIR, verifies the file, records it in
+the archive manifest and only then detaches the month's partition. Reads
+through `list_complaints` serve archived months from those files and the rest
+from the database, so callers do not need to know where a month lives.
+
+Files are Parquet (zstd) when the optional `pyarrow` package is installed,
+otherwise gzip-compressed column blocks (`.columns.json.gz`): one JSON object
+of column -> values per exported page.
+
+    python archival.py --after-months 12     # run the job once
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import threading
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from offload import offload_pool
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # optional, Parquet output
+    pyarrow = None
+    parquet = None
+
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(backend_dir, "archive"))
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "0"))
+ARCHIVE_PAGE_SIZE = int(os.getenv("ARCHIVE_PAGE_SIZE", "5000"))
+ARCHIVE_CACHE_MONTHS = int(os.getenv("ARCHIVE_CACHE_MONTHS", "4"))
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+ARCHIVE_READ_CONCURRENCY = int(os.getenv("ARCHIVE_READ_CONCURRENCY", "2"))
+ARCHIVE_READ_MAX_WAITING = int(os.getenv("ARCHIVE_READ_MAX_WAITING", "32"))
+
+TABLE = "complaints"
+
+# Offload queues (offload.py): listings decompress archive files for an admin who is waiting,
+# so they go ahead of the background export job
+READ_QUEUE = "archive_reads"
+EXPORT_QUEUE = "archive_exports"
+offload_pool.queue(READ_QUEUE, concurrency=ARCHIVE_READ_CONCURRENCY, priority=0, max_waiting=ARCHIVE_READ_MAX_WAITING)
+offload_pool.queue(EXPORT_QUEUE, concurrency=1, priority=2)
+
+ARCHIVE_FILE_PATTERN = re.compile(rf"^{TABLE}-(\d{{4}}-\d{{2}})\.(?:parquet|columns\.json\.gz)$")
+
+# Derived columns that are recomputed by the database and not worth archiving or returning
+DERIVED_COLUMNS = ("search_vector",)
+
+
+def strip_derived(rows: List[Dict]) -> List[Dict]:
+    for row in rows:
+        for column in DERIVED_COLUMNS:
+            row.pop(column, None)
+    return rows
+
+
+def parse_month(value: str) -> date:
+    """'2025-03' (or any ISO date/timestamp) -> first day of that month"""
+    return date.fromisoformat(value[:7] + "-01")
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_key(month: date) -> str:
+    return f"{month.year:04d}-{month.month:02d}"
+
+
+def month_bounds(month: date) -> Tuple[str, str]:
+    """UTC [start, end) of a month as ISO timestamps, matching the partition bounds"""
+    start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    end_month = add_months(month, 1)
+    end = datetime(end_month.year, end_month.month, 1, tzinfo=timezone.utc)
+    return start.isoformat(), end.isoformat()
+
+
+def iter_month_rows(client, month: date, page_size: int = ARCHIVE_PAGE_SIZE) -> Iterator[List[Dict]]:
+    """A month's live rows in created_at order, one page at a time"""
+    start, end = month_bounds(month)
+    offset = 0
+    while True:
+        page = client.table(TABLE).select("*").gte("created_at", start).lt("created_at", end) \
+            .order("created_at").order("id").range(offset, offset + page_size - 1).execute().data
+        if page:
+            yield strip_derived(page)
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+class ComplaintArchive:
+    """Archive files for detached months plus a manifest of what is archived where"""
+
+    def __init__(self, directory: str = ARCHIVE_DIR):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self._lock = threading.Lock()
+        self._manifest: Optional[Dict[str, Dict]] = None
+
+    def manifest(self) -> Dict[str, Dict]:
+        if self._manifest is None:
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            else:
+                self._manifest = {}
+        return self._manifest
+
+    def is_archived(self, month: date) -> bool:
+        return month_key(month) in self.manifest()
+
+    def record(self, month: date, entry: Dict):
+        with self._lock:
+            manifest = {**self.manifest(), month_key(month): entry}
+            temp_path = self.manifest_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.manifest_path)
+            self._manifest = manifest
+
+    def unrecorded_months(self) -> List[date]:
+        """Months with an archive file that the manifest does not list"""
+        if not os.path.isdir(self.directory):
+            return []
+        months = []
+        for name in os.listdir(self.directory):
+            match = ARCHIVE_FILE_PATTERN.match(name)
+            if match and match.group(1) not in self.manifest():
+                months.append(parse_month(match.group(1)))
+        return months
+
+    def export_month(self, month: date, pages: Iterator[List[Dict]]) -> Tuple[str, int]:
+        """Write a month's pages to its archive file. Returns (file name, rows written)"""
+        os.makedirs(self.directory, exist_ok=True)
+        extension = "parquet" if pyarrow is not None else "columns.json.gz"
+        name = f"{TABLE}-{month_key(month)}.{extension}"
+        path = os.path.join(self.directory, name)
+        temp_path = path + ".tmp"
+
+        rows = 0
+        if pyarrow is not None:
+            writer = None
+            try:
+                for page in pages:
+                    if writer is None:
+                        schema = pyarrow.Table.from_pylist(page).schema
+                        # Columns that were all null in the first page may hold strings later
+                        for index, field in enumerate(schema):
+                            if pyarrow.types.is_null(field.type):
+                                schema = schema.set(index, field.with_type(pyarrow.string()))
+                        writer = parquet.ParquetWriter(temp_path, schema, compression="zstd")
+                    writer.write_table(pyarrow.Table.from_pylist(page, schema=writer.schema))
+                    rows += len(page)
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+                for page in pages:
+                    columns = list(dict.fromkeys(column for row in page for column in row))
+                    f.write(json.dumps({column: [row.get(column) for row in page] for column in columns}) + "\n")
+                    rows += len(page)
+
+        if rows == 0:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return name, 0
+        os.replace(temp_path, path)
+        return name, rows
+
+    def read_month(self, month: date) -> List[Dict]:
+        entry = self.manifest().get(month_key(month))
+        if entry is None:
+            return []
+        return _load_archive_file(os.path.join(self.directory, entry["file"]))
+
+
+@lru_cache(maxsize=ARCHIVE_CACHE_MONTHS)
+def _load_archive_file(path: str) -> List[Dict]:
+    if path.endswith(".parquet"):
+        if parquet is None:
+            raise RuntimeError(f"Reading {path} requires the pyarrow package")
+        return parquet.read_table(path).to_pylist()
+    rows: List[Dict] = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            block = json.loads(line)
+            columns = list(block)
+            rows.extend(dict(zip(columns, values)) for values in zip(*block.values()))
+    return rows
+
+
+def count_archive_rows(path: str) -> int:
+    """Row count read back from an archive file without materializing the rows"""
+    if path.endswith(".parquet"):
+        return parquet.ParquetFile(path).metadata.num_rows
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return sum(len(next(iter(json.loads(line).values()), [])) for line in f)
+
+
+def ensure_partitions(client, months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    """Create upcoming monthly partitions. Returns how many were created"""
+    return client.rpc("ensure_complaint_partitions", {"months_ahead": months_ahead}).execute().data or 0
+
+
+def archive_old_months(client, archive: ComplaintArchive, after_months: int,
+                       now: Optional[datetime] = None) -> List[str]:
+    """
+    Export and detach every month that ended more than `after_months` months ago,
+    oldest first. A month is only detached after its file has been written and
+    read back with the same row count, and only recorded in the manifest once the
+    database confirms the detach. Returns the archived month keys.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = add_months(date(now.year, now.month, 1), -after_months)
+
+    oldest = client.table(TABLE).select("created_at").order("created_at").limit(1).execute().data
+    # Months with a file but no manifest entry were detached by a run that stopped before recording them
+    starts = archive.unrecorded_months() + ([parse_month(oldest[0]["created_at"])] if oldest else [])
+    if not starts:
+        return []
+
+    archived = []
+    month = min(starts)
+    while month < cutoff:
+        if not archive.is_archived(month):
+            name, rows = archive.export_month(month, iter_month_rows(client, month))
+            path = os.path.join(archive.directory, name)
+            if rows:
+                if count_archive_rows(path) != rows:
+                    os.remove(path)
+                    raise RuntimeError(f"Archive of {month_key(month)} failed verification, partition kept")
+                # Raises (month left for the next run) or returns the detached table's name
+                detached = client.rpc("detach_complaint_partition", {"month": month.isoformat()}).execute().data
+                if not detached:
+                    os.remove(path)
+                    print(f"[ARCHIVE] {month_key(month)}: nothing detached, month left in the database")
+                else:
+                    archive.record(month, {
+                        "file": name,
+                        "rows": rows,
+                        "archived_at": datetime.now(timezone.utc).isoformat(),
+                    })
+                    archived.append(month_key(month))
+                    print(f"[ARCHIVE] {month_key(month)}: {rows} complaints archived to {name}, {detached} detached")
+            elif os.path.exists(path):
+                # No live rows left: a previous run detached the month but stopped before recording it
+                archive.record(month, {
+                    "file": name,
+                    "rows": count_archive_rows(path),
+                    "archived_at": datetime.now(timezone.utc).isoformat(),
+                })
+                archived.append(month_key(month))
+                print(f"[ARCHIVE] {month_key(month)}: recorded {name} from an interrupted run")
+        month = add_months(month, 1)
+    return archived
+
+
+def _live_segments(months: List[date], archive: ComplaintArchive) -> List[Tuple[str, List[date]]]:
+    """Group consecutive months by where they live: ("archive", [...]) or ("live", [...])"""
+    segments: List[Tuple[str, List[date]]] = []
+    for month in months:
+        source = "archive" if archive.is_archived(month) else "live"
+        if segments and segments[-1][0] == source:
+            segments[-1][1].append(month)
+        else:
+            segments.append((source, [month]))
+    return segments
+
+
+def list_complaints(client, archive: ComplaintArchive, first_month: date, last_month: date,
+                    issue_type: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict:
+    """
+    Complaints created in [first_month, last_month], oldest first, whether the
+    months are still in the database or archived.
+    """
+    months = []
+    month = first_month
+    while month <= last_month:
+        months.append(month)
+        month = add_months(month, 1)
+
+    complaints: List[Dict] = []
+    archived_months: List[str] = []
+    skip = offset
+    for source, segment in _live_segments(months, archive):
+        if len(complaints) >= limit:
+            break
+        wanted = limit - len(complaints)
+        if source == "archive":
+            archived_months.extend(month_key(m) for m in segment)
+            for month in segment:
+                rows = archive.read_month(month)
+                if issue_type:
+                    rows = [row for row in rows if row.get("issue_type") == issue_type]
+                if skip >= len(rows):
+                    skip -= len(rows)
+                    continue
+                complaints.extend(rows[skip:skip + limit - len(complaints)])
+                skip = 0
+                if len(complaints) >= limit:
+                    break
+            continue
+
+        start, _ = month_bounds(segment[0])
+        _, end = month_bounds(segment[-1])
+        query = client.table(TABLE).select("*", count="exact").gte("created_at", start).lt("created_at", end)
+        if issue_type:
+            query = query.eq("issue_type", issue_type)
+        result = query.order("created_at").order("id").range(skip, skip + wanted - 1).execute()
+        complaints.extend(strip_derived(result.data))
+        skip = max(skip - (result.count or 0), 0)
+
+    return {"complaints": complaints, "count": len(complaints), "archived_months": archived_months}
+
+
+complaint_archive = ComplaintArchive()
+
+
+if __name__ == "__main__":
+    from database import get_supabase_client
+
+    parser = argparse.ArgumentParser(description="Archive and detach old monthly complaint partitions")
+    parser.add_argument("--after-months", type=int, default=ARCHIVE_AFTER_MONTHS or 12)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    db = get_supabase_client()
+    if db is None:
+        raise SystemExit("Database is not configured")
+    ensure_partitions(db)
+    months = archive_old_months(db, ComplaintArchive(args.archive_dir), args.after_months)
+    print(f"[ARCHIVE] Archived {len(months)} months: {', '.join(months) or 'none'}")
@@ -0,0 +1,465 @@
+"""
+Photo attachments for complaints: resumable uploads, content-addressed storage
+and background image processing.
+
+Uploads follow a small offset-based protocol so a dropped connection only
+loses the chunk in flight:
+
+    POST  /complaints/{id}/attachments    {"filename", "content_type", "size"} -> upload_id
+    HEAD  /attachments/uploads/{upload_id}  -> Upload-Offset: bytes stored so far
+    PATCH /attachments/uploads/{upload_id}  Upload-Offset: n, raw chunk as the body
+
+Each chunk is streamed to a `.part` file in ATTACHMENT_DIR/uploads (written in
+blocks of at most ATTACHMENT_WRITE_BUFFER bytes) while its SHA-256 is updated,
+so memory per upload stays flat whatever the file size. When the last byte
+arrives the file is moved to ATTACHMENT_DIR/objects under its hash: a photo
+that is already stored is not stored twice, and uploading the same photo to
+the same complaint again returns the existing attachment.
+
+New objects are then processed on the offload pool's "images" queue
+(separate processes, see offload.py): EXIF/XMP/text metadata
+(which often holds the phone's GPS position) is stripped from JPEG and PNG
+files without re-encoding them, and a JPEG thumbnail is made when the
+optional `Pillow` package is installed. Until that finishes the attachment's
+status is "processing" and it is not served.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from offload import PROCESS, offload_pool
+
+try:
+    from PIL import Image
+except ImportError:  # optional, thumbnails
+    Image = None
+
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+
+ATTACHMENT_DIR = os.getenv("ATTACHMENT_DIR", os.path.join(backend_dir, "attachments"))
+ATTACHMENT_MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", str(20 * 1024 * 1024)))
+ATTACHMENT_CHUNK_MAX_BYTES = int(os.getenv("ATTACHMENT_CHUNK_MAX_BYTES", str(8 * 1024 * 1024)))
+ATTACHMENT_WRITE_BUFFER = int(os.getenv("ATTACHMENT_WRITE_BUFFER", str(1024 * 1024)))
+ATTACHMENT_UPLOAD_TTL_S = float(os.getenv("ATTACHMENT_UPLOAD_TTL_S", "86400"))
+ATTACHMENT_WORKERS = int(os.getenv("ATTACHMENT_WORKERS", "2"))
+ATTACHMENT_MAX_PER_COMPLAINT = int(os.getenv("ATTACHMENT_MAX_PER_COMPLAINT", "10"))
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "320"))
+
+TABLE = "complaint_attachments"
+CONTENT_TYPES = ("image/jpeg", "image/png")
+COPY_BLOCK = 64 * 1024
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Metadata stripped from stored photos: JPEG APP1 (EXIF, XMP) and APP13 (IPTC) segments,
+# PNG eXIf and text chunks. Colour profiles (APP2, iCCP) are kept.
+JPEG_METADATA_MARKERS = (0xE1, 0xED)
+PNG_METADATA_CHUNKS = (b"eXIf", b"tEXt", b"zTXt", b"iTXt")
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class UploadError(Exception):
+    """An upload request that cannot be applied; `status` is the HTTP status to answer with"""
+
+    def __init__(self, status: int, message: str, offset: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.offset = offset
+
+
+def sniff_content_type(header: bytes) -> Optional[str]:
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(PNG_SIGNATURE):
+        return "image/png"
+    return None
+
+
+def _copy(source, target, count: int):
+    while count > 0:
+        block = source.read(min(count, COPY_BLOCK))
+        if not block:
+            raise ValueError("Truncated image")
+        target.write(block)
+        count -= len(block)
+
+
+def strip_jpeg_metadata(source, target):
+    """Copy a JPEG stream without its metadata segments; the entropy-coded image data is untouched"""
+    if source.read(2) != b"\xff\xd8":
+        raise ValueError("Not a JPEG file")
+    target.write(b"\xff\xd8")
+    while True:
+        marker = source.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError("Corrupt JPEG segment")
+        if marker[1] in (0xD9, 0xDA) or 0xD0 <= marker[1] <= 0xD7:
+            # End of image, or start of scan: everything that follows is image data
+            target.write(marker)
+            while True:
+                block = source.read(COPY_BLOCK)
+                if not block:
+                    return
+                target.write(block)
+        length_bytes = source.read(2)
+        length = int.from_bytes(length_bytes, "big")
+        if len(length_bytes) < 2 or length < 2:
+            raise ValueError("Corrupt JPEG segment")
+        if marker[1] in JPEG_METADATA_MARKERS:
+            source.seek(length - 2, os.SEEK_CUR)
+            continue
+        target.write(marker + length_bytes)
+        _copy(source, target, length - 2)
+
+
+def strip_png_metadata(source, target):
+    """Copy a PNG stream without its EXIF and text chunks"""
+    if source.read(8) != PNG_SIGNATURE:
+        raise ValueError("Not a PNG file")
+    target.write(PNG_SIGNATURE)
+    while True:
+        header = source.read(8)
+        if not header:
+            return
+        if len(header) < 8:
+            raise ValueError("Corrupt PNG chunk")
+        length = int.from_bytes(header[:4], "big")
+        if header[4:] in PNG_METADATA_CHUNKS:
+            source.seek(length + 4, os.SEEK_CUR)  # data and CRC
+            continue
+        target.write(header)
+        _copy(source, target, length + 4)
+        if header[4:] == b"IEND":
+            return
+
+
+def process_image(raw_path: str, object_path: str, thumbnail_path: str, content_type: str) -> Dict:
+    """
+    Process-pool job: write the metadata-free copy of an uploaded photo to
+    `object_path` (and a thumbnail, when Pillow is installed), then remove the
+    raw upload. Returns what was produced.
+    """
+    strip = strip_jpeg_metadata if content_type == "image/jpeg" else strip_png_metadata
+    temp_path = object_path + ".tmp"
+    with open(raw_path, "rb") as source, open(temp_path, "wb") as target:
+        strip(source, target)
+    os.replace(temp_path, object_path)
+
+    thumbnail = False
+    if Image is not None:
+        try:
+            with Image.open(object_path) as image:
+                image.draft("RGB", (THUMBNAIL_SIZE, THUMBNAIL_SIZE))  # decode JPEGs at reduced size
+                image = image.convert("RGB")
+                image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+                image.save(thumbnail_path + ".tmp", "JPEG", quality=80)
+            os.replace(thumbnail_path + ".tmp", thumbnail_path)
+            thumbnail = True
+        except Exception as e:
+            print(f"[ATTACHMENTS] Thumbnail for {os.path.basename(object_path)} failed: {e}")
+    os.remove(raw_path)
+    return {"thumbnail": thumbnail}
+
+
+class AttachmentStore:
+    """Upload state and stored objects on local disk"""
+
+    def __init__(self, directory: str = ATTACHMENT_DIR):
+        self.directory = directory
+        self.uploads_dir = os.path.join(directory, "uploads")
+        self.objects_dir = os.path.join(directory, "objects")
+        self._lock = threading.Lock()
+        # upload id -> (sha256 of the bytes written so far, how many bytes it has seen)
+        self._hashers: Dict[str, Tuple] = {}
+        self._active: set = set()
+        # sha256 of objects with a processing job in flight
+        self._processing: set = set()
+
+    def _upload_path(self, upload_id: str, suffix: str) -> str:
+        return os.path.join(self.uploads_dir, upload_id + suffix)
+
+    def object_path(self, sha256: str, suffix: str = "") -> str:
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + suffix)
+
+    def create(self, complaint_id: str, filename: str, content_type: str, size: int) -> Dict:
+        os.makedirs(self.uploads_dir, exist_ok=True)
+        upload = {
+            "upload_id": uuid.uuid4().hex,
+            "complaint_id": complaint_id,
+            "filename": filename,
+            "content_type": content_type,
+            "size": size,
+            "created_at": time.time(),
+        }
+        with open(self._upload_path(upload["upload_id"], ".json"), "w", encoding="utf-8") as f:
+            json.dump(upload, f)
+        open(self._upload_path(upload["upload_id"], ".part"), "wb").close()
+        return upload
+
+    def get(self, upload_id: str) -> Optional[Dict]:
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            return None
+        try:
+            with open(self._upload_path(upload_id, ".json"), encoding="utf-8") as f:
+                upload = json.load(f)
+        except FileNotFoundError:
+            return None
+        upload["offset"] = os.path.getsize(self._upload_path(upload_id, ".part"))
+        return upload
+
+    def _hasher(self, upload_id: str, offset: int):
+        """SHA-256 state for the first `offset` bytes, rebuilt from disk after a restart"""
+        state = self._hashers.get(upload_id)
+        if state is not None and state[1] == offset:
+            return state[0]
+        hasher = hashlib.sha256()
+        with open(self._upload_path(upload_id, ".part"), "rb") as f:
+            remaining = offset
+            while remaining > 0:
+                block = f.read(min(remaining, COPY_BLOCK))
+                hasher.update(block)
+                remaining -= len(block)
+        return hasher
+
+    def _write(self, upload_id: str, offset: int, data: bytes) -> int:
+        hasher = self._hasher(upload_id, offset)
+        with open(self._upload_path(upload_id, ".part"), "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()
+        hasher.update(data)
+        offset += len(data)
+        self._hashers[upload_id] = (hasher, offset)
+        return offset
+
+    async def append(self, upload: Dict, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """
+        Write one chunk starting at `offset`, which must be where the stored bytes
+        end. Bytes received before a disconnect, or before the piece that takes the
+        chunk past its limits, are kept. Returns the new offset.
+        """
+        upload_id = upload["upload_id"]
+        with self._lock:
+            if upload_id in self._active:
+                raise UploadError(409, "Another chunk of this upload is in progress", upload["offset"])
+            self._active.add(upload_id)
+        try:
+            if offset != upload["offset"]:
+                raise UploadError(409, "Upload-Offset does not match the stored size", upload["offset"])
+            pending = bytearray()
+            received = 0
+            too_large = False
+            try:
+                async for chunk in chunks:
+                    received += len(chunk)
+                    if received > ATTACHMENT_CHUNK_MAX_BYTES or offset + len(pending) + len(chunk) > upload["size"]:
+                        too_large = True
+                        break
+                    pending += chunk
+                    if len(pending) >= ATTACHMENT_WRITE_BUFFER:
+                        offset = await asyncio.to_thread(self._write, upload_id, offset, bytes(pending))
+                        pending.clear()
+            finally:
+                if pending:
+                    offset = await asyncio.to_thread(self._write, upload_id, offset, bytes(pending))
+            if too_large:
+                # The bytes before the offending piece are kept: report the offset after them
+                raise UploadError(413, "Chunk exceeds the upload size or chunk limit", offset)
+            return offset
+        finally:
+            with self._lock:
+                self._active.discard(upload_id)
+
+    def finalize(self, upload: Dict) -> Tuple[str, bool]:
+        """
+        Move a complete upload into object storage under its content hash.
+        Returns (sha256, whether the object still needs processing).
+        """
+        upload_id = upload["upload_id"]
+        part_path = self._upload_path(upload_id, ".part")
+        with open(part_path, "rb") as f:
+            if sniff_content_type(f.read(16)) != upload["content_type"]:
+                self.discard(upload_id)
+                raise UploadError(415, f"File is not a valid {upload['content_type']} image")
+        sha256 = self._hasher(upload_id, upload["size"]).hexdigest()
+        object_path = self.object_path(sha256)
+        with self._lock:
+            if os.path.exists(object_path):
+                needs_processing = False
+                os.remove(part_path)
+            elif os.path.exists(object_path + ".raw"):
+                # Left by a job that is still running, or by one that never started (a restart,
+                # or a failed insert after the move): only the latter is scheduled again
+                needs_processing = sha256 not in self._processing
+                os.remove(part_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(part_path, object_path + ".raw")
+                needs_processing = True
+        self.discard(upload_id)
+        return sha256, needs_processing
+
+    def claim(self, sha256: str) -> bool:
+        """Mark an object's processing job as in flight; False if one already is, or there is nothing to process"""
+        with self._lock:
+            if sha256 in self._processing or not os.path.exists(self.object_path(sha256, ".raw")):
+                return False
+            self._processing.add(sha256)
+            return True
+
+    def release(self, sha256: str):
+        with self._lock:
+            self._processing.discard(sha256)
+
+    def unprocessed(self) -> List[str]:
+        """sha256 of stored objects whose `.raw` has no processing job in flight"""
+        if not os.path.isdir(self.objects_dir):
+            return []
+        with self._lock:
+            return [
+                name[:-4] for prefix in os.listdir(self.objects_dir)
+                if os.path.isdir(os.path.join(self.objects_dir, prefix))
+                for name in os.listdir(os.path.join(self.objects_dir, prefix))
+                if name.endswith(".raw") and name[:-4] not in self._processing
+            ]
+
+    def drop_failed(self, sha256: str):
+        """Remove what a failed processing job left, so the same photo uploaded again is processed again"""
+        with self._lock:
+            for path in (self.object_path(sha256, ".raw"), self.object_path(sha256, ".tmp"),
+                         self.object_path(sha256, ".thumb.jpg.tmp")):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def discard(self, upload_id: str):
+        self._hashers.pop(upload_id, None)
+        for suffix in (".part", ".json"):
+            try:
+                os.remove(self._upload_path(upload_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def expire(self, ttl_s: float = ATTACHMENT_UPLOAD_TTL_S, now: Optional[float] = None) -> int:
+        """Remove uploads started more than `ttl_s` ago that never completed. Returns how many"""
+        now = now or time.time()
+        expired = 0
+        if not os.path.isdir(self.uploads_dir):
+            return 0
+        for name in os.listdir(self.uploads_dir):
+            if not name.endswith(".json"):
+                continue
+            upload = self.get(name[:-5])
+            if upload is not None and now - upload["created_at"] > ttl_s and upload["upload_id"] not in self._active:
+                self.discard(upload["upload_id"])
+                expired += 1
+        return expired
+
+
+attachment_store = AttachmentStore()
+
+IMAGE_QUEUE = "images"
+offload_pool.queue(IMAGE_QUEUE, kind=PROCESS, concurrency=ATTACHMENT_WORKERS, priority=1)
+
+
+def schedule_processing(client, store: AttachmentStore, sha256: str, content_type: str) -> Optional[Future]:
+    """
+    Strip metadata and make the thumbnail on the offload pool, then mark the
+    attachment rows ready. None when a job for the object is already in flight.
+    """
+    if not store.claim(sha256):
+        return None
+    try:
+        future = offload_pool.submit(
+        IMAGE_QUEUE, process_image, store.object_path(sha256, ".raw"), store.object_path(sha256),
+            store.object_path(sha256, ".thumb.jpg"), content_type
+        )
+    except BaseException:
+        store.release(sha256)
+        raise
+
+    def done(completed: Future):
+        try:
+            produced = completed.result()
+            values = {"status": "ready", "has_thumbnail": produced["thumbnail"]}
+        except Exception as e:
+            print(f"[ATTACHMENTS] Processing {sha256} failed: {e}")
+            store.drop_failed(sha256)
+            values = {"status": "failed"}
+        try:
+            client.table(TABLE).update(values).eq("sha256", sha256).execute()
+        except Exception as e:
+            print(f"[ATTACHMENTS] Recording processed {sha256} failed: {getattr(e, 'message', None) or e}")
+        finally:
+            store.release(sha256)
+
+    future.add_done_callback(done)
+    return future
+
+
+def resume_processing(client, store: AttachmentStore) -> int:
+    """At startup: schedule the objects a restart left unprocessed. Returns how many"""
+    resumed = 0
+    for sha256 in store.unprocessed():
+        with open(store.object_path(sha256, ".raw"), "rb") as f:
+            content_type = sniff_content_type(f.read(16))
+        if content_type and schedule_processing(client, store, sha256, content_type) is not None:
+            resumed += 1
+    return resumed
+
+
+def complaint_exists(client, complaint_id: str) -> bool:
+    try:
+        uuid.UUID(complaint_id)
+    except ValueError:
+        return False
+    return bool(client.table("complaints").select("id").eq("id", complaint_id).limit(1).execute().data)
+
+
+def list_attachments(client, complaint_id: str) -> List[Dict]:
+    return client.table(TABLE).select("*").eq("complaint_id", complaint_id).order("created_at").execute().data
+
+
+def record_attachment(client, store: AttachmentStore, upload: Dict) -> Dict:
+    """Store a completed upload and link it to its complaint; the same photo twice gives the same row"""
+    sha256, needs_processing = store.finalize(upload)
+    existing = client.table(TABLE).select("*").eq("complaint_id", upload["complaint_id"]) \
+        .eq("sha256", sha256).limit(1).execute().data
+    if existing:
+        if not needs_processing:
+            return existing[0]
+        # Only after an earlier attempt failed, or never ran (a restart, or a failed insert): process this copy
+        row = client.table(TABLE).update({"status": "processing", "has_thumbnail": False}) \
+            .eq("id", existing[0]["id"]).execute().data[0]
+        schedule_processing(client, store, sha256, upload["content_type"])
+        return row
+
+    # A photo already stored for another complaint is ready unless it is still being processed
+    raw_path = store.object_path(sha256, ".raw")
+    status = "processing" if needs_processing or os.path.exists(raw_path) else "ready"
+    row = client.table(TABLE).insert({
+        "complaint_id": upload["complaint_id"],
+        "sha256": sha256,
+        "filename": upload["filename"],
+        "content_type": upload["content_type"],
+        "size_bytes": upload["size"],
+        "status": status,
+        "has_thumbnail": os.path.exists(store.object_path(sha256, ".thumb.jpg")),
+    }).execute().data[0]
+    if needs_processing and schedule_processing(client, store, sha256, upload["content_type"]) is not None:
+        return row
+    if status == "processing" and not os.path.exists(raw_path):
+        # Processing finished between the check and the insert, so its update missed this row
+        row = client.table(TABLE).update({
+            "status": "ready" if os.path.exists(store.object_path(sha256)) else "failed",
+            "has_thumbnail": os.path.exists(store.object_path(sha256, ".thumb.jpg")),
+        }).eq("id", row["id"]).execute().data[0]
+    return row
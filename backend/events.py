@@ -0,0 +1,291 @@
+"""
+Append-only audit log of the complaint lifecycle.
+
+Every step of a complaint's life is appended as one JSON object per line:
+submitted, deduplicated (it joined an existing cluster of reports of the same
+issue at the same place), routed (the webhook destinations it matched),
+notified (each webhook, email or SMS delivery and whether it went through),
+status_changed (from, to and the operator) and escalated. Each event has a
+sequence number, a timestamp and the complaint id. Lines are never rewritten;
+the log is split into segment files named after their first sequence number
+(events-000000000001.jsonl), with a new one every EVENT_LOG_SEGMENT_BYTES.
+
+Replay memory-maps each segment and splits lines with find(), skipping whole
+segments, and lines without parsing them, up to the requested sequence number.
+Projections (EventProjection subclasses such as LifecycleStats) are kept up to
+date as events are appended and snapshotted every EVENT_SNAPSHOT_INTERVAL_S
+with the sequence number they include, so rebuilding one at startup loads the
+snapshot and only replays the events after it.
+"""
+import mmap
+import os
+import threading
+import time
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+
+EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", os.path.join(backend_dir, "event_log"))
+EVENT_LOG_SEGMENT_BYTES = int(os.getenv("EVENT_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+EVENT_LOG_FSYNC = os.getenv("EVENT_LOG_FSYNC", "0") not in ("0", "false", "False")
+EVENT_SNAPSHOT_INTERVAL_S = float(os.getenv("EVENT_SNAPSHOT_INTERVAL_S", "300"))
+
+EVENT_TYPES = ("submitted", "deduplicated", "routed", "notified", "status_changed", "escalated")
+
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class EventProjection:
+    """State derived from the event log. Subclasses keep apply() cheap: it runs on every append"""
+
+    name = ""
+
+    def apply(self, event: Dict):
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict:
+        raise NotImplementedError
+
+    def restore(self, state: Dict):
+        raise NotImplementedError
+
+
+class LifecycleStats(EventProjection):
+    """Counts of events, submissions by issue type, complaints by status and deliveries by channel"""
+
+    name = "lifecycle_stats"
+
+    def __init__(self):
+        self.restore({})
+
+    def apply(self, event: Dict):
+        event_type = event["type"]
+        self.events[event_type] += 1
+        complaint_id = event.get("complaint_id")
+        if event_type == "submitted":
+            self.submitted_by_issue_type[event.get("issue_type") or "unknown"] += 1
+            if complaint_id not in self.statuses:
+                self.statuses[complaint_id] = "open"
+                self.by_status["open"] += 1
+        elif event_type == "status_changed":
+            previous = self.statuses.get(complaint_id)
+            if previous is not None:
+                self.by_status[previous] -= 1
+            self.statuses[complaint_id] = event["to"]
+            self.by_status[event["to"]] += 1
+        elif event_type == "notified":
+            self.deliveries[f"{event.get('channel')}:{'sent' if event.get('ok') else 'failed'}"] += 1
+
+    def snapshot(self) -> Dict:
+        return {
+            "events": dict(self.events),
+            "submitted_by_issue_type": dict(self.submitted_by_issue_type),
+            "deliveries": dict(self.deliveries),
+            "statuses": self.statuses,
+        }
+
+    def restore(self, state: Dict):
+        self.events = Counter(state.get("events", {}))
+        self.submitted_by_issue_type = Counter(state.get("submitted_by_issue_type", {}))
+        self.deliveries = Counter(state.get("deliveries", {}))
+        self.statuses: Dict[str, str] = dict(state.get("statuses", {}))
+        self.by_status = Counter(self.statuses.values())
+
+    def summary(self) -> Dict:
+        return {
+            "events": dict(self.events),
+            "submitted_by_issue_type": dict(self.submitted_by_issue_type),
+            "complaints_by_status": {status: count for status, count in self.by_status.items() if count},
+            "deliveries": dict(self.deliveries),
+        }
+
+
+class EventLog:
+    def __init__(self, directory: str = EVENT_LOG_DIR, segment_bytes: int = EVENT_LOG_SEGMENT_BYTES,
+                 fsync: bool = EVENT_LOG_FSYNC):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.projections: List[EventProjection] = []
+        self.last_seq = 0
+        self._file = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """(first sequence number, path) of every segment, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                found.append((int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def _segment_path(self, first_seq: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}")
+
+    def _open(self):
+        """Find the end of the log, dropping a torn last line left by a crash mid-write"""
+        os.makedirs(self.directory, exist_ok=True)
+        segments = self.segments()
+        if not segments:
+            path, self.last_seq = self._segment_path(1), 0
+        else:
+            first_seq, path = segments[-1]
+            with open(path, "r+b") as f:
+                size = f.seek(0, os.SEEK_END)
+                complete = 0
+                lines = 0
+                if size:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        complete = mapped.rfind(b"\n") + 1
+                        position = 0
+                        while position < complete:
+                            position = mapped.find(b"\n", position) + 1
+                            lines += 1
+                if complete < size:
+                    f.truncate(complete)
+            self.last_seq = first_seq + lines - 1
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+
+    def _roll(self):
+        self._file.close()
+        self._file = open(self._segment_path(self.last_seq + 1), "ab")
+        self._size = 0
+
+    def append(self, event_type: str, complaint_id: Optional[str] = None, **fields) -> Dict:
+        """Record one event and apply it to the registered projections"""
+        with self._lock:
+            if self._file is None:
+                self._open()
+            event = {"seq": self.last_seq + 1, "ts": round(time.time(), 3), "type": event_type,
+                     "complaint_id": complaint_id, **fields}
+            line = orjson.dumps(event) + b"\n"
+            if self._size and self._size + len(line) > self.segment_bytes:
+                self._roll()
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._size += len(line)
+            self.last_seq = event["seq"]
+            for projection in self.projections:
+                projection.apply(event)
+        return event
+
+    def replay(self, after: int = 0) -> Iterator[Dict]:
+        """Events with a sequence number above `after`, oldest first"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        return self._replay(after)
+
+    def _replay(self, after: int) -> Iterator[Dict]:
+        segments = self.segments()
+        for index, (first_seq, path) in enumerate(segments):
+            if index + 1 < len(segments) and segments[index + 1][0] <= after + 1:
+                continue
+            with open(path, "rb") as f:
+                if not os.fstat(f.fileno()).st_size:
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    position = 0
+                    # Sequence numbers are consecutive, so lines can be skipped without parsing
+                    for _ in range(max(0, after + 1 - first_seq)):
+                        position = mapped.find(b"\n", position) + 1 or len(mapped)
+                    end = mapped.find(b"\n", position)
+                    while end >= 0:
+                        yield orjson.loads(mapped[position:end])
+                        position = end + 1
+                        end = mapped.find(b"\n", position)
+
+    def read(self, after: int = 0, limit: int = 100) -> List[Dict]:
+        return list(islice(self.replay(after), limit))
+
+    def _snapshot_path(self, projection: EventProjection) -> str:
+        return os.path.join(self.directory, "snapshots", f"{projection.name}.json")
+
+    def snapshot(self) -> int:
+        """Write every projection's state with the sequence number it includes. Returns that number"""
+        with self._lock:
+            seq = self.last_seq
+            states = [(projection, orjson.dumps({"seq": seq, "state": projection.snapshot()}))
+                      for projection in self.projections]
+        for projection, body in states:
+            path = self._snapshot_path(projection)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+        return seq
+
+    def attach(self, projection: EventProjection) -> Dict:
+        """
+        Rebuild a projection from its last snapshot and the events after it, then
+        keep it up to date with new events. Returns how much was replayed.
+        """
+        path = self._snapshot_path(projection)
+        applied = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                snapshot = orjson.loads(f.read())
+            projection.restore(snapshot["state"])
+            applied = snapshot["seq"]
+        snapshot_seq = applied
+        # Most of the tail without holding up appends, then the rest under the lock
+        for event in self.replay(applied):
+            projection.apply(event)
+            applied = event["seq"]
+        with self._lock:
+            if self._file is None:
+                self._open()
+            for event in self._replay(applied):
+                projection.apply(event)
+                applied = event["seq"]
+            self.projections.append(projection)
+        return {"snapshot_seq": snapshot_seq, "replayed": applied - snapshot_seq, "seq": applied}
+
+    def detach(self, projection: EventProjection):
+        with self._lock:
+            if projection in self.projections:
+                self.projections.remove(projection)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+event_log: Optional[EventLog] = EventLog() if EVENT_LOG_DIR else None
+lifecycle_stats = LifecycleStats()
+
+
+def record_event(event_type: str, complaint_id: Optional[str] = None, **fields):
+    """Append to the audit log; a failing log never fails the operation being recorded"""
+    if event_log is None:
+        return
+    try:
+        event_log.append(event_type, str(complaint_id) if complaint_id is not None else None, **fields)
+    except Exception as e:
+        print(f"[EVENTS] Recording {event_type} failed: {e}")
+
+
+def record_complaint_saved(row: Dict):
+    """`submitted`, plus `deduplicated` when earlier reports of the same issue and place are queued"""
+    from triage import cluster_key, triage_queue
+
+    complaint_id = row.get("id")
+    record_event("submitted", complaint_id, issue_type=row.get("issue_type"), location_id=row.get("location_id"))
+    duplicates = triage_queue.cluster_size(row)
+    if duplicates:
+        record_event("deduplicated", complaint_id, cluster=cluster_key(row), duplicates=duplicates)
@@ -0,0 +1,263 @@
+"""
+Location gazetteer: canonical wards, streets and landmarks, free-text
+normalization and typeahead.
+
+The gazetteer is a JSON list loaded from GAZETTEER_PATH (see
+gazetteer.example.json):
+
+    [{"id": "street-mg-road", "name": "MG Road", "kind": "street",
+      "aliases": ["Mahatma Gandhi Road"], "lat": 12.9756, "lon": 77.6068, "weight": 5}]
+
+- normalize_location() folds case, punctuation and common abbreviations, so
+  "MG Rd", "M.G. Road" and "mg road" are the same string
+- Gazetteer.resolve() maps free text such as "mg road near metro" to a
+  canonical entry: the longest known name inside the text, after correcting
+  misspelled words against the gazetteer vocabulary (edit distance <= 2)
+- Gazetteer.suggest() serves typeahead from a static sorted-key trie: every
+  name, alias and word-suffix of a name is one sorted key, so a prefix is a
+  contiguous key range found by binary search. Prefixes with large ranges have
+  their best entries precomputed; others scan at most SUGGEST_SCAN_LIMIT keys.
+  Results per prefix are kept in an LRU cache
+"""
+import bisect
+import heapq
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "")
+LOCATION_SUGGEST_CACHE_SIZE = int(os.getenv("LOCATION_SUGGEST_CACHE_SIZE", "4096"))
+SUGGEST_MAX_RESULTS = 10
+SUGGEST_SCAN_LIMIT = 64
+MAX_NGRAM_WORDS = 6
+
+ABBREVIATIONS = {
+    "rd": "road",
+    "st": "street",
+    "str": "street",
+    "ave": "avenue",
+    "av": "avenue",
+    "ln": "lane",
+    "blvd": "boulevard",
+    "nr": "near",
+    "opp": "opposite",
+    "sec": "sector",
+    "sect": "sector",
+    "mkt": "market",
+    "stn": "station",
+    "hosp": "hospital",
+    "xroad": "cross road",
+    "crs": "cross",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z]+|[0-9]+")
+
+
+def location_tokens(text: str, expand_last: bool = True) -> List[str]:
+    """Lowercased words and numbers with abbreviations expanded; dots are dropped so M.G. is mg"""
+    tokens = TOKEN_PATTERN.findall(text.lower().replace(".", ""))
+    last = len(tokens) - 1
+    return [
+        token if (index == last and not expand_last) else ABBREVIATIONS.get(token, token)
+        for index, token in enumerate(tokens)
+    ]
+
+
+def normalize_location(text: str) -> str:
+    return " ".join(location_tokens(text))
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it is certain to exceed `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def _deletes(word: str) -> List[str]:
+    return [word[:i] + word[i + 1:] for i in range(len(word))]
+
+
+class LocationMatch:
+    def __init__(self, entry: Dict, matched: str, distance: int):
+        self.id = entry["id"]
+        self.name = entry["name"]
+        self.kind = entry.get("kind", "")
+        self.lat = entry.get("lat")
+        self.lon = entry.get("lon")
+        self.matched = matched
+        self.distance = distance
+
+    def as_dict(self) -> Dict:
+        return {
+            "id": self.id, "name": self.name, "kind": self.kind, "lat": self.lat, "lon": self.lon,
+            "matched": self.matched, "distance": self.distance,
+        }
+
+
+class Gazetteer:
+    def __init__(self, entries: List[Dict], cache_size: int = LOCATION_SUGGEST_CACHE_SIZE):
+        self.entries = entries
+        # Exact lookup of every normalized name and alias
+        self.names: Dict[str, int] = {}
+        # Word vocabulary for spelling correction: word -> frequency, delete variant -> words
+        self.vocabulary: Dict[str, int] = {}
+        self._deletes: Dict[str, List[str]] = {}
+
+        keys: List[Tuple[str, Tuple[int, float, int], int]] = []
+        for index, entry in enumerate(entries):
+            weight = float(entry.get("weight", 1))
+            forms = [entry["name"]] + list(entry.get("aliases", []))
+            for form_index, form in enumerate(forms):
+                normalized = normalize_location(form)
+                if not normalized:
+                    continue
+                self.names.setdefault(normalized, index)
+                words = normalized.split()
+                for word in words:
+                    self.vocabulary[word] = self.vocabulary.get(word, 0) + 1
+                # Rank: the name beats an alias, which beats a later word of either
+                bonus = 2 if form_index == 0 else 1
+                keys.append((normalized, (bonus, weight, -len(normalized)), index))
+                for start in range(1, len(words)):
+                    keys.append((" ".join(words[start:]), (0, weight, -len(normalized)), index))
+
+        for word in self.vocabulary:
+            if not word.isdigit() and len(word) > 3:
+                for variant in _deletes(word):
+                    self._deletes.setdefault(variant, []).append(word)
+
+        keys.sort(key=lambda key: key[0])
+        self._keys = [key for key, _, _ in keys]
+        self._ranks = [rank for _, rank, _ in keys]
+        self._key_entries = [index for _, _, index in keys]
+        self._heavy: Dict[str, List[int]] = {}
+        self._precompute(0, len(self._keys), 0)
+
+        self._suggest_body = lru_cache(maxsize=cache_size)(self._suggest_body_uncached)
+
+    @classmethod
+    def load(cls, path: str) -> "Gazetteer":
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        gazetteer = cls(entries)
+        print(f"[GAZETTEER] Loaded {len(entries)} locations ({len(gazetteer._keys)} keys) from {path}")
+        return gazetteer
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _best(self, lo: int, hi: int, limit: int) -> List[int]:
+        """Best distinct entries among keys[lo:hi]"""
+        best: Dict[int, Tuple] = {}
+        for position in range(lo, hi):
+            index, rank = self._key_entries[position], self._ranks[position]
+            if index not in best or rank > best[index]:
+                best[index] = rank
+        return [index for index, _ in heapq.nlargest(limit, best.items(), key=lambda item: item[1])]
+
+    def _precompute(self, lo: int, hi: int, depth: int):
+        """Store top entries for every prefix whose key range is too large to scan"""
+        position = lo
+        while position < hi:
+            key = self._keys[position]
+            if len(key) <= depth:
+                position += 1
+                continue
+            prefix = key[:depth + 1]
+            end = bisect.bisect_left(self._keys, prefix + "￿", position, hi)
+            if end - position > SUGGEST_SCAN_LIMIT:
+                self._heavy[prefix] = self._best(position, end, SUGGEST_MAX_RESULTS)
+                self._precompute(position, end, depth + 1)
+            position = end
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_MAX_RESULTS) -> List[Dict]:
+        """Entries whose name, alias or a later word of either starts with `prefix`, best first"""
+        return orjson.loads(self.suggest_body(prefix, limit))
+
+    def suggest_body(self, prefix: str, limit: int = SUGGEST_MAX_RESULTS) -> bytes:
+        """suggest() as a JSON array, cached per normalized prefix"""
+        # The last word may be incomplete, so it is not expanded ("st" could become "station")
+        normalized = " ".join(location_tokens(prefix, expand_last=False))
+        return self._suggest_body(normalized, min(limit, SUGGEST_MAX_RESULTS))
+
+    def _suggest_body_uncached(self, normalized: str, limit: int) -> bytes:
+        if not normalized:
+            return b"[]"
+        indexes = self._heavy.get(normalized)
+        if indexes is None:
+            lo = bisect.bisect_left(self._keys, normalized)
+            hi = bisect.bisect_left(self._keys, normalized + "￿", lo)
+            indexes = self._best(lo, hi, limit)
+        return orjson.dumps([
+            {"id": self.entries[i]["id"], "name": self.entries[i]["name"], "kind": self.entries[i].get("kind", "")}
+            for i in indexes[:limit]
+        ])
+
+    def correct(self, word: str) -> Tuple[str, int]:
+        """Closest vocabulary word within edit distance 2 (1 for short words), and its distance"""
+        if word in self.vocabulary or word.isdigit() or len(word) <= 3:
+            return word, 0
+        limit = 1 if len(word) <= 5 else 2
+        candidates = set(self._deletes.get(word, ()))
+        for variant in _deletes(word):
+            if variant in self.vocabulary:
+                candidates.add(variant)
+            candidates.update(self._deletes.get(variant, ()))
+        best, best_distance = word, limit + 1
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, limit)
+            if distance < best_distance or (
+                distance == best_distance and self.vocabulary[candidate] > self.vocabulary.get(best, 0)
+            ):
+                best, best_distance = candidate, distance
+        return (best, best_distance) if best_distance <= limit else (word, 0)
+
+    def resolve(self, text: str) -> Optional[LocationMatch]:
+        """The canonical location named in free text, or None"""
+        if not isinstance(text, str):
+            return None
+        normalized = normalize_location(text)
+        index = self.names.get(normalized)
+        if index is not None:
+            return LocationMatch(self.entries[index], normalized, 0)
+
+        tokens = normalized.split()
+        corrections = [self.correct(token) for token in tokens]
+        words = [word for word, _ in corrections]
+        # Longest run of words that is a known name wins; fewer corrections break ties
+        for size in range(min(len(words), MAX_NGRAM_WORDS), 0, -1):
+            best: Optional[Tuple[int, int, str]] = None
+            for start in range(len(words) - size + 1):
+                phrase = " ".join(words[start:start + size])
+                index = self.names.get(phrase)
+                if index is None:
+                    continue
+                distance = sum(d for _, d in corrections[start:start + size])
+                if best is None or distance < best[1]:
+                    best = (index, distance, phrase)
+            if best is not None:
+                return LocationMatch(self.entries[best[0]], best[2], best[1])
+        return None
+
+
+def load_gazetteer(path: str = GAZETTEER_PATH) -> Optional[Gazetteer]:
+    if not path:
+        return None
+    return Gazetteer.load(path)
@@ -0,0 +1,289 @@
+"""
+Coordinates, geohash cells and "complaints near here" queries.
+
+Complaints carry `latitude`/`longitude` (sent by the client, or taken from the
+gazetteer entry the location resolved to) and the geohash of that point, so the
+database can group or prefix-match nearby complaints by cell.
+
+Radius queries are served by GridIndex, an in-process uniform grid: each cell
+(GEO_CELL_METERS on a side) holds parallel arrays of latitudes, longitudes and
+document numbers. A query only visits the cells overlapping the circle's
+bounding box, closest first, and checks distances with the equirectangular
+approximation, which is accurate to well under a metre at city-scale radii.
+Once a page of nearest points is found, the remaining cells are only counted,
+and cells lying entirely inside the circle are counted without visiting their
+points. The index is built from the database at startup and updated as each complaint is saved.
+"""
+import heapq
+import math
+import os
+import threading
+from array import array
+from itertools import islice
+from typing import Dict, List, Tuple
+
+GEO_CELL_METERS = float(os.getenv("GEO_CELL_METERS", "250"))
+GEO_PAGE_SIZE = int(os.getenv("GEO_PAGE_SIZE", "5000"))
+GEOHASH_PRECISION = 7  # ~150m x 150m cells
+
+METERS_PER_DEGREE = 111320.0
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Columns returned in nearby results (contact details are left out)
+RESULT_COLUMNS = ["id", "location", "location_id", "issue_type", "complaint_description",
+                  "latitude", "longitude", "created_at"]
+
+
+def valid_coordinates(latitude, longitude) -> bool:
+    return (
+        isinstance(latitude, (int, float)) and isinstance(longitude, (int, float))
+        and not isinstance(latitude, bool) and not isinstance(longitude, bool)
+        and -90 <= latitude <= 90 and -180 <= longitude <= 180
+    )
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Standard base32 geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        bounds, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+class GridIndex:
+    """
+    Append-only grid of complaint coordinates for radius queries. Complaints
+    that are acknowledged or resolved stay in their cell but are flagged, and
+    skipped by `nearby(open_only=True)`; reopening clears the flag.
+    """
+
+    def __init__(self, cell_meters: float = GEO_CELL_METERS):
+        self.cell_degrees = cell_meters / METERS_PER_DEGREE
+        self.ready = False
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._ids: List[str] = []
+            self._numbers: Dict[str, int] = {}
+            # (row, column) -> (latitudes, longitudes, document numbers)
+            self._cells: Dict[Tuple[int, int], Tuple[array, array, array]] = {}
+            # Document number -> 1 when the complaint is no longer open, and the count of those per cell
+            self._closed = bytearray()
+            self._closed_in_cell: Dict[Tuple[int, int], int] = {}
+            self._cell_of: List[Tuple[int, int]] = []
+            self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def add(self, row: Dict):
+        """Index one stored complaint; rows without an id or coordinates, or already indexed, are ignored"""
+        complaint_id = row.get("id")
+        latitude, longitude = row.get("latitude"), row.get("longitude")
+        if not complaint_id or not valid_coordinates(latitude, longitude):
+            return
+        with self._lock:
+            complaint_id = str(complaint_id)
+            if complaint_id in self._numbers:
+                return
+            number = len(self._ids)
+            self._ids.append(complaint_id)
+            self._numbers[complaint_id] = number
+            key = self._cell(latitude, longitude)
+            cell = self._cells.get(key)
+            if cell is None:
+                cell = self._cells[key] = (array("d"), array("d"), array("I"))
+            cell[0].append(latitude)
+            cell[1].append(longitude)
+            cell[2].append(number)
+            self._cell_of.append(key)
+            self._closed.append(0)
+            self._set_closed(number, (row.get("status") or "open") != "open")
+
+    def _set_closed(self, number: int, closed: bool):
+        """Under the lock: flag or unflag one indexed complaint as no longer open"""
+        if self._closed[number] == closed:
+            return
+        self._closed[number] = closed
+        key = self._cell_of[number]
+        self._closed_in_cell[key] = self._closed_in_cell.get(key, 0) + (1 if closed else -1)
+
+    def status_changed(self, row: Dict):
+        """Status listener: acknowledged and resolved complaints are flagged, reopened ones unflagged"""
+        with self._lock:
+            number = self._numbers.get(str(row.get("id")))
+            if number is not None:
+                self._set_closed(number, row.get("status") != "open")
+
+    def _columns(self, longitude: float, lon_delta: float) -> List[int]:
+        """Grid columns overlapping [longitude - lon_delta, longitude + lon_delta], wrapped at the antimeridian"""
+        first_column, last_column = self._cell(0.0, -180.0)[1], self._cell(0.0, 180.0)[1]
+        if lon_delta >= 180:
+            return list(range(first_column, last_column + 1))
+        west, east = longitude - lon_delta, longitude + lon_delta
+        if west < -180:
+            spans = [(-180.0, east), (west + 360, 180.0)]
+        elif east > 180:
+            spans = [(west, 180.0), (-180.0, east - 360)]
+        else:
+            spans = [(west, east)]
+        columns = []
+        for start, end in spans:
+            columns.extend(range(self._cell(0.0, start)[1], self._cell(0.0, end)[1] + 1))
+        return sorted(set(columns))
+
+    def nearby(self, latitude: float, longitude: float, radius_m: float, limit: int = 100,
+               open_only: bool = True) -> Tuple[List[Tuple[str, float]], int]:
+        """
+        Nearest-first (id, distance in metres) within `radius_m`, and the total
+        number within it; only open complaints unless `open_only` is False
+        """
+        lat_scale = METERS_PER_DEGREE
+        lon_scale = METERS_PER_DEGREE * math.cos(math.radians(latitude))
+        lat_delta = radius_m / lat_scale
+        # Close enough to a pole, the circle spans every longitude
+        lon_delta = radius_m / lon_scale if lon_scale > radius_m / 180 else 180.0
+        first_row = self._cell(max(latitude - lat_delta, -90.0), 0.0)[0]
+        last_row = self._cell(min(latitude + lat_delta, 90.0), 0.0)[0]
+        columns = self._columns(longitude, lon_delta)
+        radius_squared = radius_m * radius_m
+        size = self.cell_degrees
+
+        # Each column's shift (0 or +-360 degrees) that takes it the short way round from the query
+        shifts = {}
+        for column in columns:
+            middle = column * size + size / 2 - longitude
+            shifts[column] = (middle + 180) % 360 - 180 - middle
+
+        # add() and status_changed() may run at the same time (listeners): pick the cells, their
+        # lengths and closed counts, and the closed flags under the lock, then score outside it
+        with self._lock:
+            # Probe the box cell by cell, or walk the occupied cells when there are fewer of those
+            if (last_row - first_row + 1) * len(columns) <= len(self._cells):
+                rows = {row: columns for row in range(first_row, last_row + 1)}
+            else:
+                rows = {}
+                for row, column in self._cells:
+                    if first_row <= row <= last_row and column in shifts:
+                        rows.setdefault(row, []).append(column)
+
+            # Overlapping cells, closest first, with whether the circle covers them entirely
+            candidates = []
+            for row, row_columns in rows.items():
+                south = row * size
+                dy_near = max(south - latitude, 0.0, latitude - south - size) * lat_scale
+                dy_far = max(abs(south - latitude), abs(south + size - latitude)) * lat_scale
+                for column in row_columns:
+                    cell = self._cells.get((row, column))
+                    if cell is None:
+                        continue
+                    shift = shifts[column]
+                    west = column * size + shift - longitude
+                    dx_near = max(west, 0.0, -west - size) * lon_scale
+                    nearest = dx_near * dx_near + dy_near * dy_near
+                    if nearest > radius_squared:
+                        continue
+                    dx_far = max(abs(west), abs(west + size)) * lon_scale
+                    covered = dx_far * dx_far + dy_far * dy_far <= radius_squared
+                    closed_here = self._closed_in_cell.get((row, column), 0) if open_only else 0
+                    candidates.append((nearest, covered, shift, cell, len(cell[2]), closed_here))
+            # Only copied when some cell to score holds closed complaints
+            closed = bytes(self._closed) if any(candidate[5] for candidate in candidates) else b""
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        # Max-heap (negated) of the `limit` nearest points so far. Once it is full, cells
+        # that cannot hold a nearer point are only counted, not ranked.
+        best: List[Tuple[float, int]] = []
+        total = 0
+        for nearest, covered, shift, (latitudes, longitudes, numbers), length, closed_here in candidates:
+            origin = longitude - shift
+            # Points appended after the snapshot are left out
+            points = islice(zip(latitudes, longitudes, numbers), length)
+            if len(best) >= limit and nearest >= -best[0][0]:
+                if covered:
+                    total += length - closed_here
+                elif closed_here:
+                    total += sum(
+                        1 for point_lat, point_lon, number in points
+                        if ((point_lat - latitude) * lat_scale) ** 2
+                        + ((point_lon - origin) * lon_scale) ** 2 <= radius_squared and not closed[number]
+                    )
+                else:
+                    total += sum(
+                        1 for point_lat, point_lon in islice(zip(latitudes, longitudes), length)
+                        if ((point_lat - latitude) * lat_scale) ** 2
+                        + ((point_lon - origin) * lon_scale) ** 2 <= radius_squared
+                    )
+                continue
+            # Only cells holding closed complaints need their points checked
+            for point_lat, point_lon, number in points:
+                if closed_here and closed[number]:
+                    continue
+                dy = (point_lat - latitude) * lat_scale
+                dx = (point_lon - origin) * lon_scale
+                distance_squared = dx * dx + dy * dy
+                if distance_squared > radius_squared:
+                    continue
+                total += 1
+                if len(best) < limit:
+                    heapq.heappush(best, (-distance_squared, number))
+                elif distance_squared < -best[0][0]:
+                    heapq.heapreplace(best, (-distance_squared, number))
+
+        nearest_first = sorted((-negated, number) for negated, number in best)
+        return [(self._ids[number], round(math.sqrt(distance), 1)) for distance, number in nearest_first], total
+
+    def build(self, client, page_size: int = GEO_PAGE_SIZE) -> int:
+        """(Re)index every complaint with coordinates, paging by created_at. Returns the index size"""
+        self.clear()
+        offset = 0
+        while True:
+            page = client.table("complaints").select("id", "latitude", "longitude", "status") \
+                .order("created_at").order("id").range(offset, offset + page_size - 1).execute().data
+            for row in page:
+                self.add(row)
+            if len(page) < page_size:
+                break
+            offset += page_size
+        self.ready = True
+        return len(self)
+
+
+geo_index = GridIndex()
+
+
+def nearby_complaints(client, latitude: float, longitude: float, radius_m: float, limit: int = 100,
+                      open_only: bool = True) -> Dict:
+    """Complaints within `radius_m` metres of a point, nearest first, with the total count"""
+    ranked, total = geo_index.nearby(latitude, longitude, radius_m, limit, open_only)
+    rows: Dict[str, Dict] = {}
+    if ranked:
+        found = client.table("complaints").select(",".join(RESULT_COLUMNS)) \
+            .in_("id", [complaint_id for complaint_id, _ in ranked]).execute().data
+        rows = {str(row["id"]): row for row in found}
+    results = [{**rows[complaint_id], "distance_m": distance}
+               for complaint_id, distance in ranked if complaint_id in rows]
+    return {"results": results, "total": total, "complete": geo_index.ready}
@@ -0,0 +1,148 @@
+"""
+Long-lived, pooled HTTP clients for outbound calls (webhook notifications).
+
+One httpx.Client per destination origin keeps connections alive between
+notifications instead of repeating TCP/TLS setup on every call, negotiates
+HTTP/2 over TLS when the `h2` package is available, and caches DNS lookups
+for OUTBOUND_DNS_TTL_S. Clients are created lazily or warmed at startup and
+closed in the app's shutdown.
+"""
+import os
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpcore
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # optional, enables HTTP/2 for https destinations
+    HTTP2_AVAILABLE = False
+
+OUTBOUND_MAX_CONNECTIONS = int(os.getenv("OUTBOUND_MAX_CONNECTIONS", "20"))
+OUTBOUND_MAX_KEEPALIVE = int(os.getenv("OUTBOUND_MAX_KEEPALIVE", "10"))
+OUTBOUND_KEEPALIVE_EXPIRY_S = float(os.getenv("OUTBOUND_KEEPALIVE_EXPIRY_S", "30"))
+OUTBOUND_HTTP2 = os.getenv("OUTBOUND_HTTP2", "1") not in ("0", "false", "False")
+OUTBOUND_DNS_TTL_S = float(os.getenv("OUTBOUND_DNS_TTL_S", "60"))
+
+
+class DNSCache:
+    """TTL cache in front of getaddrinfo; entries are dropped when a connect fails"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((host, port))
+            if entry and entry[0] > now:
+                return entry[1]
+
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._entries[(host, port)] = (now + self.ttl, addresses)
+        return addresses
+
+    def invalidate(self, host: str, port: int):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+class CachingDNSBackend(httpcore.SyncBackend):
+    """
+    Resolves through DNSCache before connecting. TLS still verifies against
+    the original hostname: httpcore passes it separately as server_hostname.
+    """
+
+    def __init__(self, cache: DNSCache):
+        self.cache = cache
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        if self.cache.ttl <= 0:
+            return super().connect_tcp(host, port, timeout, local_address, socket_options)
+
+        last_error: Optional[Exception] = None
+        for address in self.cache.resolve(host, port):
+            try:
+                return super().connect_tcp(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError as e:
+                last_error = e
+        self.cache.invalidate(host, port)
+        raise last_error or httpcore.ConnectError(f"Could not resolve {host}")
+
+
+class OutboundClients:
+    """Pool of keep-alive httpx clients, one per scheme://host:port"""
+
+    def __init__(self, max_connections: int = OUTBOUND_MAX_CONNECTIONS,
+                 max_keepalive: int = OUTBOUND_MAX_KEEPALIVE,
+                 keepalive_expiry: float = OUTBOUND_KEEPALIVE_EXPIRY_S,
+                 http2: bool = OUTBOUND_HTTP2, dns_ttl: float = OUTBOUND_DNS_TTL_S):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.dns_cache = DNSCache(dns_ttl)
+        self._clients: Dict[str, httpx.Client] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def origin(url: str) -> str:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return f"{parts.scheme}://{parts.hostname}:{port}"
+
+    def _create(self) -> httpx.Client:
+        # Headers and body go out as separate writes; without TCP_NODELAY the body
+        # waits on the peer's delayed ACK (~40ms) on every reused connection
+        transport = httpx.HTTPTransport(
+            limits=self.limits,
+            http2=self.http2,
+            socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)],
+        )
+        pool = getattr(transport, "_pool", None)
+        if isinstance(pool, httpcore.ConnectionPool):
+            pool._network_backend = CachingDNSBackend(self.dns_cache)
+        return httpx.Client(transport=transport, headers={"User-Agent": "civic-complaints-backend"})
+
+    def get(self, url: str) -> httpx.Client:
+        key = self.origin(url)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._create()
+                    self._clients[key] = client
+        return client
+
+    def warm(self, *urls: str):
+        """Create clients for known destinations ahead of the first request"""
+        for url in urls:
+            if url:
+                self.get(url)
+
+    def post_json(self, url: str, payload, timeout: float) -> httpx.Response:
+        return self.get(url).post(url, json=payload, timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+    def stats(self) -> Dict:
+        return {"destinations": sorted(self._clients), "http2": self.http2}
+
+
+outbound = OutboundClients()
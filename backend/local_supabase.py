@@ -0,0 +1,521 @@
+"""
+Local, SQLite-backed stand-in for Supabase/PostgREST.
+
+Two ways to use it:
+
+- In-process: `LocalSupabase(...)` exposes the same `table().insert().execute()`
+  / `select().eq().order().limit().execute()` surface as the supabase Client.
+  Selected in database.py with DATABASE_BACKEND=local.
+- Subprocess/HTTP: `python local_supabase.py --port 54321` serves the PostgREST
+  subset under /rest/v1, so the real supabase client can point at it with
+  SUPABASE_URL=http://127.0.0.1:54321 and SUPABASE_KEY=local.anon.key.
+
+Latency, error rate and RLS failures can be injected (seeded, so runs are
+repeatable) to model slow-database and flaky-database scenarios.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+from postgrest.exceptions import APIError
+
+LOCAL_ANON_KEY = "local.anon.key"
+
+COLUMN_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+FILTER_OPERATORS = {
+    "eq": "=",
+    "neq": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "like": "LIKE",
+    "ilike": "LIKE",
+}
+
+Filter = Tuple[str, str, Any]
+
+
+class FaultInjector:
+    """Seeded latency / error / RLS-failure injection applied to every request"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 rls_failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rls_failure_rate = rls_failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FaultInjector":
+        seed = os.getenv("LOCAL_DB_SEED")
+        return cls(
+            latency_ms=float(os.getenv("LOCAL_DB_LATENCY_MS", "0") or 0),
+            jitter_ms=float(os.getenv("LOCAL_DB_JITTER_MS", "0") or 0),
+            error_rate=float(os.getenv("LOCAL_DB_ERROR_RATE", "0") or 0),
+            rls_failure_rate=float(os.getenv("LOCAL_DB_RLS_FAILURE_RATE", "0") or 0),
+            seed=int(seed) if seed else None,
+        )
+
+    def apply(self, table: str, write: bool):
+        """Sleep for the injected latency, then maybe raise an injected failure"""
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+            rls = write and self.rls_failure_rate > 0 and self._random.random() < self.rls_failure_rate
+
+        delay = max(self.latency_ms + jitter, 0.0)
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        if rls:
+            raise APIError({
+                "code": "42501",
+                "message": f'new row violates row-level security policy for table "{table}"',
+                "details": None,
+                "hint": None,
+            })
+        if fail:
+            raise APIError({
+                "code": "PGRST000",
+                "message": "Could not connect to the database (injected failure)",
+                "details": "local_supabase fault injection",
+                "hint": None,
+            })
+
+
+class LocalResult:
+    """Mirrors postgrest's APIResponse"""
+
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class LocalStore:
+    """Schemaless row store: every table is a set of JSON documents in one SQLite table"""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                " tbl TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL,"
+                " PRIMARY KEY (tbl, id))"
+            )
+
+    @staticmethod
+    def _column(name: str) -> str:
+        if not COLUMN_PATTERN.match(name):
+            raise APIError({"code": "PGRST100", "message": f"Invalid column name: {name}", "details": None, "hint": None})
+        return f"json_extract(data, '$.{name}')"
+
+    def _where(self, table: str, filters: List[Filter]) -> Tuple[str, List[Any]]:
+        clauses = ["tbl = ?"]
+        params: List[Any] = [table]
+        for column, operator, value in filters:
+            expression = self._column(column)
+            if operator == "in":
+                values = list(value)
+                clauses.append(f"{expression} IN ({', '.join('?' for _ in values)})" if values else "0")
+                params.extend(values)
+            elif operator == "is":
+                clauses.append(f"{expression} IS NULL" if value is None else f"{expression} = ?")
+                if value is not None:
+                    params.append(value)
+            elif operator == "ilike":
+                clauses.append(f"LOWER({expression}) LIKE LOWER(?)")
+                params.append(value)
+            else:
+                clauses.append(f"{expression} {FILTER_OPERATORS[operator]} ?")
+                params.append(value)
+        return " AND ".join(clauses), params
+
+    def insert(self, table: str, rows: List[Dict]) -> List[Dict]:
+        now = datetime.now(timezone.utc).isoformat()
+        inserted = []
+        for row in rows:
+            record = {"id": str(uuid.uuid4()), "created_at": now, **row}
+            inserted.append(record)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO records (tbl, id, data) VALUES (?, ?, ?)",
+                [(table, str(record["id"]), json.dumps(record)) for record in inserted],
+            )
+        return inserted
+
+    def select(self, table: str, filters: List[Filter], columns: Optional[List[str]] = None,
+               order: Optional[List[Tuple[str, bool]]] = None, limit: Optional[int] = None,
+               offset: int = 0) -> List[Dict]:
+        where, params = self._where(table, filters)
+        sql = f"SELECT data FROM records WHERE {where}"
+        if order:
+            sql += " ORDER BY " + ", ".join(f"{self._column(c)} {'DESC' if desc else 'ASC'}" for c, desc in order)
+        else:
+            sql += " ORDER BY rowid"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit if limit is not None else -1, offset])
+        with self._lock:
+            rows = [json.loads(data) for (data,) in self._conn.execute(sql, params)]
+        if columns and columns != ["*"]:
+            rows = [{c: row.get(c) for c in columns} for row in rows]
+        return rows
+
+    def update(self, table: str, values: Dict, filters: List[Filter]) -> List[Dict]:
+        where, params = self._where(table, filters)
+        with self._lock:
+            matched = [json.loads(data) for (data,) in self._conn.execute(f"SELECT data FROM records WHERE {where}", params)]
+            for row in matched:
+                row.update(values)
+            self._conn.executemany(
+                "UPDATE records SET data = ? WHERE tbl = ? AND id = ?",
+                [(json.dumps(row), table, str(row["id"])) for row in matched],
+            )
+        return matched
+
+    def delete(self, table: str, filters: List[Filter]) -> List[Dict]:
+        where, params = self._where(table, filters)
+        with self._lock:
+            matched = [json.loads(data) for (data,) in self._conn.execute(f"SELECT data FROM records WHERE {where}", params)]
+            self._conn.execute(f"DELETE FROM records WHERE {where}", params)
+        return matched
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LocalQuery:
+    """Chainable builder matching the subset of postgrest-py used by the backend"""
+
+    def __init__(self, client: "LocalSupabase", table: str):
+        self.client = client
+        self.table_name = table
+        self.method = "select"
+        self.payload: Any = None
+        self.columns: Optional[List[str]] = None
+        self.filters: List[Filter] = []
+        self.ordering: List[Tuple[str, bool]] = []
+        self.limit_value: Optional[int] = None
+        self.offset_value = 0
+        self.count_mode: Optional[str] = None
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "LocalQuery":
+        self.method = "select"
+        self.columns = [c.strip() for c in ",".join(columns or ("*",)).split(",")]
+        self.count_mode = count
+        return self
+
+    def insert(self, json: Any, **kwargs) -> "LocalQuery":
+        self.method = "insert"
+        self.payload = json if isinstance(json, list) else [json]
+        return self
+
+    def update(self, json: Dict, **kwargs) -> "LocalQuery":
+        self.method = "update"
+        self.payload = json
+        return self
+
+    def delete(self, **kwargs) -> "LocalQuery":
+        self.method = "delete"
+        return self
+
+    def _filter(self, column: str, operator: str, value: Any) -> "LocalQuery":
+        self.filters.append((column, operator, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "lte", value)
+
+    def like(self, column: str, pattern: str) -> "LocalQuery":
+        return self._filter(column, "like", pattern.replace("*", "%"))
+
+    def ilike(self, column: str, pattern: str) -> "LocalQuery":
+        return self._filter(column, "ilike", pattern.replace("*", "%"))
+
+    def in_(self, column: str, values) -> "LocalQuery":
+        return self._filter(column, "in", list(values))
+
+    def is_(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "is", None if value in (None, "null") else value)
+
+    def order(self, column: str, desc: bool = False, **kwargs) -> "LocalQuery":
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size: int) -> "LocalQuery":
+        self.limit_value = size
+        return self
+
+    def offset(self, size: int) -> "LocalQuery":
+        self.offset_value = size
+        return self
+
+    def range(self, start: int, end: int) -> "LocalQuery":
+        self.offset_value = start
+        self.limit_value = end - start + 1
+        return self
+
+    def execute(self) -> LocalResult:
+        store = self.client.store
+        self.client.faults.apply(self.table_name, write=self.method != "select")
+
+        if self.method == "insert":
+            return LocalResult(store.insert(self.table_name, self.payload))
+        if self.method == "update":
+            return LocalResult(store.update(self.table_name, self.payload, self.filters))
+        if self.method == "delete":
+            return LocalResult(store.delete(self.table_name, self.filters))
+
+        rows = store.select(self.table_name, self.filters, self.columns, self.ordering,
+                            self.limit_value, self.offset_value)
+        count = None
+        if self.count_mode:
+            count = len(store.select(self.table_name, self.filters, ["id"]))
+        return LocalResult(rows, count)
+
+
+def _month_bounds(month: str) -> Tuple[str, str]:
+    start = date.fromisoformat(month[:10])
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return (datetime(start.year, start.month, 1, tzinfo=timezone.utc).isoformat(),
+            datetime(end.year, end.month, 1, tzinfo=timezone.utc).isoformat())
+
+
+def _ensure_complaint_partitions(client: "LocalSupabase", params: Dict) -> int:
+    return 0  # the stand-in is not partitioned
+
+
+def _detach_complaint_partition(client: "LocalSupabase", params: Dict) -> Optional[str]:
+    """Detaching a month's partition removes its rows from `complaints`"""
+    start, end = _month_bounds(params["month"])
+    removed = client.store.delete("complaints", [("created_at", "gte", start), ("created_at", "lt", end)])
+    return f"complaints_{start[:7].replace('-', '_')}" if removed else None
+
+
+# Emulations of the SQL functions in supabase_schema.sql, callable through rpc()
+LOCAL_FUNCTIONS = {
+    "ensure_complaint_partitions": _ensure_complaint_partitions,
+    "detach_complaint_partition": _detach_complaint_partition,
+}
+
+
+class LocalCall:
+    """Result of LocalSupabase.rpc(), executed like a query"""
+
+    def __init__(self, client: "LocalSupabase", name: str, params: Dict):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self) -> LocalResult:
+        function = LOCAL_FUNCTIONS.get(self.name)
+        if function is None:
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function public.{self.name}",
+                            "details": None, "hint": None})
+        self.client.faults.apply(self.name, write=True)
+        return LocalResult(function(self.client, self.params))
+
+
+class LocalSupabase:
+    """In-process replacement for the supabase Client"""
+
+    def __init__(self, path: str = ":memory:", faults: Optional[FaultInjector] = None):
+        self.store = LocalStore(path)
+        self.faults = faults or FaultInjector()
+
+    @classmethod
+    def from_env(cls) -> "LocalSupabase":
+        return cls(os.getenv("LOCAL_DB_PATH", ":memory:"), FaultInjector.from_env())
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict] = None) -> LocalCall:
+        return LocalCall(self, name, params or {})
+
+
+def _parse_filter(column: str, expression: str) -> Filter:
+    """Parse a PostgREST query-string filter such as `status=eq.open` or `id=in.(a,b)`"""
+    operator, _, value = expression.partition(".")
+    if operator == "in":
+        return column, "in", [v.strip('"') for v in value.strip("()").split(",") if v]
+    if operator == "is":
+        return column, "is", None if value == "null" else value
+    if operator not in FILTER_OPERATORS:
+        raise APIError({"code": "PGRST100", "message": f"Unsupported operator: {operator}", "details": None, "hint": None})
+    if operator in ("like", "ilike"):
+        value = value.replace("*", "%")
+    return column, operator, value
+
+
+class _PostgRESTHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method: str):
+        url = urlparse(self.path)
+        if not url.path.startswith("/rest/v1/"):
+            return self._send_json(404, {"message": "Not found"})
+        table = url.path[len("/rest/v1/"):].strip("/")
+
+        query = self.server.client.table(table)
+        limit = offset = None
+        # A malformed filter, limit, offset or body is the client's error, answered 400 like PostgREST
+        try:
+            # Read the body first, so a request refused below does not leave it on the connection
+            length = int(self.headers.get("Content-Length") or 0)
+            raw_body = self.rfile.read(length) if length else b""
+            for key, value in parse_qsl(url.query, keep_blank_values=True):
+                if key == "select":
+                    query.columns = [c.strip() for c in value.split(",")]
+                elif key == "order":
+                    for part in value.split(","):
+                        column, _, direction = part.partition(".")
+                        query.order(column, desc=direction.startswith("desc"))
+                elif key == "limit":
+                    limit = int(value)
+                elif key == "offset":
+                    offset = int(value)
+                elif key != "columns":
+                    query.filters.append(_parse_filter(key, value))
+            if limit is not None:
+                query.limit(limit)
+            if offset is not None:
+                query.offset(offset)
+            body = json.loads(raw_body) if raw_body else None
+        except APIError as e:
+            return self._send_json(400, e.json())
+        except ValueError as e:
+            # The body may not have been read (a bad Content-Length): do not reuse the connection
+            self.close_connection = True
+            return self._send_json(400, {"code": "PGRST100", "message": str(e), "details": None, "hint": None})
+        prefer = self.headers.get("Prefer", "")
+
+        if method == "POST":
+            query.insert(body)
+        elif method == "PATCH":
+            query.update(body)
+        elif method == "DELETE":
+            query.delete()
+        elif "count=" in prefer:
+            query.count_mode = "exact"
+
+        try:
+            result = query.execute()
+        except APIError as e:
+            status = 403 if e.code == "42501" else 400 if (e.code or "").startswith("PGRST1") else 503
+            return self._send_json(status, e.json())
+
+        headers = {}
+        if result.count is not None:
+            headers["Content-Range"] = f"0-{max(len(result.data) - 1, 0)}/{result.count}"
+        if method == "GET" or "return=representation" in prefer:
+            return self._send_json(201 if method == "POST" else 200, result.data, headers)
+        return self._send_json(201 if method == "POST" else 204, None, headers)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalPostgRESTServer(ThreadingHTTPServer):
+    """Serves a LocalSupabase over the PostgREST HTTP protocol"""
+
+    daemon_threads = True
+
+    def __init__(self, client: LocalSupabase, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _PostgRESTHandler)
+        self.client = client
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalPostgRESTServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="local-postgrest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local PostgREST-compatible stand-in backed by SQLite")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--db", default=os.getenv("LOCAL_DB_PATH", ":memory:"), help="SQLite file (default in-memory)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rls-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    faults = FaultInjector(args.latency_ms, args.jitter_ms, args.error_rate, args.rls_failure_rate, args.seed)
+    server = LocalPostgRESTServer(LocalSupabase(args.db, faults), args.host, args.port)
+    print(f"[LOCAL_SUPABASE] Serving PostgREST subset on {server.url}/rest/v1 (db: {args.db})")
+    print(f"[LOCAL_SUPABASE] Use SUPABASE_URL={server.url} SUPABASE_KEY={LOCAL_ANON_KEY}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
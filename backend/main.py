@@ -1,10 +1,24 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Tuple
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
 import os
+import time
 from dotenv import load_dotenv
 
+from admission import (
+    AdmissionRejected, BodyLimitMiddleware, body_limits, client_key, submit_limiter, submit_rate_limiter,
+    upload_rate_limiter
+)
+from offload import ClientDisconnected, offload_pool
+from profiling import GROUP_BY, ProfilingMiddleware, memory_tracer, profiler
+from responses import CompressionMiddleware, FastJSONResponse, StaticJSON, etag_matches
+
 # Stateless message processor - let frontend control conversation flow
 async def process_message(message: str, session_id: str = "default") -> str:
     """
@@ -18,15 +32,291 @@ async def process_message(message: str, session_id: str = "default") -> str:
 
 load_dotenv()
 
-app = FastAPI()
+# Admin token for /debug endpoints - debug endpoints are disabled when unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Most chat turns accepted in one POST /chat/batch
+CHAT_BATCH_MAX_TURNS = int(os.getenv("CHAT_BATCH_MAX_TURNS", "50"))
+
+# Longest chat message accepted by /chat and /chat/batch, matching the transcript's per-message cap
+CHAT_MESSAGE_MAX_CHARS = int(os.getenv("CHAT_MESSAGE_MAX_CHARS", "2000"))
+
+# How often complaints buffered during a database outage are retried
+SPILL_REPLAY_INTERVAL_S = float(os.getenv("SPILL_REPLAY_INTERVAL_S", "5"))
+
+
+async def replay_spilled_complaints_periodically():
+    """Background task: push buffered complaints to the database once its circuit allows it"""
+    from database import replay_spilled_complaints, spill_buffer
+
+    while True:
+        await asyncio.sleep(SPILL_REPLAY_INTERVAL_S)
+        if len(spill_buffer):
+            try:
+                await run_in_threadpool(replay_spilled_complaints)
+            except Exception as e:
+                print(f"[SPILL] Replay failed: {e}")
+
+
+# How often upcoming partitions are created and old months archived (ARCHIVE_AFTER_MONTHS)
+PARTITION_MAINTENANCE_INTERVAL_S = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL_S", "86400"))
+
+
+async def maintain_partitions_periodically():
+    """Background task: create upcoming monthly partitions and archive months past retention"""
+    from archival import (
+        ARCHIVE_AFTER_MONTHS, EXPORT_QUEUE, archive_old_months, complaint_archive, ensure_partitions
+    )
+    from database import get_supabase_client
+
+    while True:
+        client = await run_in_threadpool(get_supabase_client)
+        if client is not None:
+            try:
+                await run_in_threadpool(ensure_partitions, client)
+                if ARCHIVE_AFTER_MONTHS > 0:
+                    await offload_pool.run(EXPORT_QUEUE, archive_old_months, client, complaint_archive,
+                                           ARCHIVE_AFTER_MONTHS)
+            except Exception as e:
+                print(f"[ARCHIVE] Partition maintenance failed: {getattr(e, 'message', None) or e}")
+        await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL_S)
+
+
+# How often abandoned attachment uploads (ATTACHMENT_UPLOAD_TTL_S) are removed
+UPLOAD_EXPIRY_INTERVAL_S = float(os.getenv("UPLOAD_EXPIRY_INTERVAL_S", "3600"))
+
+
+async def expire_uploads_periodically():
+    """Background task: remove attachment uploads that were started but never completed"""
+    from attachments import attachment_store
+
+    while True:
+        await asyncio.sleep(UPLOAD_EXPIRY_INTERVAL_S)
+        try:
+            expired = await run_in_threadpool(attachment_store.expire)
+            if expired:
+                print(f"[ATTACHMENTS] Removed {expired} abandoned uploads")
+        except Exception as e:
+            print(f"[ATTACHMENTS] Upload expiry failed: {e}")
+
+
+async def resume_attachment_processing():
+    """Background task: process the attachments a restart left half done"""
+    from attachments import attachment_store, resume_processing
+    from database import get_supabase_client
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        return
+    try:
+        resumed = await run_in_threadpool(resume_processing, client, attachment_store)
+        if resumed:
+            print(f"[ATTACHMENTS] Resumed processing of {resumed} photos")
+    except Exception as e:
+        print(f"[ATTACHMENTS] Resuming photo processing failed: {getattr(e, 'message', None) or e}")
+
+
+async def expire_sessions_periodically():
+    """Background task: free chat sessions abandoned without a reset"""
+    from sessions import SESSION_SWEEP_INTERVAL_S, session_store
+
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_S)
+        try:
+            sessions, freed = await run_in_threadpool(session_store.expire)
+            if sessions:
+                print(f"[SESSIONS] Freed {sessions} idle sessions ({freed} bytes)")
+        except Exception as e:
+            print(f"[SESSIONS] Session expiry failed: {e}")
+
+
+async def build_geo_index():
+    """Background task: index existing complaint coordinates; new ones are added as they are saved"""
+    from database import get_supabase_client
+    from geo_index import geo_index
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        return
+    try:
+        indexed = await run_in_threadpool(geo_index.build, client)
+        print(f"[GEO] Indexed {indexed} complaint locations")
+    except Exception as e:
+        print(f"[GEO] Building the location index failed: {getattr(e, 'message', None) or e}")
+
+
+async def build_triage_queue():
+    """Background task: queue recent complaints for triage; new ones are added as they are saved"""
+    from database import get_supabase_client
+    from triage import triage_queue
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        return
+    try:
+        queued = await run_in_threadpool(triage_queue.build, client)
+        print(f"[TRIAGE] Queued {queued} complaints")
+    except Exception as e:
+        print(f"[TRIAGE] Building the triage queue failed: {getattr(e, 'message', None) or e}")
+
+
+async def build_escalation_scheduler():
+    """Background task: schedule SLA deadlines of pending complaints and escalate those that pass"""
+    from database import get_supabase_client
+    from sla import SLA_TICK_S, escalation_scheduler
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        return
+    try:
+        pending = await run_in_threadpool(escalation_scheduler.build, client)
+        print(f"[SLA] Scheduled {pending} complaint deadlines")
+    except Exception as e:
+        print(f"[SLA] Loading complaint deadlines failed: {getattr(e, 'message', None) or e}")
+    while True:
+        await asyncio.sleep(SLA_TICK_S)
+        try:
+            await run_in_threadpool(escalation_scheduler.escalate_due, client)
+        except Exception as e:
+            print(f"[SLA] Escalation failed: {getattr(e, 'message', None) or e}")
+
+
+async def build_event_projections():
+    """Background task: rebuild audit log projections from their snapshots, then snapshot periodically"""
+    from events import EVENT_SNAPSHOT_INTERVAL_S, event_log, lifecycle_stats
+
+    if event_log is None:
+        return
+    try:
+        rebuilt = await run_in_threadpool(event_log.attach, lifecycle_stats)
+        print(f"[EVENTS] Replayed {rebuilt['replayed']} events after snapshot {rebuilt['snapshot_seq']}")
+    except Exception as e:
+        print(f"[EVENTS] Rebuilding projections failed: {e}")
+        return
+    while True:
+        await asyncio.sleep(EVENT_SNAPSHOT_INTERVAL_S)
+        try:
+            await run_in_threadpool(event_log.snapshot)
+        except Exception as e:
+            print(f"[EVENTS] Snapshot failed: {e}")
+
+
+async def build_search_index():
+    """Background task: index existing complaints; new ones are added as they are saved"""
+    from database import get_supabase_client
+    from search_index import search_index
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        return
+    try:
+        indexed = await run_in_threadpool(search_index.build, client)
+        print(f"[SEARCH] Indexed {indexed} complaints")
+    except Exception as e:
+        print(f"[SEARCH] Building the search index failed: {getattr(e, 'message', None) or e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from database import (
+        DATABASE_BACKEND, WEBHOOK_URL, close_supabase_client, complaint_listeners, get_supabase_client,
+        webhook_router
+    )
+    from events import event_log, lifecycle_stats
+    from geo_index import geo_index
+    from http_client import outbound
+    from notifications import notifier
+    from search_index import search_backend, search_index
+    from sla import escalation_scheduler, status_listeners
+    from triage import triage_queue
+
+    if DATABASE_BACKEND == "postgres":
+        # Open the connection pool before the first request instead of on it
+        await run_in_threadpool(get_supabase_client)
+    outbound.warm(WEBHOOK_URL, *webhook_router.destination_urls())
+    offload_pool.start()
+    replay_task = asyncio.create_task(replay_spilled_complaints_periodically())
+    partition_task = asyncio.create_task(maintain_partitions_periodically())
+    upload_task = asyncio.create_task(expire_uploads_periodically())
+    resume_task = asyncio.create_task(resume_attachment_processing())
+    session_task = asyncio.create_task(expire_sessions_periodically())
+    complaint_listeners.append(geo_index.add)
+    status_listeners.append(geo_index.status_changed)
+    geo_task = asyncio.create_task(build_geo_index())
+    complaint_listeners.append(triage_queue.add)
+    triage_task = asyncio.create_task(build_triage_queue())
+    status_listeners.append(triage_queue.status_changed)
+    complaint_listeners.append(escalation_scheduler.track)
+    sla_task = asyncio.create_task(build_escalation_scheduler())
+    events_task = asyncio.create_task(build_event_projections())
+    if notifier.lanes:
+        notifier.start()
+        complaint_listeners.append(notifier.complaint_saved)
+        status_listeners.append(notifier.status_changed)
+    index_task = None
+    if search_backend(DATABASE_BACKEND) == "memory":
+        complaint_listeners.append(search_index.add)
+        index_task = asyncio.create_task(build_search_index())
+    yield
+    replay_task.cancel()
+    partition_task.cancel()
+    upload_task.cancel()
+    resume_task.cancel()
+    session_task.cancel()
+    geo_task.cancel()
+    complaint_listeners.remove(geo_index.add)
+    status_listeners.remove(geo_index.status_changed)
+    triage_task.cancel()
+    complaint_listeners.remove(triage_queue.add)
+    status_listeners.remove(triage_queue.status_changed)
+    sla_task.cancel()
+    complaint_listeners.remove(escalation_scheduler.track)
+    if index_task is not None:
+        index_task.cancel()
+        complaint_listeners.remove(search_index.add)
+    if notifier.lanes:
+        complaint_listeners.remove(notifier.complaint_saved)
+        status_listeners.remove(notifier.status_changed)
+        await run_in_threadpool(notifier.stop)
+    events_task.cancel()
+    if event_log is not None:
+        if lifecycle_stats in event_log.projections:
+            await run_in_threadpool(event_log.snapshot)
+            event_log.detach(lifecycle_stats)
+        event_log.close()
+    outbound.close()
+    offload_pool.stop()
+    if DATABASE_BACKEND == "postgres":
+        await run_in_threadpool(close_supabase_client)
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    """Nobody is left to read the response; 499 as nginx logs it"""
+    return Response(status_code=499)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Dependency guarding admin-only endpoints"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+# Per-route request body limits (413), inside CORS so browsers can read the rejection
+app.add_middleware(BodyLimitMiddleware)
 
 # CORS middleware - Local development configuration
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=False,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["Upload-Offset", "Upload-Length", "ETag"],
 )
 
 # Additional CORS headers for all responses
@@ -35,13 +325,19 @@ async def add_cors_headers(request, call_next):
     response = await call_next(request)
     response.headers["Access-Control-Allow-Origin"] = "*"
     response.headers["Access-Control-Allow-Credentials"] = "false"
-    response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
+    response.headers["Access-Control-Allow-Methods"] = "GET, HEAD, POST, PUT, PATCH, DELETE, OPTIONS"
     response.headers["Access-Control-Allow-Headers"] = "*"
     return response
 
+# br/gzip for large compressible bodies
+app.add_middleware(CompressionMiddleware)
+
+# Sampling profiler for /chat and /submit-complaint - a no-op unless enabled
+app.add_middleware(ProfilingMiddleware)
+
 
 class ChatRequest(BaseModel):
-    message: str
+    message: str = Field(max_length=CHAT_MESSAGE_MAX_CHARS)
     session_id: Optional[str] = "default"
 
 
@@ -51,8 +347,11 @@ class ChatResponse(BaseModel):
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
+    from database import record_chat_turn
+
     try:
         reply = await process_message(request.message, request.session_id)
+        record_chat_turn(request.session_id, request.message, reply)
         return ChatResponse(reply=reply)
     except Exception as e:
         import traceback
@@ -86,34 +385,56 @@ async def chat_test_endpoint(request: ChatRequest):
         return ChatResponse(reply="Test endpoint error")
 
 
-@app.post("/submit-complaint")
-async def submit_complaint_endpoint(complaint_data: dict):
-    """Submit a complete complaint to the database"""
+async def submit_complaint(complaint_data: dict, host: Optional[str]) -> Tuple[int, dict, dict]:
+    """Validate and save one submission. Returns the status code, body and headers to send"""
     try:
-        from database import save_complaint, validate_complaint_data
+        from database import extract_complaint_id, store_complaint, validate_complaint_data
 
-        print(f"[SUBMIT_ENDPOINT] Received complaint submission")
-        print(f"[SUBMIT_ENDPOINT] Payload: {complaint_data}")
+        print(f"[SUBMIT_ENDPOINT] Received complaint submission with fields: {', '.join(map(str, complaint_data))}")
+
+        # Per-client rate limit, checked before any other work
+        allowed, retry_after = submit_rate_limiter.consume(client_key(host))
+        if not allowed:
+            print("[SUBMIT_ENDPOINT] Rate limited")
+            return 429, {"success": False, "error": "Too many submissions, please try again shortly"}, \
+                {"Retry-After": str(retry_after)}
 
         # Validate the complaint data
         is_valid, validation_results = validate_complaint_data(complaint_data)
 
         if not is_valid:
-            return {"success": False, "error": "Validation failed", "details": validation_results}
+            return 200, {"success": False, "error": "Validation failed", "details": validation_results}, {}
 
         print("[SUBMIT_ENDPOINT] Validation passed, attempting database save...")
 
-        # Save to database
-        result = save_complaint(complaint_data)
+        # Save to database - bounded concurrency with a bounded wait queue, off the event loop
+        try:
+            async with submit_limiter.slot():
+                result, deliver = await run_in_threadpool(store_complaint, complaint_data)
+        except AdmissionRejected as rejected:
+            print(f"[SUBMIT_ENDPOINT] Rejected by admission control: {rejected.reason}")
+            return 503, {"success": False, "error": "Server is busy, please try again shortly"}, \
+                {"Retry-After": str(rejected.retry_after)}
+        if deliver is not None:
+            # Transcript and webhooks after the slot is released: a slow webhook must not hold it
+            await run_in_threadpool(deliver)
 
-        if result:
-            print("[SUBMIT_ENDPOINT] SUCCESS: Complaint saved to database")
-            print(f"[SUBMIT_ENDPOINT] Result: {result}")
-            return {"success": True, "message": "Complaint submitted successfully"}
+        if getattr(result, "spilled", False):
+            print("[SUBMIT_ENDPOINT] ACCEPTED: Database unavailable, complaint buffered for replay")
+            return 200, {"success": True, "queued": True, "message": "Complaint accepted and will be saved shortly",
+                         "complaint_id": result.complaint_id}, {}
+        elif result:
+            complaint_id = extract_complaint_id(result)
+            print(f"[SUBMIT_ENDPOINT] SUCCESS: Complaint {complaint_id} saved to database")
+            return 200, {
+                "success": True,
+                "message": "Complaint submitted successfully",
+                "complaint_id": complaint_id,
+            }, {}
         else:
             print("[SUBMIT_ENDPOINT] FAILURE: Database save returned None/False")
             print("[SUBMIT_ENDPOINT] This indicates Supabase credentials issue or database error")
-            return {"success": False, "error": "Database save failed - check Supabase credentials and table schema"}
+            return 200, {"success": False, "error": "Database save failed - check Supabase credentials and table schema"}, {}
 
     except Exception as e:
         error_details = str(e)
@@ -121,20 +442,106 @@ async def submit_complaint_endpoint(complaint_data: dict):
         print(f"[SUBMIT_ENDPOINT] Full traceback will be logged by Python")
 
         # Return user-friendly error
-        return {"success": False, "error": "Server error occurred during submission", "details": error_details}
+        return 200, {"success": False, "error": "Server error occurred during submission", "details": error_details}, {}
+
+
+@app.post("/submit-complaint")
+async def submit_complaint_endpoint(complaint_data: dict, request: Request):
+    """Submit a complete complaint to the database"""
+    status_code, body, headers = await submit_complaint(complaint_data, request.client.host if request.client else None)
+    if status_code != 200:
+        return FastJSONResponse(status_code=status_code, content=body, headers=headers)
+    return body
+
+
+class ChatTurn(BaseModel):
+    message: str = Field(max_length=CHAT_MESSAGE_MAX_CHARS)
+    # The complaint field this message answers, validated on its own
+    field: Optional[Literal[
+        "issue_type", "complaint_description", "location", "citizen_name", "mobile_number", "email"
+    ]] = None
+    # When the citizen sent it (epoch seconds), for turns queued while offline
+    sent_at: Optional[float] = None
+
+
+class ChatBatchRequest(BaseModel):
+    session_id: Optional[str] = "default"
+    turns: List[ChatTurn] = Field(default_factory=list, max_length=CHAT_BATCH_MAX_TURNS)
+    submission: Optional[dict] = None
+
+
+@app.post("/chat/batch")
+async def chat_batch_endpoint(body: ChatBatchRequest, request: Request):
+    """
+    Several chat turns, in order, and optionally the complaint they add up to, in
+    one round trip for slow or intermittent connections. The submission is saved
+    only after every turn is recorded, so its transcript includes them.
+    """
+    from database import record_chat_turn, validate_field
+
+    now = time.time()
+    results = []
+    for turn in body.turns:
+        reply = await process_message(turn.message, body.session_id)
+        sent_at = min(turn.sent_at, now) if turn.sent_at is not None else None
+        record_chat_turn(body.session_id, turn.message, reply, sent_at)
+        result = {"reply": reply}
+        if turn.field is not None:
+            result.update(field=turn.field, **validate_field(turn.field, turn.message))
+        results.append(result)
+
+    submission = None
+    if body.submission is not None:
+        status_code, submission, headers = await submit_complaint(
+            {**body.submission, "session_id": body.session_id}, request.client.host if request.client else None
+        )
+        submission = {**submission, "status": status_code}
+        if "Retry-After" in headers:
+            submission["retry_after"] = int(headers["Retry-After"])
+    return FastJSONResponse({"turns": results, "submission": submission})
+
+
+class ResetRequest(BaseModel):
+    session_id: Optional[str] = None
 
 
 @app.post("/reset")
-async def reset_session():
-    """Reset the session for a new complaint"""
-    # Simple session reset - no database for now
-    return {"status": "success", "message": "Session reset successfully"}
+async def reset_session(body: Optional[ResetRequest] = None):
+    """Reset the session for a new complaint, freeing what the server held for it"""
+    from database import reset_session as free_session
 
+    freed = free_session(body.session_id) if body is not None and body.session_id else 0
+    return {"status": "success", "message": "Session reset successfully", "freed": freed > 0}
 
-@app.get("/")
-async def root():
-    """Root endpoint with API information"""
-    return {
+
+@app.post("/sessions/expire", dependencies=[Depends(require_admin)])
+async def expire_sessions(idle_s: Optional[float] = Query(default=None, ge=0)):
+    """Free every chat session unused for `idle_s` seconds (default SESSION_IDLE_TTL_S)"""
+    from sessions import session_store
+
+    sessions, freed = await run_in_threadpool(session_store.expire, idle_s)
+    return FastJSONResponse({"expired": sessions, "reclaimed_bytes": freed, "active": len(session_store)})
+
+
+@app.get("/metrics", dependencies=[Depends(require_admin)])
+async def metrics():
+    """Counters from the in-process components, as JSON"""
+    from http_client import outbound
+    from notifications import notifier
+    from sessions import session_store
+
+    return FastJSONResponse({
+        "sessions": session_store.stats(),
+        "submit_admission": submit_limiter.stats(),
+        "body_limits": body_limits.stats(),
+        "outbound": outbound.stats(),
+        "notifications": notifier.stats(),
+        "offload": offload_pool.stats(),
+    })
+
+
+# Constant bodies are serialized once at startup
+ROOT_BODY = StaticJSON({
         "message": "AI Civic Complaint Assistant API",
         "version": "1.0.0",
         "status": "running",
@@ -145,9 +552,397 @@ async def root():
             "POST /reset": "Reset conversation session"
         },
         "docs": "/docs"  # FastAPI automatic docs
-    }
+})
+HEALTH_BODY = StaticJSON({"status": "ok", "version": "1.0.0"})
+
+
+@app.get("/")
+async def root():
+    """Root endpoint with API information"""
+    return ROOT_BODY.response()
 
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "version": "1.0.0"}
+    return HEALTH_BODY.response()
+
+
+@app.get("/locations/suggest")
+async def suggest_locations(
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=8, ge=1, le=10),
+):
+    """Typeahead for the location field: canonical wards, streets and landmarks starting with `q`"""
+    from database import gazetteer
+
+    if gazetteer is None:
+        raise HTTPException(status_code=503, detail="Location gazetteer not configured")
+    return Response(content=gazetteer.suggest_body(q, limit), media_type="application/json")
+
+
+@app.get("/complaints", dependencies=[Depends(require_admin)])
+async def list_complaints_endpoint(
+    request: Request,
+    from_month: str,
+    to_month: Optional[str] = None,
+    issue_type: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+):
+    """Complaints created between two months (YYYY-MM), including archived months"""
+    from archival import READ_QUEUE, complaint_archive, list_complaints, parse_month
+    from database import get_supabase_client
+
+    try:
+        first_month = parse_month(from_month)
+        last_month = parse_month(to_month) if to_month else first_month
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Months must be formatted as YYYY-MM")
+    if last_month < first_month:
+        raise HTTPException(status_code=400, detail="to_month must not be before from_month")
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    try:
+        result = await offload_pool.run(
+            READ_QUEUE, list_complaints, client, complaint_archive, first_month, last_month, issue_type, limit,
+            offset, request=request
+        )
+    except AdmissionRejected as rejected:
+        raise HTTPException(status_code=503, detail="Server is busy, please try again shortly",
+                            headers={"Retry-After": str(rejected.retry_after)})
+    return FastJSONResponse(result)
+
+
+@app.get("/complaints/search", dependencies=[Depends(require_admin)])
+async def search_complaints_endpoint(
+    q: str = Query(min_length=1, max_length=200),
+    issue_type: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=10000),
+):
+    """Complaints whose description matches `q`, best match first"""
+    from database import DATABASE_BACKEND, get_supabase_client
+    from search_index import search_backend, search_complaints
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    result = await run_in_threadpool(
+        search_complaints, client, search_backend(DATABASE_BACKEND), q, issue_type, limit, offset
+    )
+    return FastJSONResponse(result)
+
+
+@app.get("/complaints/nearby", dependencies=[Depends(require_admin)])
+async def nearby_complaints_endpoint(
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    radius: float = Query(default=500, gt=0, le=10000),
+    limit: int = Query(default=100, ge=1, le=1000),
+    status: Literal["open", "all"] = "open",
+):
+    """Complaints within `radius` metres of a point, nearest first; only open ones unless status=all"""
+    from database import get_supabase_client
+    from geo_index import nearby_complaints
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    result = await run_in_threadpool(nearby_complaints, client, lat, lon, radius, limit, status == "open")
+    return FastJSONResponse(result)
+
+
+class TriageClaimRequest(BaseModel):
+    operator: str = Field(min_length=1, max_length=100)
+
+
+@app.get("/triage/next", dependencies=[Depends(require_admin)])
+async def triage_next(limit: int = Query(default=1, ge=1, le=50)):
+    """The highest-priority unclaimed complaints, best first"""
+    from triage import triage_queue
+
+    return FastJSONResponse({
+        "complaints": triage_queue.next(limit),
+        "queued": len(triage_queue),
+        "complete": triage_queue.ready,
+    })
+
+
+@app.post("/triage/{complaint_id}/claim", dependencies=[Depends(require_admin)])
+async def triage_claim(complaint_id: str, body: TriageClaimRequest):
+    """Take a complaint off the triage queue; claiming it again as the same operator renews the lease"""
+    from triage import ClaimConflict, triage_queue
+
+    try:
+        claimed = triage_queue.claim(complaint_id, body.operator)
+    except ClaimConflict as conflict:
+        return FastJSONResponse(status_code=409, content={
+            "detail": "Complaint already claimed", "claim": conflict.claim
+        })
+    if claimed is None:
+        raise HTTPException(status_code=404, detail="Complaint is not in the triage queue")
+    return FastJSONResponse(claimed)
+
+
+@app.post("/triage/{complaint_id}/release", dependencies=[Depends(require_admin)])
+async def triage_release(complaint_id: str, body: TriageClaimRequest):
+    """Put a claimed complaint back in the triage queue"""
+    from triage import triage_queue
+
+    if not triage_queue.release(complaint_id, body.operator):
+        raise HTTPException(status_code=409, detail="Complaint is not claimed by this operator")
+    return {"released": True}
+
+
+class ComplaintStatusRequest(BaseModel):
+    status: Literal["open", "acknowledged", "resolved"]
+    operator: Optional[str] = Field(default=None, max_length=100)
+
+
+@app.get("/complaints/{complaint_id}/status")
+async def complaint_status(complaint_id: str, if_none_match: Optional[str] = Header(default=None)):
+    """A complaint's progress for the citizen who filed it; cheap to poll with If-None-Match"""
+    from database import get_supabase_client
+    from sla import status_cache
+
+    cached = status_cache.peek(complaint_id)
+    if cached is None:
+        client = await run_in_threadpool(get_supabase_client)
+        if client is None:
+            raise HTTPException(status_code=503, detail="Database not configured")
+        cached = await run_in_threadpool(status_cache.load, client, complaint_id)
+        if cached is None:
+            raise HTTPException(status_code=404, detail="Complaint not found")
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.patch("/complaints/{complaint_id}/status", dependencies=[Depends(require_admin)])
+async def update_complaint_status(complaint_id: str, body: ComplaintStatusRequest):
+    """Acknowledge, resolve or reopen a complaint; its SLA clock restarts in the new status"""
+    from database import get_supabase_client
+    from sla import StatusConflict, set_complaint_status, status_summary
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    try:
+        row = await run_in_threadpool(set_complaint_status, client, complaint_id, body.status, body.operator)
+    except StatusConflict as conflict:
+        raise HTTPException(status_code=409, detail=f"Cannot move a complaint that is {conflict.current} to {body.status}")
+    if row is None:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    return FastJSONResponse(status_summary(row))
+
+
+@app.get("/complaints/{complaint_id}/transcript", dependencies=[Depends(require_admin)])
+async def complaint_transcript(complaint_id: str):
+    """The chat that led to a complaint, streamed as one JSON message per line"""
+    from database import get_supabase_client
+    from transcripts import iter_transcript, load_transcript
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    row = await run_in_threadpool(load_transcript, client, complaint_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    return StreamingResponse(iter_transcript(row), media_type="application/x-ndjson",
+                             headers={"X-Message-Count": str(row["message_count"])})
+
+
+@app.get("/events", dependencies=[Depends(require_admin)])
+async def list_events(after: int = Query(default=0, ge=0), limit: int = Query(default=100, ge=1, le=1000)):
+    """Audit log events after sequence number `after`, oldest first; pass the last seq to page"""
+    from events import event_log
+
+    if event_log is None:
+        raise HTTPException(status_code=404, detail="Event log disabled")
+    events = await run_in_threadpool(event_log.read, after, limit)
+    return FastJSONResponse({"events": events, "last_seq": event_log.last_seq})
+
+
+@app.get("/events/stats", dependencies=[Depends(require_admin)])
+async def event_stats():
+    """Lifecycle counts projected from the audit log"""
+    from events import event_log, lifecycle_stats
+
+    if event_log is None:
+        raise HTTPException(status_code=404, detail="Event log disabled")
+    return FastJSONResponse({**lifecycle_stats.summary(), "complete": lifecycle_stats in event_log.projections})
+
+
+class AttachmentUploadRequest(BaseModel):
+    filename: str
+    content_type: str
+    size: int
+
+
+def upload_response(upload: dict, status_code: int = 200, **content) -> FastJSONResponse:
+    return FastJSONResponse(
+        status_code=status_code,
+        content={"upload_id": upload["upload_id"], "offset": upload["offset"], "size": upload["size"], **content},
+        headers={"Upload-Offset": str(upload["offset"]), "Upload-Length": str(upload["size"])},
+    )
+
+
+@app.post("/complaints/{complaint_id}/attachments")
+async def create_attachment_upload(complaint_id: str, body: AttachmentUploadRequest, request: Request):
+    """Start a resumable photo upload for a complaint; the bytes follow with PATCH"""
+    from attachments import (
+        ATTACHMENT_CHUNK_MAX_BYTES, ATTACHMENT_MAX_BYTES, ATTACHMENT_MAX_PER_COMPLAINT, CONTENT_TYPES,
+        attachment_store, complaint_exists, list_attachments
+    )
+    from database import get_supabase_client
+
+    allowed, retry_after = upload_rate_limiter.consume(client_key(request.client.host if request.client else None))
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Too many uploads, please try again shortly",
+                            headers={"Retry-After": str(retry_after)})
+    if body.content_type not in CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail=f"Only {', '.join(CONTENT_TYPES)} photos are accepted")
+    if not 0 < body.size <= ATTACHMENT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Photos must be at most {ATTACHMENT_MAX_BYTES} bytes")
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    if not await run_in_threadpool(complaint_exists, client, complaint_id):
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    if len(await run_in_threadpool(list_attachments, client, complaint_id)) >= ATTACHMENT_MAX_PER_COMPLAINT:
+        raise HTTPException(status_code=409, detail="This complaint already has the maximum number of photos")
+
+    upload = await run_in_threadpool(
+        attachment_store.create, complaint_id, os.path.basename(body.filename)[:200], body.content_type, body.size
+    )
+    upload["offset"] = 0
+    return upload_response(upload, status_code=201, chunk_max_bytes=ATTACHMENT_CHUNK_MAX_BYTES)
+
+
+@app.head("/attachments/uploads/{upload_id}")
+async def attachment_upload_offset(upload_id: str):
+    """Where to resume an upload: the Upload-Offset header is the number of bytes stored"""
+    from attachments import attachment_store
+
+    upload = await run_in_threadpool(attachment_store.get, upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return Response(headers={"Upload-Offset": str(upload["offset"]), "Upload-Length": str(upload["size"]),
+                             "Cache-Control": "no-store"})
+
+
+@app.patch("/attachments/uploads/{upload_id}")
+async def append_attachment_chunk(upload_id: str, request: Request, upload_offset: int = Header()):
+    """Append the request body at Upload-Offset; the last chunk completes the upload"""
+    from attachments import UploadError, attachment_store, record_attachment
+    from database import get_supabase_client
+
+    upload = await run_in_threadpool(attachment_store.get, upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    try:
+        upload["offset"] = await attachment_store.append(upload, upload_offset, request.stream())
+        if upload["offset"] < upload["size"]:
+            return upload_response(upload, complete=False)
+        client = await run_in_threadpool(get_supabase_client)
+        if client is None:
+            raise HTTPException(status_code=503, detail="Database not configured")
+        attachment = await run_in_threadpool(record_attachment, client, attachment_store, upload)
+    except UploadError as error:
+        headers = {} if error.offset is None else {"Upload-Offset": str(error.offset)}
+        raise HTTPException(status_code=error.status, detail=error.message, headers=headers)
+    return upload_response(upload, complete=True, attachment=attachment)
+
+
+@app.get("/complaints/{complaint_id}/attachments", dependencies=[Depends(require_admin)])
+async def list_attachments_endpoint(complaint_id: str):
+    """A complaint's photo attachments, oldest first"""
+    from attachments import list_attachments
+    from database import get_supabase_client
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    return FastJSONResponse({"attachments": await run_in_threadpool(list_attachments, client, complaint_id)})
+
+
+@app.get("/attachments/{attachment_id}", dependencies=[Depends(require_admin)])
+async def download_attachment(attachment_id: str, thumbnail: bool = False):
+    """The stored photo (metadata stripped) or its thumbnail, streamed from disk"""
+    from attachments import TABLE, attachment_store
+    from database import get_supabase_client
+
+    client = await run_in_threadpool(get_supabase_client)
+    if client is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    rows = await run_in_threadpool(
+        lambda: client.table(TABLE).select("*").eq("id", attachment_id).limit(1).execute().data
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    attachment = rows[0]
+    if attachment["status"] != "ready" or (thumbnail and not attachment.get("has_thumbnail")):
+        raise HTTPException(status_code=409, detail=f"Attachment is {attachment['status']}")
+    if thumbnail:
+        return FileResponse(attachment_store.object_path(attachment["sha256"], ".thumb.jpg"), media_type="image/jpeg")
+    return FileResponse(attachment_store.object_path(attachment["sha256"]), media_type=attachment["content_type"],
+                        filename=attachment["filename"])
+
+
+class ProfileSwitchRequest(BaseModel):
+    sample_rate: float
+
+
+@app.get("/debug/profile", dependencies=[Depends(require_admin)])
+async def download_profile(reset: bool = False):
+    """Download aggregated profile samples in folded flame-graph format"""
+    body = profiler.export_folded()
+    if reset:
+        profiler.reset()
+    return PlainTextResponse(
+        body,
+        headers={"Content-Disposition": 'attachment; filename="profile.folded"'}
+    )
+
+
+@app.post("/debug/profile", dependencies=[Depends(require_admin)])
+async def switch_profile(request: ProfileSwitchRequest):
+    """Turn request sampling on (0 < sample_rate <= 1) or off (0)"""
+    profiler.set_sample_rate(request.sample_rate)
+    return {"status": "success", "profile": profiler.stats()}
+
+
+@app.get("/debug/profile/stats", dependencies=[Depends(require_admin)])
+async def profile_stats():
+    return profiler.stats()
+
+
+class MemoryTraceSwitchRequest(BaseModel):
+    # Frames kept per allocation; 0 stops tracing
+    frames: int = Field(ge=0, le=64)
+
+
+@app.get("/debug/memory", dependencies=[Depends(require_admin)])
+async def memory_report(
+    limit: int = Query(default=20, ge=1, le=200),
+    group_by: str = Query(default="lineno"),
+    since_start: bool = False,
+):
+    """RSS and, while tracing, the top allocation sites (`since_start`: growth since tracing began)"""
+    if group_by not in GROUP_BY:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUP_BY)}")
+    return await run_in_threadpool(memory_tracer.report, limit, group_by, since_start)
+
 
+@app.post("/debug/memory", dependencies=[Depends(require_admin)])
+async def switch_memory_trace(request: MemoryTraceSwitchRequest):
+    """Start tracing allocations (frames > 0, taking the baseline snapshot) or stop (0)"""
+    if request.frames:
+        await run_in_threadpool(memory_tracer.start, request.frames)
+    else:
+        memory_tracer.stop()
+    return {"status": "success", "tracing": memory_tracer.tracing}
@@ -0,0 +1,393 @@
+"""
+Citizen notifications: a receipt when a complaint is saved and a message on
+every status change, by email and SMS.
+
+Providers are pluggable: SMTPProvider sends email (SMTP_HOST etc.), and
+SMSProvider is the interface SMS gateways implement, with HTTPSMSProvider
+posting batches to a JSON gateway (SMS_API_URL). Each provider has a bounded
+queue and its own few worker threads (NOTIFY_WORKERS_PER_PROVIDER).
+Saving a complaint or changing its status only puts the row on the queues,
+and a full queue drops the notification rather than block. Workers render
+the messages from templates compiled at import, and send them in batches of
+up to NOTIFY_BATCH_SIZE (one SMTP session or one gateway request per batch),
+paced by a token bucket per provider (SMTP_RATE_PER_MINUTE /
+SMS_RATE_PER_MINUTE). Failed batches are retried with backoff; when a batch
+fails part way through, only the messages not yet sent are retried.
+"""
+import os
+import queue
+import smtplib
+import ssl
+import string
+import threading
+import time
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+
+from admission import TokenBucketLimiter
+from events import record_event
+from http_client import outbound
+
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_SENDER = os.getenv("SMTP_SENDER", "complaints@localhost")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") not in ("0", "false", "False")
+SMTP_TIMEOUT_S = float(os.getenv("SMTP_TIMEOUT_S", "10"))
+SMTP_RATE_PER_MINUTE = float(os.getenv("SMTP_RATE_PER_MINUTE", "600"))
+
+SMS_API_URL = os.getenv("SMS_API_URL", "")
+SMS_API_TOKEN = os.getenv("SMS_API_TOKEN", "")
+SMS_SENDER = os.getenv("SMS_SENDER", "")
+SMS_TIMEOUT_S = float(os.getenv("SMS_TIMEOUT_S", "10"))
+SMS_RATE_PER_MINUTE = float(os.getenv("SMS_RATE_PER_MINUTE", "60"))
+
+NOTIFY_WORKERS_PER_PROVIDER = int(os.getenv("NOTIFY_WORKERS_PER_PROVIDER", "2"))
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "10000"))
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "20"))
+NOTIFY_BATCH_WAIT_S = float(os.getenv("NOTIFY_BATCH_WAIT_S", "0.5"))
+NOTIFY_RETRY_ATTEMPTS = int(os.getenv("NOTIFY_RETRY_ATTEMPTS", "3"))
+
+ISSUE_LABELS = {
+    "road_traffic": "road/traffic issue",
+    "electricity_power": "electricity/power problem",
+    "water_plumbing": "water/plumbing issue",
+    "garbage_waste": "garbage/waste collection",
+}
+STATUS_MESSAGES = {
+    "open": "has been reopened and is back in the queue",
+    "acknowledged": "has been acknowledged and assigned to a team",
+    "resolved": "has been marked as resolved",
+}
+
+
+class CompiledTemplate:
+    """A str.format-style template parsed once; render() only joins literals and values"""
+
+    def __init__(self, source: str):
+        self.parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if spec or conversion:
+                raise ValueError(f"Template fields take no format spec or conversion: {field}")
+            self.parts.append((literal, field))
+
+    @property
+    def fields(self) -> List[str]:
+        return [field for _, field in self.parts if field]
+
+    def render(self, values: Dict[str, str]) -> str:
+        return "".join(literal + (values[field] if field else "") for literal, field in self.parts)
+
+
+# (event, channel) -> compiled subject and body; SMS has no subject
+TEMPLATES = {
+    ("submitted", "email"): {
+        "subject": CompiledTemplate("Complaint {reference} received"),
+        "body": CompiledTemplate(
+            "Dear {citizen_name},\n\n"
+            "Thank you for reporting a {issue} at {location}. Your complaint reference is {reference}.\n"
+            "We will let you know when it is acknowledged and when it is resolved.\n"
+        ),
+    },
+    ("submitted", "sms"): {
+        "body": CompiledTemplate("Complaint {reference} received: {issue} at {location}. We will keep you updated."),
+    },
+    ("status_changed", "email"): {
+        "subject": CompiledTemplate("Complaint {reference} {status}"),
+        "body": CompiledTemplate(
+            "Dear {citizen_name},\n\n"
+            "Your complaint {reference} about a {issue} at {location} {status_message}.\n"
+        ),
+    },
+    ("status_changed", "sms"): {
+        "body": CompiledTemplate("Complaint {reference} {status_message}."),
+    },
+}
+
+
+class Notification:
+    def __init__(self, to: str, body: str, subject: str = "", complaint_id: Optional[str] = None, event: str = ""):
+        self.to = to
+        self.subject = subject
+        self.body = body
+        self.complaint_id = complaint_id
+        self.event = event
+
+
+def render(event: str, channel: str, row: Dict) -> Notification:
+    """The message for one complaint row"""
+    location = row.get("location") or ""
+    values = {
+        "citizen_name": row.get("citizen_name") or "citizen",
+        "reference": str(row.get("id") or "")[:8].upper(),
+        "issue": ISSUE_LABELS.get(row.get("issue_type"), row.get("issue_type") or "problem"),
+        "location": location if len(location) <= 60 else location[:57] + "...",
+        "status": row.get("status") or "open",
+        "status_message": STATUS_MESSAGES.get(row.get("status") or "open", "has been updated"),
+    }
+    template = TEMPLATES[(event, channel)]
+    to = row.get("email") if channel == "email" else row.get("mobile_number")
+    subject = template["subject"].render(values) if "subject" in template else ""
+    return Notification(to, template["body"].render(values), subject, row.get("id"), event)
+
+
+class BatchInterrupted(Exception):
+    """A batch that failed part way through: `results` holds the outcome of the messages before the failure"""
+
+    def __init__(self, results: List[bool], cause: Exception):
+        super().__init__(f"{cause} (after {len(results)} messages)")
+        self.results = results
+        self.cause = cause
+
+
+class NotificationProvider:
+    """A way of reaching citizens. send_batch delivers several messages at once"""
+
+    channel = ""
+
+    def __init__(self, name: str, rate_per_minute: float):
+        self.name = name
+        self.rate_per_minute = rate_per_minute
+
+    def send_batch(self, messages: List[Notification]) -> List[bool]:
+        """
+        Deliver the messages; per-message success. Raise to have the whole
+        batch retried, or BatchInterrupted to have only the unsent rest retried
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SMTPProvider(NotificationProvider):
+    """Email over SMTP, one session (connect, STARTTLS, login) per batch"""
+
+    channel = "email"
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, sender: str = SMTP_SENDER,
+                 username: str = SMTP_USERNAME, password: str = SMTP_PASSWORD, starttls: bool = SMTP_STARTTLS,
+                 timeout_s: float = SMTP_TIMEOUT_S, rate_per_minute: float = SMTP_RATE_PER_MINUTE):
+        super().__init__(f"smtp:{host}:{port}", rate_per_minute)
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout_s = timeout_s
+
+    def send_batch(self, messages: List[Notification]) -> List[bool]:
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout_s) as smtp:
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+            if self.username:
+                smtp.login(self.username, self.password)
+            results: List[bool] = []
+            for notification in messages:
+                message = EmailMessage()
+                message["From"] = self.sender
+                message["To"] = notification.to
+                message["Subject"] = notification.subject
+                message.set_content(notification.body)
+                try:
+                    smtp.send_message(message)
+                    results.append(True)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                    print(f"[NOTIFY] {self.name}: message refused: {e}")
+                    results.append(False)
+                except (smtplib.SMTPException, OSError) as e:
+                    # The session is gone (disconnect, timeout): the messages already accepted stay sent
+                    if not results:
+                        raise
+                    raise BatchInterrupted(results, e) from e
+            return results
+
+
+class SMSProvider(NotificationProvider):
+    """Interface for SMS gateways: subclasses implement send_batch for their API"""
+
+    channel = "sms"
+
+
+class HTTPSMSProvider(SMSProvider):
+    """Posts {"sender", "messages": [{"to", "body"}]} to a JSON SMS gateway"""
+
+    def __init__(self, url: str = SMS_API_URL, token: str = SMS_API_TOKEN, sender: str = SMS_SENDER,
+                 timeout_s: float = SMS_TIMEOUT_S, rate_per_minute: float = SMS_RATE_PER_MINUTE):
+        super().__init__(f"sms:{outbound.origin(url)}", rate_per_minute)
+        self.url = url
+        self.token = token
+        self.sender = sender
+        self.timeout_s = timeout_s
+
+    def send_batch(self, messages: List[Notification]) -> List[bool]:
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        response = outbound.get(self.url).post(self.url, json={
+            "sender": self.sender,
+            "messages": [{"to": message.to, "body": message.body} for message in messages],
+        }, headers=headers, timeout=self.timeout_s)
+        if response.status_code >= 500:
+            raise RuntimeError(f"SMS gateway returned {response.status_code}")
+        return [200 <= response.status_code < 300] * len(messages)
+
+
+class ProviderLane:
+    """One provider's bounded queue, rate limit and worker threads"""
+
+    def __init__(self, provider: NotificationProvider, workers: int, queue_size: int, batch_size: int,
+                 batch_wait_s: float, retry_attempts: int):
+        self.provider = provider
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait_s = batch_wait_s
+        self.retry_attempts = retry_attempts
+        self.queue: "queue.Queue[Tuple[str, Dict]]" = queue.Queue(maxsize=queue_size)
+        # A batch needs as many tokens as it has messages, so the burst is one batch
+        self.limiter = TokenBucketLimiter(provider.rate_per_minute / 60.0, batch_size)
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "dropped": 0, "batches": 0}
+        self._stats_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+
+    def _count(self, **counts: int):
+        with self._stats_lock:
+            for name, count in counts.items():
+                self.stats[name] += count
+
+    def put(self, event: str, row: Dict):
+        try:
+            self.queue.put_nowait((event, row))
+            self._count(queued=1)
+        except queue.Full:
+            self._count(dropped=1)
+
+    def _next_batch(self) -> List[Tuple[str, Dict]]:
+        try:
+            batch = [self.queue.get(timeout=0.2)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.batch_wait_s
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send(self, messages: List[Notification]):
+        for attempt in range(self.retry_attempts):
+            try:
+                results = self.provider.send_batch(messages)
+            except Exception as e:
+                if isinstance(e, BatchInterrupted):
+                    # Those before the failure are done: retrying them would deliver them twice
+                    done = len(e.results)
+                    self._delivered(messages[:done], e.results)
+                    messages = messages[done:]
+                if attempt + 1 == self.retry_attempts:
+                    print(f"[NOTIFY] {self.provider.name}: dropping {len(messages)} messages: {e}")
+                    self._count(failed=len(messages))
+                    self._record(messages, [False] * len(messages))
+                    return
+                time.sleep(min(30.0, 2 ** attempt))
+                continue
+            self._delivered(messages, results)
+            return
+
+    def _delivered(self, messages: List[Notification], results: List[bool]):
+        sent = sum(results)
+        self._count(sent=sent, failed=len(messages) - sent, batches=1)
+        self._record(messages, results)
+
+    def _record(self, messages: List[Notification], results: List[bool]):
+        for message, ok in zip(messages, results):
+            record_event("notified", message.complaint_id, channel=self.provider.channel,
+                         provider=self.provider.name, event=message.event, ok=bool(ok))
+
+    def _run(self):
+        while not (self._stopping.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            messages = []
+            for event, row in batch:
+                try:
+                    messages.append(render(event, self.provider.channel, row))
+                except Exception as e:
+                    print(f"[NOTIFY] Rendering {event} for {row.get('id')} failed: {e}")
+                    self._count(failed=1)
+            while messages:
+                allowed, retry_after = self.limiter.consume(self.provider.name, len(messages))
+                if allowed:
+                    break
+                time.sleep(retry_after)
+            if messages:
+                self._send(messages)
+
+    def start(self):
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"notify-{self.provider.channel}-{number}", daemon=True)
+            for number in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float):
+        """Stop after sending what is queued, waiting at most `timeout` seconds"""
+        self._stopping.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+        self.provider.close()
+
+
+class NotificationDispatcher:
+    """Routes complaint events to every provider that can reach the citizen"""
+
+    def __init__(self, providers: List[NotificationProvider], workers: int = NOTIFY_WORKERS_PER_PROVIDER,
+                 queue_size: int = NOTIFY_QUEUE_SIZE, batch_size: int = NOTIFY_BATCH_SIZE,
+                 batch_wait_s: float = NOTIFY_BATCH_WAIT_S, retry_attempts: int = NOTIFY_RETRY_ATTEMPTS):
+        self.lanes = [ProviderLane(provider, workers, queue_size, batch_size, batch_wait_s, retry_attempts)
+                      for provider in providers]
+
+    def publish(self, event: str, row: Dict):
+        for lane in self.lanes:
+            contact = row.get("email") if lane.provider.channel == "email" else row.get("mobile_number")
+            if contact:
+                lane.put(event, row)
+
+    def complaint_saved(self, row: Dict):
+        """Complaint listener: queue the submission receipt"""
+        self.publish("submitted", row)
+
+    def status_changed(self, row: Dict):
+        """Status listener: queue the status update"""
+        self.publish("status_changed", row)
+
+    def start(self):
+        for lane in self.lanes:
+            lane.start()
+
+    def stop(self, timeout: float = 5.0):
+        for lane in self.lanes:
+            lane.stop(timeout)
+
+    def stats(self) -> Dict:
+        return {lane.provider.name: {**lane.stats, "pending": lane.queue.qsize()} for lane in self.lanes}
+
+
+def configured_providers() -> List[NotificationProvider]:
+    providers: List[NotificationProvider] = []
+    if SMTP_HOST:
+        providers.append(SMTPProvider())
+    if SMS_API_URL:
+        providers.append(HTTPSMSProvider())
+    return providers
+
+
+notifier = NotificationDispatcher(configured_providers())
@@ -0,0 +1,254 @@
+"""
+Offload pool for CPU-bound work, shared by every subsystem.
+
+Work is submitted to a named queue. A queue runs either on the pool's
+threads (work that touches in-process state or spends its time in C code
+that releases the GIL: gzip, zlib, JSON) or on its processes (picklable
+functions that hold the GIL for long: image processing). Each queue has its
+own concurrency limit and a priority: when a worker frees up, the oldest
+waiting job of the highest-priority queue (lowest number) that is under its
+limit runs next, so a backlog of archive exports never holds up an admin
+listing. A queue can bound how many jobs wait; past that, submissions are
+rejected with AdmissionRejected.
+
+Request handlers `await offload_pool.run(...)`, which never blocks the event
+loop. Given the request, it stops waiting when the client disconnects and
+raises ClientDisconnected: a job that has not started is cancelled, one that
+is already running finishes and its result is dropped. `submit()` is the
+thread-safe form, returning a concurrent.futures.Future, for callers running
+in worker threads.
+
+The pool is started in the app lifespan and stopped on shutdown; a
+submission before it is started (scripts, benchmarks) starts it.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from admission import AdmissionRejected
+
+OFFLOAD_THREAD_WORKERS = int(os.getenv("OFFLOAD_THREAD_WORKERS", "4"))
+OFFLOAD_PROCESS_WORKERS = int(os.getenv("OFFLOAD_PROCESS_WORKERS", "2"))
+OFFLOAD_RETRY_AFTER_S = int(os.getenv("OFFLOAD_RETRY_AFTER_S", "2"))
+
+THREAD = "thread"
+PROCESS = "process"
+
+
+class ClientDisconnected(Exception):
+    """The client went away while its request waited for offloaded work"""
+
+
+class _Job:
+    __slots__ = ("future", "fn", "args", "queued_at")
+
+    def __init__(self, fn: Callable, args: Tuple):
+        self.future: Future = Future()
+        self.fn = fn
+        self.args = args
+        self.queued_at = time.monotonic()
+
+
+class OffloadQueue:
+    def __init__(self, name: str, kind: str, concurrency: int, priority: int, max_waiting: Optional[int]):
+        self.name = name
+        self.kind = kind
+        self.concurrency = concurrency
+        self.priority = priority
+        self.max_waiting = max_waiting
+        self.waiting: Deque[_Job] = deque()
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.abandoned = 0
+        self.rejected = 0
+        self.wait_s = 0.0
+        self.run_s = 0.0
+
+    def stats(self) -> Dict:
+        started = self.completed + self.failed
+        return {
+            "kind": self.kind,
+            "concurrency": self.concurrency,
+            "priority": self.priority,
+            "waiting": len(self.waiting),
+            "active": self.active,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "abandoned": self.abandoned,
+            "rejected": self.rejected,
+            "mean_wait_ms": round(self.wait_s / started * 1000, 3) if started else 0.0,
+            "mean_run_ms": round(self.run_s / started * 1000, 3) if started else 0.0,
+        }
+
+
+class OffloadPool:
+    def __init__(self, thread_workers: int = OFFLOAD_THREAD_WORKERS, process_workers: int = OFFLOAD_PROCESS_WORKERS):
+        self.workers = {THREAD: thread_workers, PROCESS: process_workers}
+        self.busy = {THREAD: 0, PROCESS: 0}
+        self.queues: Dict[str, OffloadQueue] = {}
+        self._executors: Dict[str, Executor] = {}
+        self._lock = threading.Lock()
+
+    def queue(self, name: str, kind: str = THREAD, concurrency: int = 1, priority: int = 0,
+              max_waiting: Optional[int] = None) -> OffloadQueue:
+        """Register a named queue. Registering a name again returns the existing queue"""
+        with self._lock:
+            if name not in self.queues:
+                self.queues[name] = OffloadQueue(name, kind, concurrency, priority, max_waiting)
+            return self.queues[name]
+
+    @property
+    def running(self) -> bool:
+        return bool(self._executors)
+
+    def start(self):
+        with self._lock:
+            self._start()
+
+    def _start(self):
+        if not self._executors:
+            self._executors = {
+                THREAD: ThreadPoolExecutor(max_workers=self.workers[THREAD], thread_name_prefix="offload"),
+                # Spawned rather than forked: the server process has threads holding locks
+                PROCESS: ProcessPoolExecutor(max_workers=self.workers[PROCESS],
+                                             mp_context=multiprocessing.get_context("spawn")),
+            }
+
+    def stop(self):
+        """Cancel waiting jobs and shut the workers down without waiting for running ones"""
+        with self._lock:
+            executors, self._executors = self._executors, {}
+            waiting = [job for queue in self.queues.values() for job in queue.waiting]
+        # Cancelling runs the futures' callbacks, which take the lock
+        for job in waiting:
+            job.future.cancel()
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, name: str, fn: Callable, *args) -> Future:
+        """Queue `fn(*args)` on the named queue; thread-safe"""
+        with self._lock:
+            queue = self.queues[name]
+            if queue.max_waiting is not None and len(queue.waiting) >= queue.max_waiting:
+                queue.rejected += 1
+                raise AdmissionRejected(f"{name} queue full", OFFLOAD_RETRY_AFTER_S)
+            self._start()
+            job = _Job(fn, args)
+            queue.submitted += 1
+            queue.waiting.append(job)
+            ready = self._take(queue.kind)
+        job.future.add_done_callback(partial(self._cancelled, queue, job))
+        self._launch(ready)
+        return job.future
+
+    async def run(self, name: str, fn: Callable, *args, request=None):
+        """
+        Await `fn(*args)` from the named queue. With `request`, raises
+        ClientDisconnected as soon as the client goes away. The request's body
+        must already have been read.
+        """
+        future = self.submit(name, fn, *args)
+        result = asyncio.wrap_future(future)
+        if request is None:
+            return await result
+
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(request))
+        try:
+            await asyncio.wait((result, disconnected), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            result.cancel()
+            raise
+        finally:
+            disconnected.cancel()
+        if result.done():
+            return result.result()
+        if not future.cancel():
+            with self._lock:
+                self.queues[name].abandoned += 1
+        result.cancel()
+        raise ClientDisconnected()
+
+    def _take(self, kind: str) -> List[Tuple[OffloadQueue, _Job]]:
+        """Under the lock: claim free workers of `kind` for the best waiting jobs"""
+        ready = []
+        while self.busy[kind] < self.workers[kind]:
+            candidates = [queue for queue in self.queues.values()
+                          if queue.kind == kind and queue.waiting and queue.active < queue.concurrency]
+            if not candidates:
+                break
+            queue = min(candidates, key=lambda q: (q.priority, q.waiting[0].queued_at))
+            job = queue.waiting.popleft()
+            if not job.future.set_running_or_notify_cancel():
+                continue  # cancelled while waiting, counted by _cancelled
+            queue.active += 1
+            self.busy[kind] += 1
+            queue.wait_s += time.monotonic() - job.queued_at
+            ready.append((queue, job))
+        return ready
+
+    def _launch(self, ready: List[Tuple[OffloadQueue, _Job]]):
+        for queue, job in ready:
+            started = time.monotonic()
+            try:
+                running = self._executors[queue.kind].submit(job.fn, *job.args)
+            except Exception as e:  # stopped or broken in the meantime
+                running = Future()
+                running.set_exception(e)
+            running.add_done_callback(partial(self._finished, queue, job, started))
+
+    def _finished(self, queue: OffloadQueue, job: _Job, started: float, running: Future):
+        error = RuntimeError("offload pool stopped") if running.cancelled() else running.exception()
+        with self._lock:
+            queue.active -= 1
+            self.busy[queue.kind] -= 1
+            queue.run_s += time.monotonic() - started
+            if error is None:
+                queue.completed += 1
+            else:
+                queue.failed += 1
+            ready = self._take(queue.kind) if self._executors else []
+        if error is None:
+            job.future.set_result(running.result())
+        else:
+            job.future.set_exception(error)
+        self._launch(ready)
+
+    def _cancelled(self, queue: OffloadQueue, job: _Job, future: Future):
+        if not future.cancelled():
+            return
+        with self._lock:
+            queue.cancelled += 1
+            try:
+                queue.waiting.remove(job)
+            except ValueError:
+                pass  # already taken off by _take
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "workers": dict(self.workers),
+                "busy": dict(self.busy),
+                "queues": {name: queue.stats() for name, queue in self.queues.items()},
+            }
+
+
+async def _wait_for_disconnect(request):
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+offload_pool = OffloadPool()
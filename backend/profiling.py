@@ -0,0 +1,273 @@
+"""
+Sampling profiler for the hot endpoints (/chat and /submit-complaint).
+
+Disabled by default. When the sample rate is above zero (PROFILE_SAMPLE_RATE
+or the admin POST /debug/profile switch), a fraction of requests to the
+profiled paths turn on a background thread that snapshots every thread's
+stack each PROFILE_INTERVAL_MS. Stacks are aggregated in "folded" format
+(`frame;frame;frame count`), which flamegraph.pl and speedscope read as-is.
+
+Memory tracing is off by default too. MEMORY_TRACE_FRAMES (or the admin
+POST /debug/memory switch) starts tracemalloc, keeping that many frames per
+allocation, and takes a baseline snapshot; GET /debug/memory then reports
+the process's RSS and the top allocation sites, optionally as growth since
+the baseline. Tracing slows allocation-heavy code down, so leave it on only
+while looking for a leak.
+"""
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0") or 0)
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1") or 1)
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "0") or 0)
+
+PROFILED_PATHS = frozenset({"/chat", "/submit-complaint"})
+
+# Bound memory: stop recording new distinct stacks past this many
+MAX_DISTINCT_STACKS = 20000
+MAX_STACK_DEPTH = 64
+
+# Leaf frames of threads that are parked waiting for work - not useful on a flame graph
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _fold_stack(frame) -> Optional[str]:
+    """Convert a frame into a root-first `func (file:line);...` string"""
+    parts: List[str] = []
+    leaf = frame
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+
+    leaf_code = leaf.f_code
+    if (os.path.basename(leaf_code.co_filename), leaf_code.co_name) in IDLE_LEAVES:
+        return None
+
+    parts.reverse()
+    return ";".join(parts)
+
+
+class RequestProfiler:
+    """Aggregates stack samples while at least one sampled request is in flight"""
+
+    def __init__(self, sample_rate: float = 0.0, interval_ms: float = 1.0):
+        self.sample_rate = sample_rate
+        self.interval = max(interval_ms, 0.1) / 1000.0
+        self.stacks: Counter = Counter()
+        self.sampled_requests = 0
+        self.samples = 0
+        self.dropped_samples = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_sample_rate(self, sample_rate: float):
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        print(f"[PROFILE] Sample rate set to {self.sample_rate}")
+
+    def should_sample(self) -> bool:
+        rate = self.sample_rate
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def start_request(self):
+        with self._lock:
+            self._in_flight += 1
+            self.sampled_requests += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def end_request(self):
+        with self._lock:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._wakeup.clear()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            self._wakeup.wait()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                folded = _fold_stack(frame)
+                if folded is None:
+                    continue
+                with self._lock:
+                    if folded in self.stacks or len(self.stacks) < MAX_DISTINCT_STACKS:
+                        self.stacks[folded] += 1
+                        self.samples += 1
+                    else:
+                        self.dropped_samples += 1
+            time.sleep(self.interval)
+
+    def export_folded(self) -> str:
+        """Return aggregated samples in folded flame-graph format"""
+        with self._lock:
+            lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "interval_ms": self.interval * 1000.0,
+                "sampled_requests": self.sampled_requests,
+                "samples": self.samples,
+                "distinct_stacks": len(self.stacks),
+                "dropped_samples": self.dropped_samples,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.sampled_requests = 0
+            self.samples = 0
+            self.dropped_samples = 0
+
+
+profiler = RequestProfiler(PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS)
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware - a single float check per request when sampling is off"""
+
+    def __init__(self, app, request_profiler: RequestProfiler = profiler):
+        self.app = app
+        self.profiler = request_profiler
+
+    async def __call__(self, scope, receive, send):
+        if (
+            self.profiler.sample_rate <= 0
+            or scope["type"] != "http"
+            or scope["path"] not in PROFILED_PATHS
+            or not self.profiler.should_sample()
+        ):
+            return await self.app(scope, receive, send)
+
+        self.profiler.start_request()
+        try:
+            return await self.app(scope, receive, send)
+        finally:
+            self.profiler.end_request()
+
+
+# Allocations made by the tracing machinery itself, left out of reports
+TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+GROUP_BY = ("lineno", "filename", "traceback")
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (peak where /proc is not available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, baseline: Optional[tracemalloc.Snapshot] = None,
+                    group_by: str = "lineno", limit: int = 20) -> List[Dict]:
+    """Largest allocation sites in `snapshot`, or those that grew most since `baseline`"""
+    if baseline is not None:
+        stats = sorted(snapshot.compare_to(baseline, group_by), key=lambda stat: stat.size_diff, reverse=True)
+    else:
+        stats = snapshot.statistics(group_by)
+    sites = []
+    for stat in stats[:limit]:
+        site = {
+            "site": " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in stat.traceback),
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        if baseline is not None:
+            site["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+            site["count_diff"] = stat.count_diff
+        sites.append(site)
+    return sites
+
+
+class MemoryTracer:
+    """tracemalloc switched on and off at runtime, with a baseline snapshot to diff against"""
+
+    def __init__(self):
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.started_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1):
+        with self._lock:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            tracemalloc.start(max(frames, 1))
+            self.started_at = time.time()
+            self.baseline = self.snapshot()
+        print(f"[MEMORY] Tracing allocations ({max(frames, 1)} frames)")
+
+    def stop(self):
+        with self._lock:
+            tracemalloc.stop()
+            self.baseline = None
+            self.started_at = None
+        print("[MEMORY] Tracing stopped")
+
+    def snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+
+    def report(self, limit: int = 20, group_by: str = "lineno", since_start: bool = False) -> Dict:
+        """RSS, and the top allocation sites while tracing. Taking the snapshot is slow: call it off the loop"""
+        report = {
+            "rss_mb": round(rss_bytes() / (1024 * 1024), 2),
+            "peak_rss_mb": round(peak_rss_bytes() / (1024 * 1024), 2),
+            "tracing": self.tracing,
+        }
+        if not self.tracing:
+            return report
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        snapshot = self.snapshot()
+        report.update({
+            "frames": tracemalloc.get_traceback_limit(),
+            "started_at": self.started_at,
+            "traced_mb": round(traced / (1024 * 1024), 2),
+            "traced_peak_mb": round(traced_peak / (1024 * 1024), 2),
+            "tracemalloc_overhead_mb": round(tracemalloc.get_tracemalloc_memory() / (1024 * 1024), 2),
+            "group_by": group_by,
+            "since_start": since_start,
+            "top": top_allocations(snapshot, self.baseline if since_start else None, group_by, limit),
+        })
+        return report
+
+
+memory_tracer = MemoryTracer()
+if MEMORY_TRACE_FRAMES > 0:
+    memory_tracer.start(MEMORY_TRACE_FRAMES)
@@ -0,0 +1,222 @@
+"""
+Failure handling for outbound calls (database and webhooks).
+
+- CircuitBreaker: stops calling a dependency after repeated failures, then lets
+  a limited number of half-open probes through once the recovery timeout passes
+- RetryBudget: caps retries to a fraction of recent traffic so retries cannot
+  multiply load on a struggling dependency
+- call_with_retry: retries with full-jitter exponential backoff inside a breaker
+- SpillBuffer: durable append-only JSONL file for writes accepted while the
+  database is unavailable, replayed once it recovers
+"""
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = HALF_OPEN
+                self._half_open_calls = 0
+                print(f"[CIRCUIT] {self.name}: half-open, probing")
+            if self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                print(f"[CIRCUIT] {self.name}: closed")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"[CIRCUIT] {self.name}: open after {self.consecutive_failures} consecutive failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {"state": self.state, "consecutive_failures": self.consecutive_failures}
+
+
+class RetryBudget:
+    """
+    Each first attempt deposits `ratio` tokens and each retry withdraws one, so
+    retries stay below roughly `ratio` of traffic. `min_per_second` keeps a
+    trickle of retries available when traffic is low.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens * ratio
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def record_request(self):
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+def call_with_retry(func: Callable, breaker: CircuitBreaker, budget: RetryBudget,
+                    attempts: int = 3, base_delay: float = 0.1, max_delay: float = 2.0,
+                    is_retryable: Callable[[Exception], bool] = lambda e: True):
+    """
+    Call `func` through `breaker`, retrying retryable failures with full-jitter
+    exponential backoff while the retry budget allows. Non-retryable errors
+    are re-raised immediately and count as the dependency being reachable.
+    """
+    budget.record_request()
+    attempt = 0
+    while True:
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"{breaker.name} circuit is open")
+        try:
+            result = func()
+        except Exception as e:
+            if not is_retryable(e):
+                # The dependency answered; the request itself is bad
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            attempt += 1
+            if attempt >= attempts or not budget.try_spend():
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * (2 ** attempt))))
+            continue
+        breaker.record_success()
+        return result
+
+
+class SpillBuffer:
+    """Durable FIFO of pending records, one JSON document per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._pending = self._count_lines()
+
+    def _count_lines(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as f:
+            return sum(1 for line in f if line.strip())
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def append(self, record: Dict):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending += 1
+
+    def _read(self) -> List[str]:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            return [line for line in f if line.strip()]
+
+    def drain(self, handler: Callable[[Dict], bool]) -> Tuple[int, int]:
+        """
+        Feed records to `handler` in order until it returns False. Handled
+        records are removed; the rest stay for the next drain. Appends are not
+        blocked while the handler runs. Returns (replayed, remaining).
+        """
+        with self._drain_lock:
+            with self._lock:
+                lines = self._read()
+            if not lines:
+                return 0, 0
+
+            replayed = 0
+            for line in lines:
+                if not handler(json.loads(line)):
+                    break
+                replayed += 1
+
+            with self._lock:
+                # Keep anything appended while the handler was running
+                remaining = self._read()[replayed:]
+                temp_path = self.path + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.writelines(remaining)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+                self._pending = len(remaining)
+            return replayed, len(remaining)
+
+def env_breaker(name: str, prefix: str) -> CircuitBreaker:
+    """Build a breaker configured from <PREFIX>_BREAKER_* environment variables"""
+    return CircuitBreaker(
+        name,
+        failure_threshold=int(os.getenv(f"{prefix}_BREAKER_FAILURES", "5")),
+        recovery_timeout=float(os.getenv(f"{prefix}_BREAKER_RECOVERY_S", "30")),
+        half_open_max_calls=int(os.getenv(f"{prefix}_BREAKER_HALF_OPEN_CALLS", "1")),
+    )
+
+
+def is_transient_database_error(error: Exception) -> bool:
+    """RLS violations and bad requests will fail the same way on retry; everything else may not"""
+    message = (getattr(error, "message", None) or str(error)).lower()
+    code = str(getattr(error, "code", "") or "")
+    if "row-level security policy" in message or code == "42501":
+        return False
+    if code.startswith(("22", "23", "42", "PGRST1")):
+        return False
+    return True
+
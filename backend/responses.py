@@ -0,0 +1,217 @@
+"""
+Response layer shared by all routes.
+
+- FastJSONResponse: orjson-backed JSON response, used as the app's default
+  response class. Routes with large bodies (listings, exports) should return
+  FastJSONResponse(content) directly: a plain dict return still goes through
+  FastAPI's jsonable_encoder, which costs more than the encoding itself
+- StaticJSON: a constant body serialized once, so routes like / and /health
+  hand out the same bytes on every request
+- CompressionMiddleware: negotiates brotli (when the optional `brotli` package
+  is installed) or gzip for compressible bodies above a minimum size, for both
+  buffered and streaming responses
+- make_etag / etag_matches: body validators for conditional GETs (304)
+"""
+import gzip
+import hashlib
+import os
+import zlib
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+FastJSONResponse = ORJSONResponse
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize with the same options FastJSONResponse uses"""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+class StaticJSON:
+    """A JSON body serialized once, served as the same bytes on every request"""
+
+    def __init__(self, content: Dict):
+        self.body = dumps(content)
+
+    def response(self) -> Response:
+        return Response(content=self.body, media_type="application/json")
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for a response body"""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names `etag` (weak comparison, as RFC 9110 asks for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br over gzip when both are acceptable, honouring q=0"""
+    if not accept_encoding:
+        return None
+    accepted = _parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 16+ produces a gzip container
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress and flush, so each streamed chunk reaches the client promptly"""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Pure ASGI response compression with br/gzip negotiation"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        responder = _CompressingSender(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressingSender:
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Dict] = None
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+        self.buffer = bytearray()
+
+    def _compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _start_headers(self) -> MutableHeaders:
+        self.start_message["headers"] = list(self.start_message["headers"])
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # The compressed bytes differ from the ones a strong ETag names
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        return headers
+
+    async def __call__(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._compressible(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            return await self.send(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            # Buffer until we know whether the body is worth compressing; bodies
+            # relayed by BaseHTTPMiddleware arrive in several messages even when small
+            self.buffer.extend(body)
+            if more_body and len(self.buffer) < self.minimum_size:
+                return
+            body, self.buffer = bytes(self.buffer), bytearray()
+
+            if not more_body:
+                if len(body) < self.minimum_size:
+                    await self.send(self.start_message)
+                    return await self.send({"type": "http.response.body", "body": body})
+                compressed = compress_body(body, self.encoding)
+                headers = self._start_headers()
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.start_message)
+                return await self.send({"type": "http.response.body", "body": compressed})
+
+            # Large streaming response: compress chunk by chunk, length unknown up front
+            self.compressor = _Compressor(self.encoding)
+            headers = self._start_headers()
+            del headers["Content-Length"]
+            await self.send(self.start_message)
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.flush()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,240 @@
+"""
+Full-text search over complaint descriptions.
+
+Two implementations behind `search_complaints()`, chosen with SEARCH_BACKEND:
+
+- "memory" (default for DATABASE_BACKEND=local): an in-process inverted index
+  with BM25 ranking. Built from the database at startup and updated as each
+  complaint is saved. Postings are compact arrays of document numbers and term
+  frequencies; matching ids are ranked in the index and the page of rows is
+  then fetched from the database.
+- "database" (default otherwise): the `search_complaints` SQL function from
+  supabase_schema.sql, backed by a generated tsvector column and a GIN index.
+  Postgres ranks with ts_rank_cd (cover density, normalized by document length)
+  since it has no built-in BM25.
+"""
+import heapq
+import math
+import os
+import re
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "")
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "5000"))
+
+# Columns returned in search results (contact details are left out)
+RESULT_COLUMNS = ["id", "location", "issue_type", "complaint_description", "created_at"]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from has have in is it its near of on or our the there this "
+    "to was were with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords; plural 's' is folded so 'transformers' finds 'transformer'"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class InvertedIndex:
+    """
+    Append-only BM25 index of complaint descriptions.
+
+    Each term's postings are grouped by (issue type, term frequency, document
+    length), the last two capped at 255: every document in a group gets the same
+    BM25 contribution for that term. Single-term queries walk the groups
+    best-first and stop after one page instead of scoring every posting;
+    multi-term queries score whole groups at a time, and issue_type filters
+    simply skip the other types' groups.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ready = False
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._ids: List[str] = []
+            self._numbers: Dict[str, int] = {}
+            self._type_codes: Dict[str, int] = {}
+            # term -> (type code << 16 | frequency << 8 | length) -> document numbers, oldest first
+            self._postings: Dict[str, Dict[int, array]] = {}
+            # term -> issue type code -> document frequency
+            self._frequencies: Dict[str, Dict[int, int]] = {}
+            self._total_length = 0
+            self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, row: Dict):
+        """Index one stored complaint; rows without an id, or already indexed, are ignored"""
+        complaint_id = row.get("id")
+        if not complaint_id:
+            return
+        frequencies: Dict[str, int] = {}
+        tokens = tokenize(row.get("complaint_description") or "")
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        length = min(len(tokens), 255)
+
+        with self._lock:
+            complaint_id = str(complaint_id)
+            if complaint_id in self._numbers:
+                return
+            number = len(self._ids)
+            self._ids.append(complaint_id)
+            self._numbers[complaint_id] = number
+            issue_type = row.get("issue_type") or ""
+            code = self._type_codes.get(issue_type)
+            if code is None:
+                code = self._type_codes[issue_type] = len(self._type_codes)
+            self._total_length += len(tokens)
+            for token, frequency in frequencies.items():
+                groups = self._postings.get(token)
+                if groups is None:
+                    groups = self._postings[token] = {}
+                    self._frequencies[token] = {}
+                key = code << 16 | min(frequency, 255) << 8 | length
+                documents = groups.get(key)
+                if documents is None:
+                    documents = groups[key] = array("I")
+                documents.append(number)
+                by_type = self._frequencies[token]
+                by_type[code] = by_type.get(code, 0) + 1
+
+    def _snapshot(self, term: str) -> Tuple[Dict[int, int], List[Tuple[int, array, int]]]:
+        """Under the lock: a term's per-type counts and its (key, documents, length) groups as of now"""
+        groups = [(key, documents, len(documents)) for key, documents in self._postings[term].items()]
+        return dict(self._frequencies[term]), groups
+
+    @staticmethod
+    def _group_scores(by_type: Dict[int, int], groups: List[Tuple[int, array, int]], count: int,
+                      average_length: float, type_code: Optional[int], k1: float,
+                      b: float) -> List[Tuple[float, array, int]]:
+        """(BM25 contribution, documents, length) for each of a term's posting groups of the wanted issue type"""
+        document_frequency = sum(by_type.values())
+        idf = math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+        scored = []
+        for key, documents, length_now in groups:
+            if type_code is not None and key >> 16 != type_code:
+                continue
+            frequency, length = key >> 8 & 255, key & 255
+            norm = k1 * (1 - b + b * length / average_length)
+            scored.append((idf * frequency * (k1 + 1) / (frequency + norm), documents, length_now))
+        return scored
+
+    def search(self, query: str, issue_type: Optional[str] = None, limit: int = 20,
+               offset: int = 0) -> Tuple[List[Tuple[str, float]], int]:
+        """Best-first (id, score) pairs for one page, and the total number of matches"""
+        # add() may run at the same time (save listener): copy what is needed under the lock, score outside it
+        with self._lock:
+            ids = self._ids
+            count = len(ids)
+            total_length = self._total_length
+            snapshots = {term: self._snapshot(term) for term in dict.fromkeys(tokenize(query))
+                         if term in self._postings}
+            type_code = self._type_codes.get(issue_type) if issue_type else None
+        if not snapshots or not count:
+            return [], 0
+        if issue_type and type_code is None:
+            return [], 0
+
+        average_length = total_length / count or 1.0
+        wanted = offset + limit
+
+        if len(snapshots) == 1:
+            by_type, groups = next(iter(snapshots.values()))
+            total = sum(by_type.values()) if type_code is None else by_type.get(type_code, 0)
+            hits: List[Tuple[int, float]] = []
+            # Best group first; newest complaints first within a group
+            for score, documents, length in sorted(
+                self._group_scores(by_type, groups, count, average_length, type_code, self.k1, self.b),
+                key=lambda group: group[0], reverse=True
+            ):
+                # Documents appended by add() after the snapshot are left out
+                newest = documents[max(length - (wanted - len(hits)), 0):length]
+                hits.extend((number, score) for number in reversed(newest))
+                if len(hits) >= wanted:
+                    break
+        else:
+            per_term = []
+            for by_type, groups in snapshots.values():
+                term_scores: Dict[int, float] = {}
+                for score, documents, length in self._group_scores(by_type, groups, count, average_length,
+                                                                   type_code, self.k1, self.b):
+                    term_scores.update(dict.fromkeys(documents if length == len(documents) else documents[:length],
+                                                     score))
+                per_term.append(term_scores)
+            # Start from the largest term's scores and fold the smaller ones in
+            per_term.sort(key=len, reverse=True)
+            scores = per_term[0]
+            for term_scores in per_term[1:]:
+                get = scores.get
+                for number, score in term_scores.items():
+                    scores[number] = get(number, 0.0) + score
+            total = len(scores)
+            hits = [(number, score) for score, number in heapq.nlargest(wanted, zip(scores.values(), scores))]
+
+        page = [(ids[number], round(score, 4)) for number, score in hits[offset:]]
+        return page, total
+
+    def build(self, client, page_size: int = SEARCH_PAGE_SIZE) -> int:
+        """(Re)index every complaint in the database, paging by created_at. Returns the index size"""
+        self.clear()
+        offset = 0
+        while True:
+            page = client.table("complaints").select("id", "issue_type", "complaint_description") \
+                .order("created_at").order("id").range(offset, offset + page_size - 1).execute().data
+            for row in page:
+                self.add(row)
+            if len(page) < page_size:
+                break
+            offset += page_size
+        self.ready = True
+        return len(self)
+
+
+search_index = InvertedIndex()
+
+
+def search_backend(database_backend: str) -> str:
+    return SEARCH_BACKEND or ("memory" if database_backend == "local" else "database")
+
+
+def search_complaints(client, backend: str, query: str, issue_type: Optional[str] = None,
+                      limit: int = 20, offset: int = 0) -> Dict:
+    """One page of ranked matches with the total match count"""
+    if backend == "database":
+        rows = client.rpc("search_complaints", {
+            "q": query,
+            "issue_type_filter": issue_type,
+            "result_limit": limit,
+            "result_offset": offset,
+        }).execute().data or []
+        total = rows[0].pop("total", len(rows)) if rows else 0
+        for row in rows[1:]:
+            row.pop("total", None)
+        return {"results": rows, "total": total, "complete": True}
+
+    ranked, total = search_index.search(query, issue_type, limit, offset)
+    rows: Dict[str, Dict] = {}
+    if ranked:
+        found = client.table("complaints").select(",".join(RESULT_COLUMNS)) \
+            .in_("id", [complaint_id for complaint_id, _ in ranked]).execute().data
+        rows = {str(row["id"]): row for row in found}
+    results = [{**rows[complaint_id], "rank": score} for complaint_id, score in ranked if complaint_id in rows]
+    return {"results": results, "total": total, "complete": search_index.ready}
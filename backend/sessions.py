@@ -0,0 +1,128 @@
+"""
+In-process chat session state.
+
+Each session (keyed by the session_id the frontend generates) holds the
+complaint fields gathered so far and the chat transcript. Sessions are kept
+in least-recently-used order, so freeing the ones idle for longer than
+SESSION_IDLE_TTL_S only walks the expired ones. They are freed by POST /reset
+(the citizen starts over), by the periodic sweeper every
+SESSION_SWEEP_INTERVAL_S, or on demand by POST /sessions/expire.
+
+The memory freed is estimated from the size of each state's containers and
+values, and counted with the sessions freed in stats() for GET /metrics.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+SESSION_IDLE_TTL_S = float(os.getenv("SESSION_IDLE_TTL_S", "3600"))
+SESSION_SWEEP_INTERVAL_S = float(os.getenv("SESSION_SWEEP_INTERVAL_S", "300"))
+
+
+def new_state(session_id: str) -> Dict:
+    return {
+        "messages": [],
+        "citizen_name": None,
+        "email": None,
+        "mobile_number": None,
+        "complaint_description": None,
+        "issue_type": None,
+        "session_id": session_id,
+        "completed": False
+    }
+
+
+def state_bytes(state: Dict) -> int:
+    """
+    Memory held by one session: its dicts, lists and values. Keys are shared by
+    every session, so they are not counted.
+    """
+    size = sys.getsizeof(state)
+    for key, value in state.items():
+        if key == "messages":
+            size += sys.getsizeof(value) + sum(
+                sys.getsizeof(entry) + sys.getsizeof(entry["content"]) + sys.getsizeof(entry["at"]) for entry in value
+            )
+        elif value is not None:
+            size += sys.getsizeof(value)
+    return size
+
+
+class SessionStore:
+    def __init__(self, idle_ttl_s: float = SESSION_IDLE_TTL_S):
+        self.idle_ttl_s = idle_ttl_s
+        # session id -> (last used, state), least recently used first
+        self._sessions: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_sessions = 0
+        self.expired_sessions = 0
+        self.reclaimed_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def get(self, session_id: str) -> Dict:
+        """The session's state, created on first use. Callers change it in place"""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            state = entry[1] if entry is not None else new_state(session_id)
+            self._sessions[session_id] = (time.time(), state)
+            return state
+
+    def peek(self, session_id: str) -> Optional[Dict]:
+        """The session's state if it exists, without creating it or counting as use"""
+        entry = self._sessions.get(session_id)
+        return entry[1] if entry is not None else None
+
+    def save(self, session_id: str, state: Dict):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._sessions[session_id] = (time.time(), state)
+
+    def discard(self, session_id: str) -> int:
+        """Free one session. Returns the bytes freed, 0 when there was no such session"""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is None:
+                return 0
+            freed = state_bytes(entry[1])
+            self.reset_sessions += 1
+            self.reclaimed_bytes += freed
+            return freed
+
+    def expire(self, idle_s: Optional[float] = None, now: Optional[float] = None) -> Tuple[int, int]:
+        """Free sessions unused for `idle_s`. Returns (sessions, bytes) freed"""
+        cutoff = (time.time() if now is None else now) - (self.idle_ttl_s if idle_s is None else idle_s)
+        expired = []
+        with self._lock:
+            while self._sessions:
+                session_id, (last_used, state) = next(iter(self._sessions.items()))
+                if last_used > cutoff:
+                    break
+                del self._sessions[session_id]
+                expired.append(state)
+        # Measured after letting go of the lock, so chat turns are not held up by a large sweep
+        freed = sum(map(state_bytes, expired))
+        with self._lock:
+            self.expired_sessions += len(expired)
+            self.reclaimed_bytes += freed
+        return len(expired), freed
+
+    def stats(self) -> Dict:
+        return {
+            "active": len(self._sessions),
+            "idle_ttl_s": self.idle_ttl_s,
+            "reset": self.reset_sessions,
+            "expired": self.expired_sessions,
+            "reclaimed_sessions": self.reset_sessions + self.expired_sessions,
+            "reclaimed_bytes": self.reclaimed_bytes,
+        }
+
+
+session_store = SessionStore()
@@ -0,0 +1,405 @@
+"""
+Complaint status (open -> acknowledged -> resolved) and SLA escalation.
+
+Every issue_type has a deadline for acknowledging a new complaint and one for
+resolving it once acknowledged (SLA_ACKNOWLEDGE_HOURS / SLA_RESOLVE_HOURS,
+counted from when the complaint entered its current status). Pending deadlines
+are kept in TimerWheel, a hierarchical timing wheel: four levels of 256 slots
+at SLA_TICK_S resolution cover about 136 years of one-second ticks, and a timer
+is one entry in one slot dict, so scheduling and cancelling are O(1) whatever
+the number pending. Timers are moved down a level only when their slot comes
+round, so each is touched at most once per level.
+
+When a deadline passes, the complaint's escalated_at is set (only if it is
+still unescalated and in the same status, so a deadline is escalated once even
+with several backend workers) and an escalation webhook goes to the
+destinations its complaints are routed to. On startup the wheel is rebuilt
+from the open and acknowledged complaints that have not been escalated;
+deadlines that passed while the backend was down fire on the first tick.
+
+Citizens poll GET /complaints/{id}/status, served from StatusCache: the
+serialized response and its ETag per complaint, loaded from the database on a
+miss and dropped when the status changes. Entries also expire after
+STATUS_CACHE_TTL_S so changes made through another worker show up.
+"""
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from events import record_event
+from responses import dumps, make_etag
+
+SLA_TICK_S = float(os.getenv("SLA_TICK_S", "1"))
+SLA_PAGE_SIZE = int(os.getenv("SLA_PAGE_SIZE", "5000"))
+STATUS_CACHE_SIZE = int(os.getenv("STATUS_CACHE_SIZE", "100000"))
+STATUS_CACHE_TTL_S = float(os.getenv("STATUS_CACHE_TTL_S", "30"))
+
+STATUSES = ("open", "acknowledged", "resolved")
+
+# Allowed status changes; a resolved complaint can be reopened
+TRANSITIONS = {
+    "open": {"acknowledged", "resolved"},
+    "acknowledged": {"resolved"},
+    "resolved": {"open"},
+}
+
+# Hours allowed in each status before the complaint is escalated, by issue_type ("*" for any other)
+SLA_ACKNOWLEDGE_HOURS = {
+    "electricity_power": 4.0,
+    "water_plumbing": 8.0,
+    "road_traffic": 24.0,
+    "garbage_waste": 24.0,
+    "*": 24.0,
+}
+SLA_RESOLVE_HOURS = {
+    "electricity_power": 24.0,
+    "water_plumbing": 48.0,
+    "road_traffic": 7 * 24.0,
+    "garbage_waste": 72.0,
+    "*": 7 * 24.0,
+}
+SLA_HOURS = {"open": SLA_ACKNOWLEDGE_HOURS, "acknowledged": SLA_RESOLVE_HOURS}
+
+# Columns needed to schedule a complaint's deadline
+SCHEDULE_COLUMNS = ["id", "issue_type", "status", "created_at", "status_changed_at", "escalated_at"]
+
+
+def _timestamp(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str) and value:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return None
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def sla_deadline(row: Dict) -> Optional[float]:
+    """When the complaint must leave its current status, or None for resolved (or unknown) complaints"""
+    hours = SLA_HOURS.get(row.get("status") or "open")
+    if hours is None:
+        return None
+    since = _timestamp(row.get("status_changed_at")) or _timestamp(row.get("created_at"))
+    if since is None:
+        return None
+    return since + 3600 * hours.get(row.get("issue_type") or "", hours["*"])
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel of keys due at a time. Level n has 2**bits slots of
+    2**(bits*n) ticks each; a timer sits in the lowest level whose span covers it
+    and cascades one level down each time that level's slot comes round.
+    Not thread-safe; callers hold their own lock.
+    """
+
+    def __init__(self, tick_s: float = SLA_TICK_S, bits: int = 8, levels: int = 4, now: Optional[float] = None):
+        self.tick_s = tick_s
+        self._bits = bits
+        self._mask = (1 << bits) - 1
+        self._span = 1 << (bits * levels)
+        self._wheels: List[List[Dict[Hashable, int]]] = [[{} for _ in range(1 << bits)] for _ in range(levels)]
+        # Timers already due when scheduled, fired on the next advance
+        self._due: Dict[Hashable, int] = {}
+        # key -> the slot dict holding it, for O(1) cancel
+        self._slots: Dict[Hashable, Dict[Hashable, int]] = {}
+        # Last tick processed
+        self._tick = int((time.time() if now is None else now) // tick_s)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def _place(self, key: Hashable, expires: int):
+        delta = expires - self._tick
+        if delta <= 0:
+            slot = self._due
+        else:
+            # Beyond the top level's span: park at its far end and re-place when cascaded
+            position = expires if delta < self._span else self._tick + self._span - 1
+            level = (min(delta, self._span - 1).bit_length() - 1) // self._bits
+            slot = self._wheels[level][(position >> (self._bits * level)) & self._mask]
+        slot[key] = expires
+        self._slots[key] = slot
+
+    def schedule(self, key: Hashable, when: float):
+        """Fire `key` at `when` (epoch seconds), replacing any timer it already has"""
+        self.cancel(key)
+        self._place(key, math.ceil(when / self.tick_s))
+
+    def cancel(self, key: Hashable) -> bool:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return False
+        del slot[key]
+        return True
+
+    def _cascade(self, level: int, tick: int) -> bool:
+        """Re-place the timers of `level`'s current slot; True when that level also wrapped"""
+        index = (tick >> (self._bits * level)) & self._mask
+        slot = self._wheels[level][index]
+        if slot:
+            self._wheels[level][index] = {}
+            for key, expires in slot.items():
+                self._place(key, expires)
+        return index == 0
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the wheel to `now` and return the keys whose time has come"""
+        target = int((time.time() if now is None else now) // self.tick_s)
+        fired: List[Hashable] = []
+        if not self._slots:
+            self._tick = max(self._tick, target)
+            return fired
+        while self._tick < target:
+            self._tick += 1
+            tick = self._tick
+            if tick & self._mask == 0:
+                level = 1
+                while level < len(self._wheels) and self._cascade(level, tick):
+                    level += 1
+            slot = self._wheels[0][tick & self._mask]
+            if slot:
+                self._wheels[0][tick & self._mask] = {}
+                for key in slot:
+                    del self._slots[key]
+                fired.extend(slot)
+        if self._due:
+            for key in self._due:
+                del self._slots[key]
+            fired.extend(self._due)
+            self._due = {}
+        return fired
+
+
+class StatusConflict(Exception):
+    """The requested status change is not allowed from the complaint's current status"""
+
+    def __init__(self, current: str):
+        super().__init__(f"Complaint is {current}")
+        self.current = current
+
+
+class EscalationScheduler:
+    """SLA deadlines of open and acknowledged complaints, fired from a TimerWheel"""
+
+    def __init__(self, tick_s: float = SLA_TICK_S):
+        self._wheel = TimerWheel(tick_s)
+        self._lock = threading.Lock()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._wheel)
+
+    def track(self, row: Dict):
+        """(Re)schedule a complaint from its stored row; resolved or escalated complaints are dropped"""
+        self.track_many([row])
+
+    def track_many(self, rows: List[Dict]):
+        deadlines = [(str(row["id"]), None if row.get("escalated_at") else sla_deadline(row))
+                     for row in rows if row.get("id")]
+        with self._lock:
+            for complaint_id, deadline in deadlines:
+                if deadline is None:
+                    self._wheel.cancel(complaint_id)
+                else:
+                    self._wheel.schedule(complaint_id, deadline)
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Complaint ids whose deadline has passed since the last call"""
+        with self._lock:
+            return self._wheel.advance(now)
+
+    def escalate(self, client, complaint_id: str, now: Optional[float] = None) -> bool:
+        """Escalate one complaint whose timer fired, if it is still overdue. Returns whether it was"""
+        from database import send_escalation_notification
+
+        now = time.time() if now is None else now
+        rows = client.table("complaints").select("*").eq("id", complaint_id).limit(1).execute().data
+        if not rows or rows[0].get("escalated_at"):
+            return False
+        row = rows[0]
+        deadline = sla_deadline(row)
+        if deadline is None:
+            return False
+        if deadline > now:
+            # The status changed after the timer was set
+            self.track(row)
+            return False
+        status = row.get("status") or "open"
+        query = client.table("complaints").update({"escalated_at": _isoformat(now)}).eq("id", complaint_id)
+        query = query.eq("status", status) if row.get("status") else query.is_("status", "null")
+        if not query.is_("escalated_at", "null").execute().data:
+            # Another worker escalated it, or its status just changed
+            return False
+        print(f"[SLA] Complaint {complaint_id} missed its {status} deadline")
+        record_event("escalated", complaint_id, status=status, deadline=_isoformat(deadline))
+        send_escalation_notification(row, status, _isoformat(deadline))
+        return True
+
+    def escalate_due(self, client, now: Optional[float] = None) -> int:
+        escalated = 0
+        for complaint_id in self.due(now):
+            try:
+                escalated += self.escalate(client, complaint_id, now)
+            except Exception as e:
+                print(f"[SLA] Escalating complaint {complaint_id} failed: {getattr(e, 'message', None) or e}")
+                # Try again on a later tick
+                with self._lock:
+                    self._wheel.schedule(complaint_id, (time.time() if now is None else now) + 60)
+        return escalated
+
+    def build(self, client, page_size: int = SLA_PAGE_SIZE) -> int:
+        """Schedule every open or acknowledged complaint not yet escalated. Returns the number pending"""
+        offset = 0
+        while True:
+            page = client.table("complaints").select(",".join(SCHEDULE_COLUMNS)) \
+                .in_("status", ["open", "acknowledged"]).is_("escalated_at", "null") \
+                .order("created_at").order("id").range(offset, offset + page_size - 1).execute().data
+            self.track_many(page)
+            if len(page) < page_size:
+                break
+            offset += page_size
+        self.ready = True
+        return len(self)
+
+
+escalation_scheduler = EscalationScheduler()
+
+# Called with the updated row after every status change
+status_listeners: List[Callable[[Dict], None]] = []
+
+
+def set_complaint_status(client, complaint_id: str, status: str, operator: Optional[str] = None) -> Optional[Dict]:
+    """
+    Move a complaint to `status`, restarting its SLA clock. Returns the updated
+    row, None when there is no such complaint, or raises StatusConflict.
+    `operator` is recorded in the audit log.
+    """
+    try:
+        uuid.UUID(complaint_id)
+    except ValueError:
+        return None
+    rows = client.table("complaints").select(",".join(SCHEDULE_COLUMNS)).eq("id", complaint_id).limit(1).execute().data
+    if not rows:
+        return None
+    current = rows[0].get("status") or "open"
+    if status == current:
+        return rows[0]
+    if status not in TRANSITIONS[current]:
+        raise StatusConflict(current)
+
+    query = client.table("complaints").update({
+        "status": status,
+        "status_changed_at": datetime.now(timezone.utc).isoformat(),
+        "escalated_at": None,
+    }).eq("id", complaint_id)
+    # Only if nobody changed it meanwhile
+    query = query.eq("status", current) if rows[0].get("status") else query.is_("status", "null")
+    updated = query.execute().data
+    if not updated:
+        latest = client.table("complaints").select("status").eq("id", complaint_id).limit(1).execute().data
+        raise StatusConflict(latest[0].get("status") if latest else current)
+    row = updated[0]
+    record_event("status_changed", complaint_id, **{"from": current, "to": status, "operator": operator})
+    escalation_scheduler.track(row)
+    status_cache.invalidate(row)
+    for listener in status_listeners:
+        try:
+            listener(row)
+        except Exception as e:
+            print(f"[LISTENER] {getattr(listener, '__qualname__', listener)} failed: {e}")
+    return row
+
+
+def status_summary(row: Dict) -> Dict:
+    """A complaint's status with its current SLA deadline"""
+    deadline = sla_deadline(row)
+    return {
+        "id": row.get("id"),
+        "status": row.get("status") or "open",
+        "status_changed_at": row.get("status_changed_at") or row.get("created_at"),
+        "sla_deadline": _isoformat(deadline) if deadline is not None else None,
+        "escalated_at": row.get("escalated_at"),
+    }
+
+
+def public_status(row: Dict) -> Dict:
+    """What citizens see of a complaint's progress"""
+    deadline = sla_deadline(row)
+    return {
+        "id": row.get("id"),
+        "status": row.get("status") or "open",
+        "status_changed_at": row.get("status_changed_at") or row.get("created_at"),
+        "expected_by": _isoformat(deadline) if deadline is not None else None,
+    }
+
+
+class StatusCache:
+    """Read-through LRU of serialized public status responses, (body, ETag) by complaint id"""
+
+    def __init__(self, max_entries: int = STATUS_CACHE_SIZE, ttl_s: float = STATUS_CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes, str]]" = OrderedDict()
+        # Bumped on every invalidation, so a load that raced a status change is not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, complaint_id: str) -> Optional[Tuple[bytes, str]]:
+        """The cached (body, ETag), without touching the database"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(complaint_id)
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(complaint_id)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def load(self, client, complaint_id: str) -> Optional[Tuple[bytes, str]]:
+        """Read the complaint's status from the database and cache it; None when there is no such complaint"""
+        try:
+            uuid.UUID(complaint_id)
+        except ValueError:
+            return None
+        generation = self._generation
+        rows = client.table("complaints").select(",".join(SCHEDULE_COLUMNS)).eq("id", complaint_id) \
+            .limit(1).execute().data
+        if not rows:
+            return None
+        body = dumps(public_status(rows[0]))
+        etag = make_etag(body)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[complaint_id] = (time.monotonic() + self.ttl_s, body, etag)
+                self._entries.move_to_end(complaint_id)
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return body, etag
+
+    def invalidate(self, row: Dict):
+        """Status listener: forget the complaint's cached status"""
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(str(row.get("id")), None)
+
+
+status_cache = StatusCache()
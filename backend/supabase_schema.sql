@@ -1,13 +1,186 @@
 DROP TABLE IF EXISTS complaints;
 
+-- Range-partitioned by month on created_at (UTC). Monthly partitions are created
+-- ahead of time by ensure_complaint_partitions(), which the backend calls daily;
+-- old months are exported and detached by the archival job (backend/archival.py).
 CREATE TABLE complaints (
-    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
-    citizen_name TEXT NOT NULL,
-    location TEXT NOT NULL,
+    id UUID DEFAULT gen_random_uuid() NOT NULL,
+    -- Length caps match the MAX_*_LENGTH checks in backend/database.py
+    citizen_name TEXT NOT NULL CHECK (char_length(citizen_name) <= 100),
+    location TEXT NOT NULL CHECK (char_length(location) <= 300),
+    -- Canonical gazetteer id the free-text location resolved to (backend/gazetteer.py), if any
+    location_id TEXT,
+    -- Point the complaint is about (from the client or the gazetteer) and its geohash (7 chars, ~150m)
+    latitude DOUBLE PRECISION CHECK (latitude BETWEEN -90 AND 90),
+    longitude DOUBLE PRECISION CHECK (longitude BETWEEN -180 AND 180),
+    geohash TEXT,
     issue_type TEXT NOT NULL,
-    complaint_description TEXT NOT NULL,
-    mobile_number TEXT NOT NULL,
-    email TEXT NOT NULL,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    complaint_description TEXT NOT NULL CHECK (char_length(complaint_description) <= 2000),
+    mobile_number TEXT NOT NULL CHECK (char_length(mobile_number) <= 20),
+    email TEXT NOT NULL CHECK (char_length(email) <= 254),
+    -- Lifecycle (backend/sla.py): the SLA clock restarts at status_changed_at; escalated_at is set
+    -- when the deadline for the current status passed and was escalated
+    status TEXT NOT NULL DEFAULT 'open' CHECK (status IN ('open', 'acknowledged', 'resolved')),
+    status_changed_at TIMESTAMP WITH TIME ZONE,
+    escalated_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', complaint_description)) STORED,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Rows outside every monthly partition land here instead of failing the insert
+CREATE TABLE complaints_default PARTITION OF complaints DEFAULT;
+
+CREATE INDEX complaints_created_at_idx ON complaints (created_at);
+CREATE INDEX complaints_location_id_idx ON complaints (location_id);
+CREATE INDEX complaints_geohash_idx ON complaints (geohash text_pattern_ops);
+-- Complaints with a pending SLA deadline, read when the escalation scheduler starts
+CREATE INDEX complaints_sla_pending_idx ON complaints (created_at)
+    WHERE status <> 'resolved' AND escalated_at IS NULL;
+CREATE INDEX complaints_search_idx ON complaints USING GIN (search_vector);
+
+-- Photo attachments (backend/attachments.py). Files live in content-addressed storage under
+-- their SHA-256; complaint_id is not a foreign key because complaints is partitioned by
+-- created_at and its primary key includes it.
+DROP TABLE IF EXISTS complaint_attachments;
+CREATE TABLE complaint_attachments (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    complaint_id UUID NOT NULL,
+    sha256 CHAR(64) NOT NULL,
+    filename TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    size_bytes BIGINT NOT NULL CHECK (size_bytes > 0),
+    status TEXT NOT NULL DEFAULT 'processing' CHECK (status IN ('processing', 'ready', 'failed')),
+    has_thumbnail BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    UNIQUE (complaint_id, sha256)
+);
+CREATE INDEX complaint_attachments_sha256_idx ON complaint_attachments (sha256);
+
+-- Chat transcripts (backend/transcripts.py), one row per complaint written at submit time:
+-- the conversation as NDJSON, deflated with a preset dictionary and base64-encoded.
+DROP TABLE IF EXISTS complaint_transcripts;
+CREATE TABLE complaint_transcripts (
+    complaint_id UUID PRIMARY KEY,
+    encoding TEXT NOT NULL,
+    message_count INT NOT NULL CHECK (message_count > 0),
+    raw_bytes INT NOT NULL,
+    transcript TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
 );
 
+-- Full-text search for GET /complaints/search: ranked matches, one page at a time,
+-- with the total match count repeated on every row. Contact details are not returned.
+CREATE OR REPLACE FUNCTION search_complaints(
+    q TEXT,
+    issue_type_filter TEXT DEFAULT NULL,
+    result_limit INT DEFAULT 20,
+    result_offset INT DEFAULT 0
+)
+RETURNS TABLE (
+    id UUID,
+    location TEXT,
+    issue_type TEXT,
+    complaint_description TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    rank REAL,
+    total BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.id, c.location, c.issue_type, c.complaint_description, c.created_at,
+           ts_rank_cd(c.search_vector, query, 1) AS rank,
+           count(*) OVER () AS total
+    FROM complaints c, websearch_to_tsquery('english', q) AS query
+    WHERE c.search_vector @@ query
+      AND (issue_type_filter IS NULL OR c.issue_type = issue_type_filter)
+    ORDER BY rank DESC, c.created_at DESC
+    LIMIT result_limit OFFSET result_offset;
+$$;
+
+-- Create the partitions for the previous month through `months_ahead` months from now.
+-- Returns how many partitions were created.
+CREATE OR REPLACE FUNCTION ensure_complaint_partitions(months_ahead INT DEFAULT 3)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start TIMESTAMP;
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    FOR i IN -1..months_ahead LOOP
+        month_start := date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => i);
+        partition_name := format('complaints_%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF complaints FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                month_start AT TIME ZONE 'UTC',
+                (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+-- Detach one month's partition after it has been archived. The detached table is
+-- kept (not dropped) so it can be re-attached or dropped by hand. A month without a
+-- partition has its rows in complaints_default: they are moved into a table of the
+-- partition's name, which is kept the same way.
+-- Returns the table name, or NULL when that month has no rows to detach.
+CREATE OR REPLACE FUNCTION detach_complaint_partition(month DATE)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    partition_name TEXT := format('complaints_%s', to_char(month, 'YYYY_MM'));
+    month_start TIMESTAMP WITH TIME ZONE := month::TIMESTAMP AT TIME ZONE 'UTC';
+    column_list TEXT;
+    moved INT;
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        EXECUTE format('ALTER TABLE complaints DETACH PARTITION %I', partition_name);
+        RETURN partition_name;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE complaints INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)',
+                   partition_name);
+    -- Every stored column except the generated ones, which the new table computes itself
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO column_list
+    FROM pg_attribute
+    WHERE attrelid = 'complaints'::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM complaints_default WHERE created_at >= %L AND created_at < %L RETURNING %s) '
+        'INSERT INTO %I (%s) SELECT %s FROM moved',
+        month_start, month_start + INTERVAL '1 month', column_list, partition_name, column_list, column_list
+    );
+    GET DIAGNOSTICS moved = ROW_COUNT;
+    IF moved = 0 THEN
+        EXECUTE format('DROP TABLE %I', partition_name);
+        RETURN NULL;
+    END IF;
+    RETURN partition_name;
+END;
+$$;
+
+-- Only the backend (service role or a direct connection) may detach partitions or search
+REVOKE EXECUTE ON FUNCTION detach_complaint_partition(DATE) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION search_complaints(TEXT, TEXT, INT, INT) FROM PUBLIC;
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION detach_complaint_partition(DATE) TO service_role;
+        GRANT EXECUTE ON FUNCTION search_complaints(TEXT, TEXT, INT, INT) TO service_role;
+    END IF;
+END;
+$$;
+
+SELECT ensure_complaint_partitions();
+
+-- Optional: with the pg_cron extension enabled, keep partitions ahead without the backend
+-- SELECT cron.schedule('complaint-partitions', '0 3 * * *', 'SELECT ensure_complaint_partitions()');
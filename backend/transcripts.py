@@ -0,0 +1,106 @@
+"""
+Chat transcripts kept with the complaint they led to, for dispute resolution.
+
+Each /chat turn (the citizen's message and the reply) is added to the
+session's in-memory `messages`, capped at TRANSCRIPT_MAX_MESSAGES messages of
+at most TRANSCRIPT_MAX_MESSAGE_CHARS characters. Nothing is written per
+message: when the complaint is submitted the whole transcript is packed into
+one row of complaint_transcripts, as newline-delimited JSON compressed with
+raw deflate and a preset dictionary of the phrases every conversation shares
+(the categories, the field labels, the reply text and the JSON keys), then
+base64-encoded so it fits a TEXT column on every database backend.
+
+Supervisors read it back with GET /complaints/{id}/transcript, which inflates
+the blob a chunk at a time and streams the messages as NDJSON.
+"""
+import base64
+import os
+import time
+import uuid
+import zlib
+from typing import Dict, Iterator, List, Optional
+
+import orjson
+
+TRANSCRIPT_MAX_MESSAGES = int(os.getenv("TRANSCRIPT_MAX_MESSAGES", "200"))
+TRANSCRIPT_MAX_MESSAGE_CHARS = int(os.getenv("TRANSCRIPT_MAX_MESSAGE_CHARS", "2000"))
+TRANSCRIPT_COMPRESSION_LEVEL = int(os.getenv("TRANSCRIPT_COMPRESSION_LEVEL", "9"))
+
+TABLE = "complaint_transcripts"
+STREAM_CHUNK_BYTES = 16 * 1024
+
+# Preset dictionaries by encoding name. Stored transcripts name the one they were packed
+# with, so a new dictionary gets a new name and old rows stay readable.
+DICTIONARIES = {
+    "deflate-d1": (
+        b'{"at":1700000000.000,"role":"assistant","content":"Information received. Processing your request..."}\n'
+        b'{"at":1700000000.000,"role":"user","content":"road/traffic issues"}\n'
+        b'{"at":1700000000.000,"role":"user","content":"electricity/power problems"}\n'
+        b'{"at":1700000000.000,"role":"user","content":"water/plumbing issues"}\n'
+        b'{"at":1700000000.000,"role":"user","content":"garbage/waste collection"}\n'
+        b'Description: Location: Name: Mobile Number: Email: @gmail.com @yahoo.com .com Street, Road, Sector '
+        b'Ward near the pothole street light water leak garbage not working since days, please '
+        b'{"at":1700000000.000,"role":"user","content":"'
+    ),
+}
+ENCODING = "deflate-d1"
+
+
+def message(role: str, content: str, at: Optional[float] = None) -> Dict:
+    """One transcript entry, with the content cut to TRANSCRIPT_MAX_MESSAGE_CHARS"""
+    return {"at": round(time.time() if at is None else at, 3), "role": role,
+            "content": (content or "")[:TRANSCRIPT_MAX_MESSAGE_CHARS]}
+
+
+def pack(messages: List[Dict]) -> Optional[Dict]:
+    """The transcript columns for a list of messages, or None when there are none"""
+    if not messages:
+        return None
+    raw = b"".join(orjson.dumps(entry) + b"\n" for entry in messages)
+    compressor = zlib.compressobj(TRANSCRIPT_COMPRESSION_LEVEL, zlib.DEFLATED, -15, zdict=DICTIONARIES[ENCODING])
+    blob = compressor.compress(raw) + compressor.flush()
+    return {
+        "encoding": ENCODING,
+        "message_count": len(messages),
+        "raw_bytes": len(raw),
+        "transcript": base64.b64encode(blob).decode("ascii"),
+    }
+
+
+def iter_transcript(row: Dict, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """The stored NDJSON, inflated `chunk_size` compressed bytes at a time"""
+    blob = base64.b64decode(row["transcript"])
+    decompressor = zlib.decompressobj(-15, zdict=DICTIONARIES[row["encoding"]])
+    for offset in range(0, len(blob), chunk_size):
+        data = decompressor.decompress(blob[offset:offset + chunk_size])
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def unpack(row: Dict) -> List[Dict]:
+    return [orjson.loads(line) for line in b"".join(iter_transcript(row)).splitlines()]
+
+
+def save_transcript(client, complaint_id: Optional[str], packed: Optional[Dict]) -> bool:
+    """Store a packed transcript for a saved complaint; a failure never fails the submission"""
+    if not complaint_id or not packed:
+        return False
+    try:
+        client.table(TABLE).insert({"complaint_id": complaint_id, **packed}).execute()
+    except Exception as e:
+        print(f"[TRANSCRIPT] Saving the transcript of {complaint_id} failed: {getattr(e, 'message', None) or e}")
+        return False
+    return True
+
+
+def load_transcript(client, complaint_id: str) -> Optional[Dict]:
+    try:
+        uuid.UUID(complaint_id)
+    except ValueError:
+        return None
+    rows = client.table(TABLE).select("encoding", "message_count", "raw_bytes", "transcript") \
+        .eq("complaint_id", complaint_id).limit(1).execute().data
+    return rows[0] if rows else None
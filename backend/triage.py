@@ -0,0 +1,412 @@
+"""
+Priority triage queue for operators.
+
+Every unclaimed complaint has a priority score built from:
+
+- its issue_type (TRIAGE_TYPE_POINTS)
+- urgent keywords in its description (TRIAGE_KEYWORD_POINTS)
+- the size of its duplicate cluster: complaints of the same issue_type about the
+  same place (gazetteer location_id, else the ~1.2km geohash cell, else the
+  normalized location text). Every new complaint in a cluster raises all of them
+- its age, TRIAGE_AGE_POINTS_PER_HOUR
+
+Scores live in two levels of indexed max-heaps: each cluster's queued members
+by their own points, and the clusters by their best member plus the cluster's
+points. A new complaint, a claim or a growing cluster is then an O(log n)
+update however large the cluster is, rather than a re-sort or a re-score of
+every member. Age is linear and the same for everyone, so instead of
+re-scoring over time the keys are `points - age_rate * created`: the score at
+time t is `key + age_rate * t`, and the order never changes with t.
+
+Operators see the top of the queue with next() and take a complaint with
+claim(), which removes it from the heap under one lock, so two operators can
+never claim the same complaint. A claim is a lease of TRIAGE_CLAIM_TTL_S; a
+claim that is not renewed or released puts the complaint back in the queue.
+Claims are held in memory: after a restart every complaint is queued again.
+"""
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+TRIAGE_AGE_POINTS_PER_HOUR = float(os.getenv("TRIAGE_AGE_POINTS_PER_HOUR", "1"))
+TRIAGE_CLUSTER_POINTS = float(os.getenv("TRIAGE_CLUSTER_POINTS", "10"))
+TRIAGE_CLAIM_TTL_S = float(os.getenv("TRIAGE_CLAIM_TTL_S", "1800"))
+TRIAGE_WINDOW_DAYS = int(os.getenv("TRIAGE_WINDOW_DAYS", "30"))
+TRIAGE_PAGE_SIZE = int(os.getenv("TRIAGE_PAGE_SIZE", "5000"))
+
+TRIAGE_TYPE_POINTS = {
+    "electricity_power": 30.0,
+    "water_plumbing": 20.0,
+    "road_traffic": 20.0,
+    "garbage_waste": 10.0,
+}
+
+# Phrases are matched as whole words in the lowercased description; each counts once
+TRIAGE_KEYWORD_POINTS = {
+    "fire": 40.0,
+    "smoke": 25.0,
+    "sparking": 35.0,
+    "live wire": 40.0,
+    "electrocuted": 50.0,
+    "shock": 30.0,
+    "gas leak": 50.0,
+    "collapsed": 40.0,
+    "accident": 35.0,
+    "injured": 45.0,
+    "flooding": 30.0,
+    "sewage": 20.0,
+    "contaminated": 30.0,
+    "school": 10.0,
+    "hospital": 15.0,
+    "children": 10.0,
+}
+
+KEYWORD_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(k) for k in sorted(TRIAGE_KEYWORD_POINTS, key=len, reverse=True)) + r")\b"
+)
+LOCATION_TEXT_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+class IndexedHeap:
+    """Binary max-heap of (key, id) with a position index, so any id can be updated or removed in O(log n)"""
+
+    def __init__(self):
+        self._keys: List[float] = []
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._positions
+
+    def key(self, item_id: str) -> float:
+        return self._keys[self._positions[item_id]]
+
+    def _swap(self, i: int, j: int):
+        keys, ids = self._keys, self._ids
+        keys[i], keys[j] = keys[j], keys[i]
+        ids[i], ids[j] = ids[j], ids[i]
+        self._positions[ids[i]] = i
+        self._positions[ids[j]] = j
+
+    def _up(self, i: int):
+        keys = self._keys
+        while i > 0:
+            parent = (i - 1) >> 1
+            if keys[parent] >= keys[i]:
+                return
+            self._swap(i, parent)
+            i = parent
+
+    def _down(self, i: int):
+        keys = self._keys
+        size = len(keys)
+        while True:
+            largest = i
+            left = 2 * i + 1
+            if left < size and keys[left] > keys[largest]:
+                largest = left
+            if left + 1 < size and keys[left + 1] > keys[largest]:
+                largest = left + 1
+            if largest == i:
+                return
+            self._swap(i, largest)
+            i = largest
+
+    def push(self, item_id: str, key: float):
+        if item_id in self._positions:
+            self.update(item_id, key)
+            return
+        self._keys.append(key)
+        self._ids.append(item_id)
+        self._positions[item_id] = len(self._ids) - 1
+        self._up(len(self._ids) - 1)
+
+    def update(self, item_id: str, key: float):
+        i = self._positions[item_id]
+        old = self._keys[i]
+        self._keys[i] = key
+        if key > old:
+            self._up(i)
+        else:
+            self._down(i)
+
+    def remove(self, item_id: str) -> float:
+        i = self._positions.pop(item_id)
+        key = self._keys[i]
+        last_key, last_id = self._keys.pop(), self._ids.pop()
+        if i < len(self._ids):
+            self._keys[i], self._ids[i] = last_key, last_id
+            self._positions[last_id] = i
+            self._up(i)
+            self._down(self._positions[last_id])
+        return key
+
+    def peek(self) -> Tuple[str, float]:
+        return self._ids[0], self._keys[0]
+
+    def top(self, count: int) -> List[Tuple[str, float]]:
+        """The `count` largest (id, key) pairs, best first, without changing the heap: O(count log count)"""
+        keys, ids = self._keys, self._ids
+        size = len(ids)
+        if not size or count <= 0:
+            return []
+        result = [(ids[0], keys[0])]
+        frontier: List[Tuple[float, int]] = []
+        i = 0
+        while len(result) < count:
+            left = 2 * i + 1
+            if left < size:
+                heapq.heappush(frontier, (-keys[left], left))
+                if left + 1 < size:
+                    heapq.heappush(frontier, (-keys[left + 1], left + 1))
+            if not frontier:
+                break
+            negated, i = heapq.heappop(frontier)
+            result.append((ids[i], -negated))
+        return result
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str) and value:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return time.time()
+
+
+def cluster_key(row: Dict) -> str:
+    """Complaints with the same key are treated as duplicates of each other"""
+    place = row.get("location_id") or (row.get("geohash") or "")[:6]
+    if not place:
+        place = LOCATION_TEXT_PATTERN.sub(" ", (row.get("location") or "").lower()).strip()
+    return f"{row.get('issue_type') or ''}|{place}"
+
+
+def keyword_points(description: str) -> Tuple[float, List[str]]:
+    found = list(dict.fromkeys(KEYWORD_PATTERN.findall((description or "").lower())))
+    return sum(TRIAGE_KEYWORD_POINTS[k] for k in found), found
+
+
+class ClaimConflict(Exception):
+    def __init__(self, claim: Dict):
+        super().__init__(f"Already claimed by {claim['operator']}")
+        self.claim = claim
+
+
+class TriageQueue:
+    def __init__(self, age_points_per_hour: float = TRIAGE_AGE_POINTS_PER_HOUR,
+                 claim_ttl_s: float = TRIAGE_CLAIM_TTL_S):
+        self.age_rate = age_points_per_hour / 3600.0
+        self.claim_ttl_s = claim_ttl_s
+        self.ready = False
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            # id -> summary shown to operators, with its static key and cluster
+            self._items: Dict[str, Dict] = {}
+            # cluster key -> queued members by static key, and member count (queued or claimed)
+            self._members: Dict[str, IndexedHeap] = {}
+            self._sizes: Dict[str, int] = {}
+            # cluster key -> best queued member's key plus the cluster's points
+            self._clusters = IndexedHeap()
+            # id -> {"operator", "claimed_at", "expires_at"}; (expires_at, id) in _leases
+            self._claims: Dict[str, Dict] = {}
+            self._leases: List[Tuple[float, str]] = []
+            self._queued = 0
+            self.ready = False
+
+    def __len__(self) -> int:
+        return self._queued
+
+    def _cluster_points(self, cluster: str) -> float:
+        size = self._sizes.get(cluster, 0)
+        return TRIAGE_CLUSTER_POINTS * math.log2(size) if size > 1 else 0.0
+
+    def _refresh(self, cluster: str):
+        """Re-key one cluster in the cluster heap after its members or size changed: O(log clusters)"""
+        members = self._members.get(cluster)
+        if members:
+            self._clusters.push(cluster, members.peek()[1] + self._cluster_points(cluster))
+        elif cluster in self._clusters:
+            self._clusters.remove(cluster)
+
+    def _enqueue(self, complaint_id: str):
+        item = self._items[complaint_id]
+        self._members.setdefault(item["cluster"], IndexedHeap()).push(complaint_id, item["key"])
+        self._queued += 1
+        self._refresh(item["cluster"])
+
+    def _dequeue(self, complaint_id: str) -> bool:
+        item = self._items[complaint_id]
+        members = self._members.get(item["cluster"])
+        if members is None or complaint_id not in members:
+            return False
+        members.remove(complaint_id)
+        if not members:
+            del self._members[item["cluster"]]
+        self._queued -= 1
+        self._refresh(item["cluster"])
+        return True
+
+    def _key(self, complaint_id: str) -> float:
+        item = self._items[complaint_id]
+        return item["key"] + self._cluster_points(item["cluster"])
+
+    def cluster_size(self, row: Dict) -> int:
+        """How many queued or claimed complaints share this row's cluster"""
+        with self._lock:
+            return self._sizes.get(cluster_key(row), 0)
+
+    def score(self, key: float, now: Optional[float] = None) -> float:
+        return round(key + self.age_rate * (now or time.time()), 2)
+
+    def add(self, row: Dict):
+        """Queue one stored complaint; rows without an id, or already known, are ignored"""
+        complaint_id = row.get("id")
+        if not complaint_id:
+            return
+        complaint_id = str(complaint_id)
+        points, keywords = keyword_points(row.get("complaint_description"))
+        points += TRIAGE_TYPE_POINTS.get(row.get("issue_type") or "", 0.0)
+        item = {
+            "key": points - self.age_rate * _timestamp(row.get("created_at")),
+            "keywords": keywords,
+            "cluster": cluster_key(row),
+            "summary": {
+                "id": complaint_id,
+                "issue_type": row.get("issue_type"),
+                "location": row.get("location"),
+                "location_id": row.get("location_id"),
+                "created_at": row.get("created_at"),
+                "complaint_description": (row.get("complaint_description") or "")[:200],
+            },
+        }
+        with self._lock:
+            if complaint_id in self._items:
+                return
+            self._items[complaint_id] = item
+            # Evidence for the rest of the cluster: the cluster's points apply to every member
+            self._sizes[item["cluster"]] = self._sizes.get(item["cluster"], 0) + 1
+            self._enqueue(complaint_id)
+
+    def _expire_claims(self, now: float):
+        while self._leases and self._leases[0][0] <= now:
+            expires_at, complaint_id = heapq.heappop(self._leases)
+            claim = self._claims.get(complaint_id)
+            if claim is not None and claim["expires_at"] == expires_at:
+                del self._claims[complaint_id]
+                self._enqueue(complaint_id)
+
+    def _entry(self, complaint_id: str, now: float) -> Dict:
+        item = self._items[complaint_id]
+        return {
+            **item["summary"],
+            "score": self.score(self._key(complaint_id), now),
+            "cluster_size": self._sizes[item["cluster"]],
+            "keywords": item["keywords"],
+        }
+
+    def next(self, limit: int = 1, now: Optional[float] = None) -> List[Dict]:
+        """The highest-priority unclaimed complaints, best first"""
+        now = now or time.time()
+        with self._lock:
+            self._expire_claims(now)
+            # The best `limit` complaints are among the best `limit` members of the best `limit` clusters
+            candidates = []
+            for cluster, _ in self._clusters.top(limit):
+                bonus = self._cluster_points(cluster)
+                size = self._sizes[cluster]
+                candidates.extend((key + bonus, member, size) for member, key in self._members[cluster].top(limit))
+        # Items never change once added, so the response is built outside the lock
+        return [
+            {**self._items[complaint_id]["summary"], "score": self.score(key, now), "cluster_size": size,
+             "keywords": self._items[complaint_id]["keywords"]}
+            for key, complaint_id, size in heapq.nlargest(limit, candidates)
+        ]
+
+    def claim(self, complaint_id: str, operator: str, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Take a complaint off the queue for `operator`. Claiming it again as the
+        same operator renews the lease. Returns None for unknown complaints and
+        raises ClaimConflict when another operator holds it.
+        """
+        now = now or time.time()
+        with self._lock:
+            self._expire_claims(now)
+            existing = self._claims.get(complaint_id)
+            if existing is not None and existing["operator"] != operator:
+                raise ClaimConflict(existing)
+            if existing is None and (complaint_id not in self._items or not self._dequeue(complaint_id)):
+                return None
+            claim = {
+                "operator": operator,
+                "claimed_at": existing["claimed_at"] if existing else now,
+                "expires_at": now + self.claim_ttl_s,
+            }
+            self._claims[complaint_id] = claim
+            heapq.heappush(self._leases, (claim["expires_at"], complaint_id))
+            return {**self._entry(complaint_id, now), "claim": claim}
+
+    def release(self, complaint_id: str, operator: str) -> bool:
+        """Give a claimed complaint back to the queue. Returns False when `operator` does not hold it"""
+        with self._lock:
+            claim = self._claims.get(complaint_id)
+            if claim is None or claim["operator"] != operator:
+                return False
+            del self._claims[complaint_id]
+            self._enqueue(complaint_id)
+            return True
+
+    def discard(self, complaint_id: str):
+        """Forget a complaint for good, e.g. once it is resolved"""
+        with self._lock:
+            if complaint_id not in self._items:
+                return
+            self._dequeue(complaint_id)
+            self._claims.pop(complaint_id, None)
+            cluster = self._items.pop(complaint_id)["cluster"]
+            self._sizes[cluster] -= 1
+            if not self._sizes[cluster]:
+                del self._sizes[cluster]
+            self._refresh(cluster)
+
+    def build(self, client, page_size: int = TRIAGE_PAGE_SIZE, window_days: int = TRIAGE_WINDOW_DAYS) -> int:
+        """(Re)load open complaints from the last `window_days` days. Returns the queue length"""
+        self.clear()
+        since = datetime.fromtimestamp(time.time() - window_days * 86400).astimezone().isoformat()
+        offset = 0
+        while True:
+            page = client.table("complaints").select(
+                "id", "issue_type", "location", "location_id", "geohash", "complaint_description", "created_at", "status"
+            ).gte("created_at", since).order("created_at").order("id") \
+                .range(offset, offset + page_size - 1).execute().data
+            for row in page:
+                if (row.get("status") or "open") == "open":
+                    self.add(row)
+            if len(page) < page_size:
+                break
+            offset += page_size
+        self.ready = True
+        return len(self)
+
+    def status_changed(self, row: Dict):
+        """Status listener: acknowledged and resolved complaints leave the queue, reopened ones return"""
+        if row.get("status") == "open":
+            self.add(row)
+        else:
+            self.discard(str(row.get("id")))
+
+
+triage_queue = TriageQueue()
@@ -0,0 +1,166 @@
+"""
+Rule-based webhook routing with parallel fan-out.
+
+Routes are loaded from the JSON file named by WEBHOOK_ROUTES_FILE (see
+webhook_routes.example.json) and compiled once into a matcher indexed by
+issue_type, with each route's location patterns folded into a single regex.
+Every complaint is delivered to all matching destinations concurrently; each
+destination has its own timeout, circuit breaker and in-flight cap, so a slow
+or failing destination cannot hold up the others. When no route matches,
+complaints go to the route file's "default" destinations, or WEBHOOK_URL.
+
+Location patterns are case-insensitive globs ("*sector 4*") or regexes
+prefixed with "re:". Issue types use the database values (road_traffic,
+electricity_power, water_plumbing, garbage_waste) or "*".
+"""
+import fnmatch
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+from resilience import CircuitBreaker, env_breaker
+
+WEBHOOK_ROUTES_FILE = os.getenv("WEBHOOK_ROUTES_FILE", "")
+WEBHOOK_FANOUT_WORKERS = int(os.getenv("WEBHOOK_FANOUT_WORKERS", "32"))
+WEBHOOK_DESTINATION_MAX_IN_FLIGHT = int(os.getenv("WEBHOOK_DESTINATION_MAX_IN_FLIGHT", "8"))
+DEFAULT_TIMEOUT_S = float(os.getenv("WEBHOOK_TIMEOUT_S", "10"))
+
+
+class Destination:
+    def __init__(self, url: str, name: Optional[str] = None, timeout_s: float = DEFAULT_TIMEOUT_S,
+                 max_in_flight: int = WEBHOOK_DESTINATION_MAX_IN_FLIGHT):
+        self.url = url
+        self.name = name or url
+        self.timeout_s = timeout_s
+        self.breaker: CircuitBreaker = env_breaker(f"webhook:{self.name}", "WEBHOOK")
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def try_acquire(self) -> bool:
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+
+class Route:
+    def __init__(self, name: str, issue_types: List[str], location_pattern: Optional[Pattern],
+                 destinations: List[Destination]):
+        self.name = name
+        self.issue_types = issue_types
+        self.location_pattern = location_pattern
+        self.destinations = destinations
+
+
+def compile_location_patterns(patterns: List[str]) -> Optional[Pattern]:
+    """Fold globs and `re:` regexes into one case-insensitive alternation"""
+    if not patterns:
+        return None
+    parts = []
+    for pattern in patterns:
+        if pattern.startswith("re:"):
+            # Regexes may match anywhere in the location, globs must match all of it
+            parts.append(f"(?:.*?(?:{pattern[3:]}))")
+        else:
+            parts.append(f"(?:{fnmatch.translate(pattern.lower())})")
+    return re.compile("|".join(parts), re.IGNORECASE)
+
+
+class WebhookRouter:
+    def __init__(self, routes: List[Route], default: List[Destination]):
+        self.routes = routes
+        self.default = default
+        self._by_issue_type: Dict[str, List[Route]] = {}
+        for route in routes:
+            for issue_type in route.issue_types or ["*"]:
+                self._by_issue_type.setdefault(issue_type, []).append(route)
+        self._fallbacks: Dict[str, Destination] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "WebhookRouter":
+        destinations: Dict[str, Destination] = {}
+
+        def destination(spec: Dict) -> Destination:
+            # Routes sharing a URL share one Destination (and breaker)
+            url = spec["url"]
+            if url not in destinations:
+                destinations[url] = Destination(url, spec.get("name"), float(spec.get("timeout_s", DEFAULT_TIMEOUT_S)))
+            return destinations[url]
+
+        routes = [
+            Route(
+                spec.get("name", f"route-{index}"),
+                spec.get("issue_types") or ["*"],
+                compile_location_patterns(spec.get("locations") or []),
+                [destination(d) for d in spec.get("destinations", [])],
+            )
+            for index, spec in enumerate(config.get("routes", []))
+        ]
+        return cls(routes, [destination(d) for d in config.get("default", [])])
+
+    def match(self, issue_type: Optional[str], location: Optional[str], fallback_url: str = "") -> List[Destination]:
+        candidates = self._by_issue_type.get(issue_type or "", []) + self._by_issue_type.get("*", [])
+        location = location or ""
+
+        matched: Dict[str, Destination] = {}
+        for route in candidates:
+            if route.location_pattern is None or route.location_pattern.match(location):
+                for destination in route.destinations:
+                    matched.setdefault(destination.url, destination)
+        if matched:
+            return list(matched.values())
+        if self.default:
+            return list(self.default)
+        if fallback_url:
+            if fallback_url not in self._fallbacks:
+                self._fallbacks[fallback_url] = Destination(fallback_url, "default")
+            return [self._fallbacks[fallback_url]]
+        return []
+
+    def destination_urls(self) -> List[str]:
+        urls = {d.url for route in self.routes for d in route.destinations}
+        urls.update(d.url for d in self.default)
+        return sorted(urls)
+
+
+def load_webhook_router(path: str = WEBHOOK_ROUTES_FILE) -> WebhookRouter:
+    if not path:
+        return WebhookRouter([], [])
+    with open(path, encoding="utf-8") as f:
+        router = WebhookRouter.from_config(json.load(f))
+    print(f"[WEBHOOK] Loaded {len(router.routes)} routes to {len(router.destination_urls())} destinations from {path}")
+    return router
+
+
+_fanout_pool = ThreadPoolExecutor(max_workers=WEBHOOK_FANOUT_WORKERS, thread_name_prefix="webhook-fanout")
+
+
+def fan_out(destinations: List[Destination], deliver: Callable[[Destination], bool]) -> Dict[str, bool]:
+    """
+    Run `deliver` for every destination concurrently and wait for all of them,
+    each bounded by its own timeout. A destination already at its in-flight
+    cap fails fast instead of occupying more workers.
+    """
+    def guarded(destination: Destination) -> bool:
+        if not destination.try_acquire():
+            print(f"[WEBHOOK] {destination.name}: too many deliveries in flight, skipping")
+            return False
+        try:
+            return deliver(destination)
+        finally:
+            destination.release()
+
+    if len(destinations) == 1:
+        return {destinations[0].url: guarded(destinations[0])}
+
+    futures: List[Tuple[Destination, object]] = [
+        (destination, _fanout_pool.submit(guarded, destination)) for destination in destinations
+    ]
+    wait([future for _, future in futures], timeout=max(d.timeout_s for d in destinations) * 3)
+
+    results = {}
+    for destination, future in futures:
+        results[destination.url] = future.done() and not future.exception() and future.result()
+    return results
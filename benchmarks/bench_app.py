@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for the backend.
+
+Boots the FastAPI app in-process (httpx ASGI transport, no sockets), swaps
+Supabase and the webhook endpoint for local stand-ins, and drives a mix of
+full chat conversations and direct submissions at a fixed concurrency.
+
+    python benchmarks/bench_app.py --sessions 1000 --concurrency 16 --output run.json
+    python benchmarks/bench_app.py --baseline run.json    # compare against a previous run
+    python benchmarks/bench_app.py --scenario slow-db     # 200ms database latency
+    python benchmarks/bench_app.py --scenario flaky-db    # 10% errors, 2% RLS failures
+    python benchmarks/bench_app.py --protocol batch --rtt-ms 800   # one /chat/batch per session over 2G
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    CLIENT_HEADER, compare_results, peak_rss_mb, print_comparison, rss_mb, run_metadata, simulated_clients, summarize,
+    write_results
+)
+from benchmarks.standins import WebhookReceiver, install_standins, stored_rows  # noqa: E402
+from local_supabase import FaultInjector  # noqa: E402
+
+# Database fault presets; explicit --db-* flags override them
+SCENARIOS = {
+    "baseline": {},
+    "slow-db": {"db_latency_ms": 200.0, "db_jitter_ms": 50.0},
+    "flaky-db": {"db_latency_ms": 20.0, "db_error_rate": 0.10, "db_rls_rate": 0.02},
+}
+
+ISSUE_TYPES = [
+    "road/traffic issues",
+    "electricity/power problems",
+    "water/plumbing issues",
+    "garbage/waste collection",
+]
+
+DESCRIPTIONS = [
+    "There is a large pothole on Main Street causing traffic issues and potential vehicle damage.",
+    "Street lights on the whole block have been out for three nights in a row.",
+    "Water supply has been contaminated with mud since the pipeline repair last week.",
+    "Garbage has not been collected for ten days and the bins are overflowing.",
+]
+
+LOCATIONS = [
+    "123 Main Street, Downtown",
+    "MG Road near metro station",
+    "456 Test Street, Test City",
+    "Sector 4, Ward 12",
+]
+
+
+def make_complaint(rng: random.Random, index: int, valid: bool = True) -> Dict:
+    complaint = {
+        "citizen_name": f"Bench User {index}",
+        "location": rng.choice(LOCATIONS),
+        "issue_type": rng.choice(ISSUE_TYPES),
+        "complaint_description": rng.choice(DESCRIPTIONS),
+        "mobile_number": f"98{index % 100000000:08d}",
+        "email": f"bench.user{index}@example.com",
+    }
+    if not valid:
+        complaint["email"] = "not-an-email"
+    return complaint
+
+
+def conversation_turns(complaint: Dict) -> List[str]:
+    """The six /chat turns the frontend sends before submitting"""
+    return [
+        complaint["issue_type"],
+        complaint["complaint_description"],
+        complaint["location"],
+        complaint["citizen_name"],
+        complaint["mobile_number"],
+        complaint["email"],
+    ]
+
+
+def build_workload(args) -> List[Dict]:
+    rng = random.Random(args.seed)
+    sessions = []
+    for index in range(args.sessions):
+        valid = rng.random() >= args.invalid_ratio
+        sessions.append({
+            "session_id": f"bench_{args.seed}_{index}",
+            "conversation": rng.random() < args.conversation_ratio,
+            "complaint": make_complaint(rng, index, valid),
+        })
+    return sessions
+
+
+async def run_session(client, session: Dict, latencies: Dict[str, List[float]], errors: Dict[str, int],
+                      statuses: Dict[str, Counter], protocol: str = "per-turn", rtt_s: float = 0.0) -> float:
+    async def timed_post(name: str, path: str, body: Dict):
+        start = time.perf_counter()
+        # The client's network round trip, which the server does not see
+        if rtt_s:
+            await asyncio.sleep(rtt_s)
+        try:
+            response = await client.post(path, json=body, headers={CLIENT_HEADER: session["session_id"]})
+            status = response.status_code
+        except Exception:
+            status = 0
+        latencies[name].append(time.perf_counter() - start)
+        statuses[name][str(status)] += 1
+        # 429/503 are deliberate load shedding, not errors
+        if status == 0 or (status >= 500 and status != 503):
+            errors[name] += 1
+
+    complaint = session["complaint"]
+    start = time.perf_counter()
+    if protocol == "batch":
+        turns = [{"message": turn} for turn in conversation_turns(complaint)] if session["conversation"] else []
+        await timed_post("chat-batch", "/chat/batch",
+                         {"session_id": session["session_id"], "turns": turns, "submission": complaint})
+        return time.perf_counter() - start
+
+    if session["conversation"]:
+        for turn in conversation_turns(complaint):
+            await timed_post("chat", "/chat", {"message": turn, "session_id": session["session_id"]})
+
+    await timed_post("submit-complaint", "/submit-complaint", {**complaint, "session_id": session["session_id"]})
+    return time.perf_counter() - start
+
+
+async def drive(app, sessions: List[Dict], concurrency: int, protocol: str = "per-turn", rtt_s: float = 0.0):
+    import httpx
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    session_times: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for session in sessions:
+        queue.put_nowait(session)
+
+    transport = httpx.ASGITransport(app=simulated_clients(app))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench.local") as client:
+        async def worker():
+            while not queue.empty():
+                session_times.append(await run_session(
+                    client, queue.get_nowait(), latencies, errors, statuses, protocol, rtt_s
+                ))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, errors, statuses, elapsed, session_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load benchmark for the complaint API")
+    parser.add_argument("--scenario", default="baseline", choices=sorted(SCENARIOS),
+                        help="Database fault preset")
+    parser.add_argument("--sessions", type=int, default=500, help="Citizen sessions to run")
+    parser.add_argument("--warmup", type=int, default=50, help="Sessions run before measuring")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--conversation-ratio", type=float, default=0.8,
+                        help="Fraction of sessions that chat before submitting")
+    parser.add_argument("--invalid-ratio", type=float, default=0.05,
+                        help="Fraction of submissions that fail validation")
+    parser.add_argument("--protocol", default="per-turn", choices=["per-turn", "batch"],
+                        help="One /chat per turn then /submit-complaint, or everything in one /chat/batch")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="Client network round trip added to every request")
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--no-webhook", action="store_true", help="Run without the local webhook receiver")
+    parser.add_argument("--db-http", action="store_true",
+                        help="Serve the local database over HTTP and use the real supabase client")
+    parser.add_argument("--db-latency-ms", type=float)
+    parser.add_argument("--db-jitter-ms", type=float)
+    parser.add_argument("--db-error-rate", type=float)
+    parser.add_argument("--db-rls-rate", type=float)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    args = parser.parse_args()
+    for key, value in SCENARIOS[args.scenario].items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+
+    receiver = None if args.no_webhook else WebhookReceiver().start()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        local, db_server = install_standins(receiver.url if receiver else "", over_http=args.db_http)
+        import main as app_module
+
+        if args.warmup:
+            warmup_args = argparse.Namespace(**{**vars(args), "sessions": args.warmup, "seed": args.seed + 1})
+            asyncio.run(drive(app_module.app, build_workload(warmup_args), args.concurrency, args.protocol))
+
+        # Faults apply to the measured run only, seeded so runs are repeatable
+        local.faults = FaultInjector(
+            latency_ms=args.db_latency_ms or 0.0,
+            jitter_ms=args.db_jitter_ms or 0.0,
+            error_rate=args.db_error_rate or 0.0,
+            rls_failure_rate=args.db_rls_rate or 0.0,
+            seed=args.seed,
+        )
+        sessions = build_workload(args)
+        rss_start = rss_mb()
+        saved_before = len(stored_rows(local, "complaints"))
+        webhooks_before = receiver.received if receiver else 0
+        latencies, errors, statuses, elapsed, session_times = asyncio.run(
+            drive(app_module.app, sessions, args.concurrency, args.protocol, args.rtt_ms / 1000.0)
+        )
+        rss_end = rss_mb()
+
+    if receiver:
+        receiver.stop()
+    if db_server:
+        db_server.stop()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    total = len(all_latencies)
+    results = run_metadata("app", vars(args))
+    results.update({
+        "scenario": args.scenario,
+        "requests": total,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "overall": summarize(all_latencies, sum(errors.values())),
+        "endpoints": {
+            name: {**summarize(values, errors[name]), "statuses": dict(statuses[name])}
+            for name, values in sorted(latencies.items())
+        },
+        "session": summarize(session_times),
+        "rss_mb": {"start": rss_start, "end": rss_end, "peak": peak_rss_mb()},
+        "checks": {
+            "complaints_saved": len(stored_rows(local, "complaints")) - saved_before,
+            "webhooks_received": (receiver.received - webhooks_before) if receiver else 0,
+        },
+    })
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
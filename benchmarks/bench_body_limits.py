@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Request body limit benchmark: memory under a flood of oversized payloads.
+
+Boots the app in-process (httpx ASGI transport) and sends --requests
+/submit-complaint bodies of --payload-kb each at --concurrency, in three
+phases after a run of normal submissions:
+
+  - declared: the body has a Content-Length over the route's limit
+    (answered 413 before the body is read);
+  - streamed: the same body sent chunked with no Content-Length (counted as
+    it arrives and cut off at the limit);
+  - unlimited: the streamed flood again with the limits switched off, for
+    comparison - every body is buffered and parsed before the route rejects
+    it. It runs last, so peak_rss_mb is its high-water mark.
+
+Reports latency, status counts and RSS sampled through each phase. With the
+limits on, RSS should not grow with --requests: at most one chunk per request
+in flight is held.
+
+    python benchmarks/bench_body_limits.py --requests 2000 --payload-kb 1024 --output body_limits.json
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import os
+import sys
+import time
+from collections import Counter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    CLIENT_HEADER, compare_results, peak_rss_mb, print_comparison, rss_mb, run_metadata, simulated_clients, summarize,
+    write_results
+)
+from benchmarks.standins import install_standins  # noqa: E402
+
+CHUNK = 64 * 1024
+
+
+def complaint(index: int) -> dict:
+    return {
+        "citizen_name": f"Bench User {index}",
+        "location": "Sector 4, Ward 12",
+        "issue_type": "road/traffic issues",
+        "complaint_description": "There is a large pothole on Main Street causing traffic issues.",
+        "mobile_number": f"98{index % 100000000:08d}",
+        "email": f"bench.user{index}@example.com",
+        "session_id": f"bench-{index}",
+    }
+
+
+async def flood(app, requests: int, concurrency: int, make_request):
+    """Send `requests` requests from `concurrency` workers; RSS is sampled every 50 requests"""
+    import httpx
+
+    latencies = []
+    statuses = Counter()
+    samples = [rss_mb()]
+    remaining = iter(range(requests))
+
+    transport = httpx.ASGITransport(app=simulated_clients(app))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench.local", timeout=None) as client:
+        async def worker():
+            for index in remaining:
+                start = time.perf_counter()
+                response = await make_request(client, index)
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+                if index % 50 == 0:
+                    samples.append(rss_mb())
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    gc.collect()
+    samples.append(rss_mb())
+    return {
+        "latency": summarize(latencies),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "rss_mb": {"start": samples[0], "max": max(samples), "end": samples[-1],
+                   "growth": round(max(samples) - samples[0], 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory under a flood of oversized request bodies")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per flood phase")
+    parser.add_argument("--normal", type=int, default=500, help="Normal submissions sent first")
+    parser.add_argument("--payload-kb", type=int, default=1024)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--skip-unlimited", action="store_true", help="Leave out the comparison phase")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    results = run_metadata("body_limits", vars(args))
+    # One padding string shared by every request, so the client side adds no memory per request
+    body = b'{"citizen_name": "' + b"x" * (args.payload_kb * 1024) + b'"}'
+
+    async def normal(client, index):
+        return await client.post("/submit-complaint", json=complaint(index), headers={CLIENT_HEADER: f"client_{index}"})
+
+    async def declared(client, index):
+        return await client.post("/submit-complaint", content=body, headers={"Content-Type": "application/json"})
+
+    async def streamed(client, index):
+        async def chunks():
+            for offset in range(0, len(body), CHUNK):
+                yield body[offset:offset + CHUNK]
+        return await client.post("/submit-complaint", content=chunks(), headers={"Content-Type": "application/json"})
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        install_standins()
+        import main as app_module
+        from admission import body_limits
+
+        results["normal"] = asyncio.run(flood(app_module.app, args.normal, args.concurrency, normal))
+        results["declared"] = asyncio.run(flood(app_module.app, args.requests, args.concurrency, declared))
+        results["streamed"] = asyncio.run(flood(app_module.app, args.requests, args.concurrency, streamed))
+        results["rejected"] = {"declared": body_limits.rejected_declared, "streamed": body_limits.rejected_streamed}
+        if not args.skip_unlimited:
+            body_limits.unlimited_prefixes = ("/",)
+            results["unlimited"] = asyncio.run(flood(app_module.app, args.requests, args.concurrency, streamed))
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
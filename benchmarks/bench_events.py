@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Audit log benchmark: append throughput, replay speed and projection rebuild.
+
+Appends --events lifecycle events (a submission, its routing and delivery,
+and a status change for a share of complaints) to a fresh log, with and
+without fsync on a sample. Then replays the whole log with mmap and, for
+comparison, with plain readline; and rebuilds the lifecycle projection once
+by full replay and once from a snapshot taken --tail-events before the end.
+
+    python benchmarks/bench_events.py --events 1000000 --output events.json
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import orjson
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, run_metadata, summarize, write_results
+)
+import benchmarks.standins  # noqa: E402,F401  (puts backend/ on sys.path)
+
+from events import EventLog, LifecycleStats  # noqa: E402
+
+ISSUE_TYPES = ["road_traffic", "electricity_power", "water_plumbing", "garbage_waste"]
+
+
+def lifecycle(rng, number):
+    complaint_id = f"{number:08x}-0000-4000-8000-000000000000"
+    yield "submitted", complaint_id, {"issue_type": rng.choice(ISSUE_TYPES), "location_id": f"ward-{number % 300}"}
+    yield "routed", complaint_id, {"destinations": ["default"]}
+    yield "notified", complaint_id, {"channel": "webhook", "destination": "default", "event": "complaint_submitted",
+                                     "ok": rng.random() > 0.01}
+    if rng.random() < 0.6:
+        yield "status_changed", complaint_id, {"from": "open", "to": "acknowledged", "operator": "op-1"}
+
+
+def append_events(log, rng, count, timings=None):
+    appended = 0
+    number = 0
+    while appended < count:
+        for event_type, complaint_id, fields in lifecycle(rng, number):
+            start = time.perf_counter()
+            log.append(event_type, complaint_id, **fields)
+            if timings is not None:
+                timings.append(time.perf_counter() - start)
+            appended += 1
+        number += 1
+    return appended
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit log append, replay and snapshot rebuild")
+    parser.add_argument("--events", type=int, default=500000)
+    parser.add_argument("--fsync-events", type=int, default=2000)
+    parser.add_argument("--tail-events", type=int, default=20000)
+    parser.add_argument("--segment-mb", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = run_metadata("events", vars(args))
+    directory = tempfile.mkdtemp(prefix="bench-events-")
+    try:
+        log = EventLog(os.path.join(directory, "log"), segment_bytes=args.segment_mb * 1024 * 1024)
+        projection = LifecycleStats()
+        log.attach(projection)
+        timings = []
+        start = time.perf_counter()
+        appended = append_events(log, rng, args.events - args.tail_events, timings)
+        log.snapshot()
+        appended += append_events(log, rng, args.tail_events, timings)
+        elapsed = time.perf_counter() - start
+        results["append"] = summarize(timings)
+        size = sum(os.path.getsize(path) for _, path in log.segments())
+        results["append"].update({
+            "events_per_s": round(appended / elapsed, 1),
+            "bytes_per_event": round(size / appended, 1),
+            "segments": len(log.segments()),
+        })
+        log.close()
+        del timings
+
+        durable = EventLog(os.path.join(directory, "fsync"), fsync=True)
+        timings = []
+        append_events(durable, rng, args.fsync_events, timings)
+        durable.close()
+        results["append_fsync"] = summarize(timings)
+
+        replayer = EventLog(log.directory)
+        start = time.perf_counter()
+        replayed = sum(1 for _ in replayer.replay())
+        elapsed = time.perf_counter() - start
+        results["replay_mmap"] = {"events": replayed, "seconds": round(elapsed, 3),
+                                  "events_per_s": round(replayed / elapsed, 1)}
+        start = time.perf_counter()
+        replayed = 0
+        for _, path in replayer.segments():
+            with open(path, "rb") as f:
+                for line in f:
+                    orjson.loads(line)
+                    replayed += 1
+        elapsed = time.perf_counter() - start
+        results["replay_readline"] = {"events": replayed, "seconds": round(elapsed, 3),
+                                      "events_per_s": round(replayed / elapsed, 1)}
+
+        start = time.perf_counter()
+        full = LifecycleStats()
+        for event in replayer.replay():
+            full.apply(event)
+        full_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        rebuilt = LifecycleStats()
+        rebuild = replayer.attach(rebuilt)
+        snapshot_seconds = time.perf_counter() - start
+        replayer.close()
+        results["rebuild"] = {
+            "full_replay_seconds": round(full_seconds, 3),
+            "from_snapshot_seconds": round(snapshot_seconds, 3),
+            "tail_events": rebuild["replayed"],
+            "matches_live": rebuilt.summary() == full.summary() == projection.summary(),
+        }
+        results["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
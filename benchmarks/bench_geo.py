@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Radius query benchmark for the nearby-complaints grid index.
+
+Indexes --points synthetic complaint coordinates spread over a city-sized box
+(with a share clustered around a few hot spots, the way complaints pile up
+around busy junctions), then reports build time, memory and query latency at
+several radii, both at random points and at the hot spots. A linear scan over
+all points is timed for comparison.
+
+    python benchmarks/bench_geo.py --points 1000000 --output geo.json
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, rss_mb, run_metadata, summarize, write_results
+)
+import benchmarks.standins  # noqa: E402,F401  (puts backend/ on sys.path)
+
+from geo_index import METERS_PER_DEGREE, GridIndex  # noqa: E402
+
+# Roughly Bengaluru: 40km x 40km
+SOUTH, WEST, SIZE_DEGREES = 12.80, 77.45, 0.36
+HOT_SPOTS = [(12.9177, 77.6238), (12.9755, 77.6069), (12.9352, 77.6245), (12.9304, 77.6784)]
+
+
+def make_point(rng: random.Random, hot_share: float):
+    if rng.random() < hot_share:
+        lat, lon = rng.choice(HOT_SPOTS)
+        return lat + rng.gauss(0, 0.004), lon + rng.gauss(0, 0.004)
+    return SOUTH + rng.random() * SIZE_DEGREES, WEST + rng.random() * SIZE_DEGREES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid index build and radius query latency")
+    parser.add_argument("--points", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--hot-share", type=float, default=0.2)
+    parser.add_argument("--cell-meters", type=float, default=250)
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = run_metadata("geo", vars(args))
+    rss_before = rss_mb()
+
+    index = GridIndex(args.cell_meters)
+    points = []
+    start = time.perf_counter()
+    for number in range(args.points):
+        lat, lon = make_point(rng, args.hot_share)
+        points.append((lat, lon))
+        index.add({"id": f"c{number}", "latitude": lat, "longitude": lon})
+    build_s = time.perf_counter() - start
+    results["build"] = {
+        "points": len(index),
+        "seconds": round(build_s, 2),
+        "points_per_s": round(args.points / build_s, 1),
+        "rss_mb_including_points": round(rss_mb() - rss_before, 2),
+    }
+
+    results["query"] = {}
+    for radius in (200, 500, 1000, 2000):
+        for name, centres in (
+            ("random", [make_point(rng, 0) for _ in range(args.queries)]),
+            ("hot_spot", [rng.choice(HOT_SPOTS) for _ in range(args.queries)]),
+        ):
+            timings = []
+            matches = 0
+            for lat, lon in centres:
+                query_start = time.perf_counter()
+                _, total = index.nearby(lat, lon, radius, limit=100)
+                timings.append(time.perf_counter() - query_start)
+                matches += total
+            results["query"][f"{name}_{radius}m"] = {
+                **summarize(timings), "mean_matches": round(matches / len(centres), 1)
+            }
+
+    scan_timings = []
+    lat0, lon0 = HOT_SPOTS[0]
+    lon_scale = METERS_PER_DEGREE * math.cos(math.radians(lat0))
+    for _ in range(3):
+        scan_start = time.perf_counter()
+        matches = sum(1 for lat, lon in points
+                      if ((lat - lat0) * METERS_PER_DEGREE) ** 2 + ((lon - lon0) * lon_scale) ** 2 <= 500 ** 2)
+        scan_timings.append(time.perf_counter() - scan_start)
+    results["linear_scan_hot_spot_500m"] = {**summarize(scan_timings), "matches": matches}
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
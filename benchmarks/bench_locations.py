@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Location gazetteer benchmark: typeahead and free-text resolution.
+
+Builds a synthetic gazetteer of --streets streets ("<name> <suffix>" in one of
+a few hundred wards, with abbreviation aliases), then reports build time,
+memory, /locations/suggest latency for uncached and repeated prefixes of
+every length, and resolve() latency for exact, abbreviated, misspelled and
+"near <landmark>" inputs.
+
+    python benchmarks/bench_locations.py --streets 200000 --output locations.json
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, rss_mb, run_metadata, summarize, write_results
+)
+import benchmarks.standins  # noqa: E402,F401  (puts backend/ on sys.path)
+
+from gazetteer import Gazetteer  # noqa: E402
+
+SUFFIXES = [("Road", "Rd"), ("Street", "St"), ("Main Road", "Main Rd"), ("Cross", "Crs"), ("Lane", "Ln")]
+
+
+def make_word(rng: random.Random) -> str:
+    syllables = ["ka", "ra", "ma", "na", "la", "pu", "ha", "ban", "gal", "sha", "vi", "de", "ko", "ti", "ja"]
+    return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def make_entries(count: int, rng: random.Random):
+    wards = [make_word(rng) for _ in range(max(count // 200, 1))]
+    entries = []
+    for number in range(count):
+        name = make_word(rng)
+        suffix, abbreviation = rng.choice(SUFFIXES)
+        ward = rng.choice(wards)
+        entries.append({
+            "id": f"street-{number}",
+            "name": f"{name} {suffix} {ward}",
+            "kind": "street",
+            "aliases": [f"{name} {abbreviation} {ward}"],
+            "lat": 12.8 + rng.random() * 0.4,
+            "lon": 77.4 + rng.random() * 0.4,
+            "weight": rng.randint(1, 5),
+        })
+    return entries
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    position = rng.randrange(len(word))
+    return word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+
+
+def time_calls(function, inputs):
+    timings = []
+    for value in inputs:
+        start = time.perf_counter()
+        function(value)
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gazetteer typeahead and resolution latency")
+    parser.add_argument("--streets", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = run_metadata("locations", vars(args))
+    entries = make_entries(args.streets, rng)
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    gazetteer = Gazetteer(entries, cache_size=args.queries * 4)
+    results["build"] = {
+        "entries": len(gazetteer),
+        "seconds": round(time.perf_counter() - start, 2),
+        "rss_mb": round(rss_mb() - rss_before, 2),
+    }
+
+    sample = [rng.choice(entries) for _ in range(args.queries)]
+    results["suggest"] = {}
+    for length in (1, 2, 3, 5, 8):
+        prefixes = [entry["name"][:length] for entry in sample]
+        gazetteer._suggest_body.cache_clear()
+        results["suggest"][f"prefix_{length}_cold"] = time_calls(gazetteer.suggest_body, prefixes)
+        results["suggest"][f"prefix_{length}_repeated"] = time_calls(gazetteer.suggest_body, prefixes)
+
+    inputs = {
+        "exact": [entry["name"] for entry in sample],
+        "abbreviated": [entry["aliases"][0].upper() for entry in sample],
+        "misspelled": [" ".join(misspell(word, rng) if len(word) > 5 else word
+                                for word in entry["name"].split()) for entry in sample],
+        "near_landmark": [f"near the bus stop, {entry['aliases'][0]}, opp temple" for entry in sample],
+    }
+    results["resolve"] = {}
+    for name, texts in inputs.items():
+        summary = time_calls(gazetteer.resolve, texts)
+        resolved = sum(1 for text, entry in zip(texts, sample)
+                       if (match := gazetteer.resolve(text)) is not None and match.name == entry["name"])
+        results["resolve"][name] = {**summary, "resolved_to_same_name": round(resolved / len(texts), 3)}
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Notification dispatch benchmark against a local SMTP sink.
+
+Queues --messages submission receipts the way the complaint listener does and
+reports what that costs the saving thread, then how long the SMTP lane takes
+to deliver them with one message per session (--batch-size 1) versus
+batched sessions, with --workers threads per provider.
+
+    python benchmarks/bench_notifications.py --messages 5000 --batch-size 20 --output notify.json
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, run_metadata, summarize, write_results
+)
+from benchmarks.standins import SMTPSink  # noqa: E402  (also puts backend/ on sys.path)
+
+from notifications import NotificationDispatcher, SMTPProvider  # noqa: E402
+
+
+def deliver(sink: SMTPSink, messages: int, workers: int, batch_size: int) -> dict:
+    provider = SMTPProvider("127.0.0.1", sink.port, starttls=False, rate_per_minute=0)
+    dispatcher = NotificationDispatcher([provider], workers=workers, queue_size=messages,
+                                        batch_size=batch_size, batch_wait_s=0.05)
+    received = len(sink.messages)
+    connections = sink.connections
+    enqueue_timings = []
+    for number in range(messages):
+        row = {"id": f"{number:08x}-bench", "citizen_name": "Bench Citizen", "issue_type": "road_traffic",
+               "location": "Ward 4", "email": f"citizen{number}@example.com", "mobile_number": "9998887777"}
+        start = time.perf_counter()
+        dispatcher.complaint_saved(row)
+        enqueue_timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    dispatcher.start()
+    while len(sink.messages) - received < messages:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    dispatcher.stop()
+    return {
+        "enqueue": summarize(enqueue_timings),
+        "delivery_seconds": round(elapsed, 3),
+        "messages_per_s": round(messages / elapsed, 1),
+        "smtp_sessions": sink.connections - connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notification queueing cost and SMTP batching throughput")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    results = run_metadata("notifications", vars(args))
+    sink = SMTPSink().start()
+    try:
+        results["unbatched"] = deliver(sink, args.messages, args.workers, 1)
+        results["batched"] = deliver(sink, args.messages, args.workers, args.batch_size)
+    finally:
+        sink.stop()
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
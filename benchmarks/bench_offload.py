@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Offload pool benchmark: event loop responsiveness under CPU-bound work.
+
+Runs --jobs CPU-bound jobs from --concurrency coroutines while a probe
+coroutine measures event loop lag (how late a 1ms sleep wakes up), which is
+what every /chat request waiting on that loop would see. Three modes:
+
+  - inline: the job runs on the event loop, as a handler calling it directly would;
+  - thread: on an offload thread queue (zlib releases the GIL);
+  - process: on an offload process queue (a pure-Python loop that holds the GIL).
+
+Reports loop lag percentiles, job latency and the queue's metrics. A last
+phase submits low-priority jobs ahead of high-priority ones on a single
+worker and reports how long the high-priority ones waited.
+
+    python benchmarks/bench_offload.py --jobs 200 --concurrency 16 --output offload.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import zlib
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, run_metadata, summarize, write_results
+)
+import benchmarks.standins  # noqa: E402,F401  (puts backend/ on sys.path)
+
+from offload import PROCESS, THREAD, OffloadPool  # noqa: E402
+
+
+def compress(data: bytes) -> int:
+    return len(zlib.compress(data, 9))
+
+
+def score(rounds: int) -> int:
+    """Pure-Python work standing in for classification or similarity scoring"""
+    total = 0
+    for i in range(rounds):
+        total = (total * 31 + i) % 1000003
+    return total
+
+
+async def measure(run_job, jobs: int, concurrency: int):
+    lags = []
+    job_timings = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    remaining = iter(range(jobs))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            await run_job()
+            job_timings.append(time.perf_counter() - start)
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+    return {
+        "loop_lag": summarize(lags),
+        "job": summarize(job_timings),
+        "jobs_per_s": round(jobs / elapsed, 1),
+    }
+
+
+async def priorities(pool: OffloadPool, jobs: int, payload: bytes):
+    """Low-priority jobs queued first on one worker; how long do high-priority ones wait?"""
+    submitted = {}
+    waits = {"high": [], "low": []}
+
+    def timed(name, index):
+        waits[name].append(time.perf_counter() - submitted[name, index])
+        return compress(payload)
+
+    futures = []
+    for index in range(jobs):
+        submitted["low", index] = time.perf_counter()
+        futures.append(pool.submit("low", timed, "low", index))
+    for index in range(jobs // 4):
+        submitted["high", index] = time.perf_counter()
+        futures.append(pool.submit("high", timed, "high", index))
+    await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+    return {name: summarize(values) for name, values in waits.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event loop lag with CPU-bound work inline or offloaded")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--payload-kb", type=int, default=512, help="Bytes compressed per thread job")
+    parser.add_argument("--rounds", type=int, default=300000, help="Loop iterations per process job")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Half random, half repeated: compresses like a JSON archive page, not like noise
+    payload = bytes(rng.getrandbits(8) for _ in range(args.payload_kb * 512)) + b"complaint " * (args.payload_kb * 52)
+    results = run_metadata("offload", vars(args))
+
+    pool = OffloadPool(thread_workers=args.workers, process_workers=args.workers)
+    pool.queue("cpu_thread", kind=THREAD, concurrency=args.workers)
+    pool.queue("cpu_process", kind=PROCESS, concurrency=args.workers)
+    pool.start()
+    single = OffloadPool(thread_workers=1, process_workers=1)
+    single.queue("low", kind=THREAD, priority=2)
+    single.queue("high", kind=THREAD, priority=0)
+    try:
+        async def inline_compress():
+            compress(payload)
+
+        async def inline_score():
+            score(args.rounds)
+
+        results["inline_compress"] = asyncio.run(measure(inline_compress, args.jobs, args.concurrency))
+        results["thread_compress"] = asyncio.run(measure(
+            lambda: pool.run("cpu_thread", compress, payload), args.jobs, args.concurrency))
+        results["inline_score"] = asyncio.run(measure(inline_score, args.jobs, args.concurrency))
+        # The first process jobs pay for spawning the workers
+        asyncio.run(measure(lambda: pool.run("cpu_process", score, 1), args.workers, args.workers))
+        results["process_score"] = asyncio.run(measure(
+            lambda: pool.run("cpu_process", score, args.rounds), args.jobs, args.concurrency))
+        results["priority_wait"] = asyncio.run(priorities(single, args.jobs, payload))
+        results["queues"] = {**pool.stats()["queues"], **single.stats()["queues"]}
+    finally:
+        pool.stop()
+        single.stop()
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
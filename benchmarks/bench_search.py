@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Full-text search benchmark for the in-process inverted index.
+
+Indexes --docs synthetic complaint descriptions (the bench_app templates plus
+random extra words, so term frequencies range from very common to rare), then
+reports index build time, memory, and query latency for common, rare and
+multi-term queries, with an issue_type filter and at a deep page. A linear scan
+over the same descriptions is timed on the rare query for comparison.
+
+    python benchmarks/bench_search.py --docs 2000000 --output search.json
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, rss_mb, run_metadata, summarize, write_results
+)
+from benchmarks.bench_app import DESCRIPTIONS  # noqa: E402
+import benchmarks.standins  # noqa: E402,F401  (puts backend/ on sys.path)
+
+from search_index import InvertedIndex  # noqa: E402
+
+ISSUE_TYPES = ["road_traffic", "electricity_power", "water_plumbing", "garbage_waste"]
+EXTRA_WORDS = (
+    "transformer sparking cable drain manhole flooding smell stray dogs noise construction debris "
+    "signal junction footpath encroachment tree fallen leak sewage mosquito park bench broken"
+).split()
+
+QUERIES = {
+    "common_term": {"q": "street"},
+    "rare_term": {"q": "transformer"},
+    "multi_term": {"q": "transformer sparking cable"},
+    "filtered": {"q": "pothole traffic", "issue_type": "road_traffic"},
+    "deep_page": {"q": "garbage", "offset": 1000},
+}
+
+
+def make_description(rng: random.Random) -> str:
+    extra = rng.sample(EXTRA_WORDS, rng.randint(0, 3))
+    # Skew: the first extra words are picked far more often than the last
+    if extra and rng.random() < 0.9:
+        extra = [word for word in extra if EXTRA_WORDS.index(word) < len(EXTRA_WORDS) // 2]
+    return " ".join([rng.choice(DESCRIPTIONS)] + extra)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inverted index build and query latency")
+    parser.add_argument("--docs", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = run_metadata("search", vars(args))
+    rss_before = rss_mb()
+
+    index = InvertedIndex()
+    descriptions = []
+    start = time.perf_counter()
+    for number in range(args.docs):
+        description = make_description(rng)
+        descriptions.append(description)
+        index.add({"id": f"c{number}", "issue_type": ISSUE_TYPES[number % 4], "complaint_description": description})
+    build_s = time.perf_counter() - start
+    results["build"] = {
+        "docs": len(index),
+        "seconds": round(build_s, 2),
+        "docs_per_s": round(args.docs / build_s, 1),
+        "rss_mb_including_corpus": round(rss_mb() - rss_before, 2),
+    }
+
+    results["query"] = {}
+    for name, params in QUERIES.items():
+        timings = []
+        total = 0
+        for _ in range(args.repeat):
+            query_start = time.perf_counter()
+            _, total = index.search(params["q"], params.get("issue_type"), args.limit, params.get("offset", 0))
+            timings.append(time.perf_counter() - query_start)
+        results["query"][name] = {**summarize(timings), "matches": total}
+
+    scan_timings = []
+    for _ in range(min(args.repeat, 5)):
+        scan_start = time.perf_counter()
+        matches = sum(1 for description in descriptions if "transformer" in description.lower())
+        scan_timings.append(time.perf_counter() - scan_start)
+    results["linear_scan_rare_term"] = {**summarize(scan_timings), "matches": matches}
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Serialization and compression benchmark on large complaint listings.
+
+Compares the stdlib-backed JSONResponse with the app's orjson response class,
+measures gzip/brotli cost and ratio, and times a full in-process request for a
+listing route with and without the response layer.
+
+    python benchmarks/bench_serialization.py --rows 10000 --output serialization.json
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import random
+import sys
+import time
+import uuid
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import compare_results, print_comparison, run_metadata, summarize, write_results  # noqa: E402
+from benchmarks.bench_app import DESCRIPTIONS, LOCATIONS  # noqa: E402
+import benchmarks.standins  # noqa: E402,F401  (puts backend/ on sys.path)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from responses import BROTLI_QUALITY, GZIP_LEVEL, CompressionMiddleware, FastJSONResponse, brotli  # noqa: E402
+
+ISSUE_TYPES = ["road_traffic", "electricity_power", "water_plumbing", "garbage_waste"]
+
+
+def make_listing(rows: int, seed: int):
+    rng = random.Random(seed)
+    return {
+        "complaints": [
+            {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "citizen_name": f"Citizen {i}",
+                "location": rng.choice(LOCATIONS),
+                "issue_type": rng.choice(ISSUE_TYPES),
+                "complaint_description": rng.choice(DESCRIPTIONS),
+                "mobile_number": f"98{i:08d}",
+                "email": f"citizen{i}@example.com",
+                "created_at": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00+00:00",
+            }
+            for i in range(rows)
+        ],
+        "count": rows,
+    }
+
+
+def time_it(func, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings), result
+
+
+def build_app(listing, optimized: bool, direct: bool = False) -> FastAPI:
+    if optimized:
+        app = FastAPI(default_response_class=FastJSONResponse)
+        app.add_middleware(CompressionMiddleware)
+    else:
+        app = FastAPI()
+
+    @app.get("/complaints")
+    async def list_complaints():
+        # Returning the response object skips FastAPI's jsonable_encoder pass
+        return FastJSONResponse(listing) if direct else listing
+
+    return app
+
+
+async def time_requests(app, repeat: int, accept_encoding: str):
+    import httpx
+
+    timings = []
+    size = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench.local") as client:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            async with client.stream("GET", "/complaints", headers={"Accept-Encoding": accept_encoding}) as response:
+                size = sum([len(chunk) async for chunk in response.aiter_raw()])
+            timings.append(time.perf_counter() - start)
+    return {**summarize(timings), "wire_bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization and compression benchmark")
+    parser.add_argument("--rows", type=int, default=10000, help="Complaints in the listing")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    listing = make_listing(args.rows, args.seed)
+    results = run_metadata("serialization", vars(args))
+
+    stdlib_stats, stdlib_body = time_it(lambda: JSONResponse(listing).body, args.repeat)
+    orjson_stats, orjson_body = time_it(lambda: FastJSONResponse(listing).body, args.repeat)
+    results["encode"] = {
+        "stdlib_json": {**stdlib_stats, "bytes": len(stdlib_body)},
+        "orjson": {**orjson_stats, "bytes": len(orjson_body)},
+    }
+
+    gzip_stats, gzipped = time_it(lambda: gzip.compress(orjson_body, compresslevel=GZIP_LEVEL), args.repeat)
+    results["compress"] = {"gzip": {**gzip_stats, "bytes": len(gzipped), "level": GZIP_LEVEL}}
+    if brotli is not None:
+        br_stats, compressed = time_it(lambda: brotli.compress(orjson_body, quality=BROTLI_QUALITY), args.repeat)
+        results["compress"]["br"] = {**br_stats, "bytes": len(compressed), "quality": BROTLI_QUALITY}
+
+    plain_app = build_app(listing, optimized=False)
+    fast_app = build_app(listing, optimized=True)
+    direct_app = build_app(listing, optimized=True, direct=True)
+    results["request"] = {
+        "default_identity": asyncio.run(time_requests(plain_app, args.repeat, "identity")),
+        "optimized_identity": asyncio.run(time_requests(fast_app, args.repeat, "identity")),
+        "optimized_gzip": asyncio.run(time_requests(fast_app, args.repeat, "gzip")),
+        "direct_identity": asyncio.run(time_requests(direct_app, args.repeat, "identity")),
+        "direct_gzip": asyncio.run(time_requests(direct_app, args.repeat, "gzip")),
+    }
+    if brotli is not None:
+        results["request"]["direct_br"] = asyncio.run(time_requests(direct_app, args.repeat, "br"))
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Session store benchmark: abandoned sessions, resets and the expiry sweep.
+
+Creates --sessions chat sessions with a typical transcript, resets a share of
+them the way the frontend's "New Complaint" button does, leaves the rest
+abandoned, then sweeps them. Reports per-turn and per-reset latency, the
+sweep's duration, the bytes it reports reclaimed against the process's RSS
+before and after, and how long a sweep takes when nothing is due.
+
+    python benchmarks/bench_sessions.py --sessions 200000 --output sessions.json
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, rss_mb, run_metadata, summarize, write_results
+)
+import benchmarks.standins  # noqa: E402,F401  (puts backend/ on sys.path)
+
+import database  # noqa: E402
+from sessions import SessionStore  # noqa: E402
+
+TURNS = ["water/plumbing issues", "Water is leaking from the main pipe and the road is flooded",
+         "Ward 12, Sector 4", "Asha Rao", "9998887777", "asha@example.com"]
+REPLY = "Information received. Processing your request..."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session reset and expiry sweep")
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--reset-share", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = run_metadata("sessions", vars(args))
+    store = SessionStore(idle_ttl_s=3600)
+    database.session_store = store
+
+    gc.collect()
+    rss_empty = rss_mb()
+    turn_timings = []
+    for number in range(args.sessions):
+        for text in TURNS[:rng.randint(1, len(TURNS))]:
+            start = time.perf_counter()
+            database.record_chat_turn(f"session-{number}", text, REPLY)
+            turn_timings.append(time.perf_counter() - start)
+    results["chat_turn"] = summarize(turn_timings)
+    del turn_timings
+    gc.collect()
+    rss_full = rss_mb()
+
+    reset_timings = []
+    for number in rng.sample(range(args.sessions), int(args.sessions * args.reset_share)):
+        start = time.perf_counter()
+        database.reset_session(f"session-{number}")
+        reset_timings.append(time.perf_counter() - start)
+    results["reset"] = summarize(reset_timings)
+    del reset_timings
+
+    start = time.perf_counter()
+    nothing_due = store.expire(now=time.time())
+    idle_sweep = time.perf_counter() - start
+    start = time.perf_counter()
+    expired, freed = store.expire(now=time.time() + 3601)
+    sweep = time.perf_counter() - start
+    gc.collect()
+    rss_swept = rss_mb()
+
+    stats = store.stats()
+    results["sweep"] = {
+        "expired": expired,
+        "seconds": round(sweep, 3),
+        "nothing_due_ms": round(idle_sweep * 1000, 3),
+        "nothing_due_expired": nothing_due[0],
+    }
+    results["memory"] = {
+        "rss_empty_mb": rss_empty,
+        "rss_with_sessions_mb": rss_full,
+        "rss_after_sweep_mb": rss_swept,
+        "reclaimed_mb_reported": round(stats["reclaimed_bytes"] / 1e6, 1),
+        "bytes_per_session": round(stats["reclaimed_bytes"] / args.sessions, 1),
+        "sweep_reclaimed_mb": round(freed / 1e6, 1),
+    }
+    results["sessions_left"] = len(store)
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
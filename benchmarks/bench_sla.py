@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+SLA timer wheel benchmark: millions of pending deadlines.
+
+Schedules --timers deadlines spread over the SLA windows (hours to a week,
+plus a tail of older reopened complaints), cancels a share of them the way
+acknowledgements and resolutions would, then advances the wheel one tick at a
+time through --simulate-hours of deadlines. Reports schedule/cancel latency,
+per-tick advance cost, memory per pending timer, and how long rebuilding the
+scheduler takes from --rebuild-rows stored complaints (LocalSupabase).
+
+    python benchmarks/bench_sla.py --timers 2000000 --output sla.json
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, rss_mb, run_metadata, summarize, write_results
+)
+import benchmarks.standins  # noqa: E402,F401  (puts backend/ on sys.path)
+
+from local_supabase import LocalSupabase  # noqa: E402
+from sla import EscalationScheduler, TimerWheel  # noqa: E402
+
+ISSUE_TYPES = ["road_traffic", "electricity_power", "water_plumbing", "garbage_waste"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SLA timer wheel schedule, cancel, advance and rebuild")
+    parser.add_argument("--timers", type=int, default=1000000)
+    parser.add_argument("--cancel-share", type=float, default=0.5)
+    parser.add_argument("--simulate-hours", type=float, default=6)
+    parser.add_argument("--rebuild-rows", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = run_metadata("sla", vars(args))
+    now = time.time()
+    wheel = TimerWheel(tick_s=1.0, now=now)
+    keys = [f"complaint-{number}" for number in range(args.timers)]
+    deadlines = [now + rng.uniform(60, 7 * 86400) if rng.random() < 0.95 else now + rng.uniform(7 * 86400, 90 * 86400)
+                 for _ in range(args.timers)]
+
+    rss_before = rss_mb()
+    schedule_timings = []
+    for key, deadline in zip(keys, deadlines):
+        start = time.perf_counter()
+        wheel.schedule(key, deadline)
+        schedule_timings.append(time.perf_counter() - start)
+    results["schedule"] = summarize(schedule_timings)
+    results["schedule"]["mb_per_million_timers"] = round((rss_mb() - rss_before) / args.timers * 1e6, 1)
+    del schedule_timings
+
+    cancel_timings = []
+    for key in rng.sample(keys, int(args.timers * args.cancel_share)):
+        start = time.perf_counter()
+        wheel.cancel(key)
+        cancel_timings.append(time.perf_counter() - start)
+    results["cancel"] = summarize(cancel_timings)
+    results["cancel"]["pending"] = len(wheel)
+    del cancel_timings
+
+    tick_timings = []
+    fired = 0
+    late = 0
+    for second in range(1, int(args.simulate_hours * 3600) + 1):
+        start = time.perf_counter()
+        keys_fired = wheel.advance(now + second)
+        tick_timings.append(time.perf_counter() - start)
+        fired += len(keys_fired)
+        # Late: an earlier advance had already reached the deadline's tick
+        for key in keys_fired:
+            if math.ceil(deadlines[int(key[10:])]) <= int(now + second - 1):
+                late += 1
+    results["advance_per_tick"] = summarize(tick_timings)
+    results["advance_per_tick"].update({"fired": fired, "fired_late": late})
+
+    # Restart: rebuild the pending deadlines from stored complaints
+    local = LocalSupabase()
+    statuses = ["open", "open", "acknowledged", "resolved"]
+    rows = []
+    for number in range(args.rebuild_rows):
+        created = now - rng.uniform(0, 14 * 86400)
+        rows.append({
+            "citizen_name": "Bench", "location": "Ward 1", "complaint_description": "Bench complaint",
+            "mobile_number": "9998887777", "email": "bench@example.com",
+            "issue_type": rng.choice(ISSUE_TYPES), "status": rng.choice(statuses),
+            "created_at": datetime.fromtimestamp(created, timezone.utc).isoformat(),
+        })
+    local.store.insert("complaints", rows)
+    scheduler = EscalationScheduler()
+    start = time.perf_counter()
+    pending = scheduler.build(local)
+    elapsed = time.perf_counter() - start
+    # The same rows already fetched, to separate scheduling from the stand-in store's paging
+    stored = local.table("complaints").select("id", "issue_type", "status", "created_at").execute().data
+    start = time.perf_counter()
+    EscalationScheduler().track_many(stored)
+    scheduling = time.perf_counter() - start
+    results["rebuild"] = {
+        "rows": args.rebuild_rows,
+        "pending": pending,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(args.rebuild_rows / elapsed, 1),
+        "scheduling_rows_per_s": round(len(stored) / scheduling, 1),
+        "overdue_at_start": len(scheduler.due(now)),
+    }
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Complaint status polling benchmark.
+
+Boots the app in-process (httpx ASGI transport) against the local database
+stand-in with --complaints stored complaints, then has --pollers concurrent
+clients poll GET /complaints/{id}/status --polls times each, the way a
+citizen's open page refreshes. Three runs: with no cache (every poll reads
+the database), with the read-through cache, and with the cache plus
+If-None-Match so unchanged statuses come back as bodiless 304s. Reports
+per-poll latency, polls per second and bytes sent.
+
+    python benchmarks/bench_status.py --complaints 5000 --pollers 50 --output status.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, run_metadata, summarize, write_results
+)
+from benchmarks.standins import install_standins  # noqa: E402
+
+
+async def poll(args, ids, conditional: bool) -> dict:
+    import httpx
+    from main import app
+
+    rng = random.Random(args.seed)
+    timings = []
+    sent_bytes = [0]
+    statuses = {200: 0, 304: 0}
+
+    async def poller(client):
+        complaint_id = rng.choice(ids)
+        etag = None
+        for _ in range(args.polls):
+            headers = {"If-None-Match": etag} if conditional and etag else {}
+            start = time.perf_counter()
+            response = await client.get(f"/complaints/{complaint_id}/status", headers=headers)
+            timings.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            sent_bytes[0] += len(response.content)
+            etag = response.headers.get("etag")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench.local") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(poller(client) for _ in range(args.pollers)))
+        elapsed = time.perf_counter() - start
+    return {
+        **summarize(timings),
+        "polls_per_s": round(len(timings) / elapsed, 1),
+        "body_bytes": sent_bytes[0],
+        "responses": {str(code): count for code, count in statuses.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Status polling with and without the cache and ETags")
+    parser.add_argument("--complaints", type=int, default=2000)
+    parser.add_argument("--pollers", type=int, default=50)
+    parser.add_argument("--polls", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    local, _ = install_standins()
+    rows = [{
+        "citizen_name": "Bench", "location": "Ward 1", "issue_type": "road_traffic", "status": "open",
+        "complaint_description": "Pothole", "mobile_number": "9998887777", "email": "bench@example.com",
+    } for _ in range(args.complaints)]
+    ids = [row["id"] for row in local.store.insert("complaints", rows)]
+
+    import sla
+    results = run_metadata("status", vars(args))
+    sla.status_cache = sla.StatusCache(ttl_s=0)
+    results["uncached"] = asyncio.run(poll(args, ids, conditional=False))
+    sla.status_cache = sla.StatusCache()
+    results["cached"] = asyncio.run(poll(args, ids, conditional=False))
+    sla.status_cache = sla.StatusCache()
+    results["cached_304"] = asyncio.run(poll(args, ids, conditional=True))
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
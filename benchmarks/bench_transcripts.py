@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Transcript storage benchmark: bytes and time per conversation.
+
+Generates conversations shaped like the frontend's flow (a category, then the
+description, location, name, mobile number and email, each answered by the
+/chat reply, plus a share of free-text follow-ups) and reports, extrapolated
+to 1M conversations:
+
+  - payload bytes as raw NDJSON, deflated, deflated with the preset
+    dictionary, and as the stored base64 column;
+  - measured database growth for --store-conversations conversations stored
+    one row per message versus one packed row per complaint (LocalSupabase,
+    SQLite on disk);
+  - pack and streaming-read time per conversation.
+
+    python benchmarks/bench_transcripts.py --conversations 20000 --output transcripts.json
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+import zlib
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, run_metadata, summarize, write_results
+)
+import benchmarks.standins  # noqa: E402,F401  (puts backend/ on sys.path)
+
+import orjson  # noqa: E402
+
+from local_supabase import LocalSupabase  # noqa: E402
+from transcripts import TABLE, iter_transcript, message, pack  # noqa: E402
+
+CATEGORIES = ["road/traffic issues", "electricity/power problems", "water/plumbing issues", "garbage/waste collection"]
+PROBLEMS = [
+    "There is a large pothole on {street} causing accidents every evening",
+    "The street light near {street} has not been working for {days} days",
+    "Water is leaking from the main pipe on {street} and the road is flooded",
+    "Garbage has not been collected on {street} for {days} days and it smells",
+    "Frequent power cuts in our area near {street}, sometimes for {days} hours",
+]
+STREETS = ["MG Road", "Station Road", "Nehru Nagar 3rd Cross", "Sector 14 Market", "Lake View Colony"]
+NAMES = ["Asha Rao", "Ravi Kumar", "Meena Iyer", "John Doe", "Farhan Ali", "Priya Sharma"]
+FOLLOW_UPS = ["Is there any update?", "It got worse after the rain yesterday.", "Please send someone soon.",
+              "Thank you"]
+REPLY = "Information received. Processing your request..."
+
+
+def conversation(rng, start):
+    street = rng.choice(STREETS)
+    turns = [
+        rng.choice(CATEGORIES),
+        rng.choice(PROBLEMS).format(street=street, days=rng.randint(2, 20)),
+        f"Ward {rng.randint(1, 200)}, {street}",
+        rng.choice(NAMES),
+        f"9{rng.randint(100000000, 999999999)}",
+        f"user{rng.randint(1, 10 ** 6)}@{rng.choice(['gmail.com', 'yahoo.com', 'example.org'])}",
+    ]
+    turns += rng.sample(FOLLOW_UPS, rng.randint(0, 2))
+    messages = []
+    at = start
+    for text in turns:
+        at += rng.uniform(3, 40)
+        messages.append(message("user", text, at))
+        messages.append(message("assistant", REPLY, at + 0.2))
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcript storage cost and pack/read time")
+    parser.add_argument("--conversations", type=int, default=20000)
+    parser.add_argument("--store-conversations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = run_metadata("transcripts", vars(args))
+    conversations = [conversation(rng, 1.7e9 + n * 60) for n in range(args.conversations)]
+    per_million = 1e6 / args.conversations
+
+    sizes = {"raw_ndjson": 0, "deflate": 0, "deflate_dictionary": 0, "stored_base64": 0}
+    pack_timings = []
+    read_timings = []
+    packed_rows = []
+    for messages in conversations:
+        raw = b"".join(orjson.dumps(entry) + b"\n" for entry in messages)
+        sizes["raw_ndjson"] += len(raw)
+        plain = zlib.compressobj(9, zlib.DEFLATED, -15)
+        sizes["deflate"] += len(plain.compress(raw) + plain.flush())
+        start = time.perf_counter()
+        packed = pack(messages)
+        pack_timings.append(time.perf_counter() - start)
+        sizes["stored_base64"] += len(packed["transcript"])
+        sizes["deflate_dictionary"] += len(packed["transcript"]) * 3 // 4
+        start = time.perf_counter()
+        for _ in iter_transcript(packed):
+            pass
+        read_timings.append(time.perf_counter() - start)
+        packed_rows.append(packed)
+    results["payload_mb_per_million"] = {name: round(total * per_million / 1e6, 1) for name, total in sizes.items()}
+    results["messages_per_conversation"] = round(sum(map(len, conversations)) / args.conversations, 1)
+    results["pack"] = summarize(pack_timings)
+    results["stream_read"] = summarize(read_timings)
+
+    directory = tempfile.mkdtemp(prefix="bench-transcripts-")
+    try:
+        stored = args.store_conversations
+        rows_db = os.path.join(directory, "rows.db")
+        local = LocalSupabase(rows_db)
+        start = time.perf_counter()
+        for messages in conversations[:stored]:
+            complaint_id = str(uuid.uuid4())
+            local.table("complaint_messages").insert(
+                [{"complaint_id": complaint_id, **entry} for entry in messages]).execute()
+        rows_seconds = time.perf_counter() - start
+        local.store._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        blob_db = os.path.join(directory, "blob.db")
+        local = LocalSupabase(blob_db)
+        start = time.perf_counter()
+        for packed in packed_rows[:stored]:
+            local.table(TABLE).insert({"complaint_id": str(uuid.uuid4()), **packed}).execute()
+        blob_seconds = time.perf_counter() - start
+        local.store._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        scale = 1e6 / stored
+        results["database_mb_per_million"] = {
+            "row_per_message": round(os.path.getsize(rows_db) * scale / 1e6, 1),
+            "packed_row": round(os.path.getsize(blob_db) * scale / 1e6, 1),
+        }
+        results["write_ms_per_conversation"] = {
+            "row_per_message": round(rows_seconds / stored * 1000, 3),
+            "packed_row": round(blob_seconds / stored * 1000, 3),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Triage queue benchmark: scoring updates and claims under contention.
+
+Queues --complaints synthetic complaints (skewed over a few thousand places so
+large duplicate clusters form), then has --operators concurrent tasks on one
+event loop (as the /triage endpoints run) read the top of the queue and claim
+from it until it is empty, while --writers threads keep adding complaints (as
+the save listeners do). Reports insert and next()/claim() latency, how many
+claims lost a race, and checks that no complaint was claimed twice.
+Re-sorting every score on each read is timed for comparison.
+
+    python benchmarks/bench_triage.py --complaints 200000 --operators 64 --output triage.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, run_metadata, summarize, write_results
+)
+from benchmarks.bench_app import DESCRIPTIONS  # noqa: E402
+import benchmarks.standins  # noqa: E402,F401  (puts backend/ on sys.path)
+
+from triage import ClaimConflict, TriageQueue  # noqa: E402
+
+ISSUE_TYPES = ["road_traffic", "electricity_power", "water_plumbing", "garbage_waste"]
+URGENT = ["Transformer sparking near the school.", "Sewage flooding the street.", "Live wire after an accident."]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Triage queue scoring and claim contention")
+    parser.add_argument("--complaints", type=int, default=100000)
+    parser.add_argument("--places", type=int, default=5000)
+    parser.add_argument("--operators", type=int, default=32)
+    parser.add_argument("--writers", type=int, default=4, help="Threads adding complaints during the claims")
+    parser.add_argument("--peek", type=int, default=5, help="Candidates each operator reads per attempt")
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = run_metadata("triage", vars(args))
+    now = time.time()
+    queue = TriageQueue(claim_ttl_s=3600)
+
+    add_timings = []
+    for number in range(args.complaints):
+        row = {
+            "id": f"c{number}",
+            "issue_type": rng.choice(ISSUE_TYPES),
+            "complaint_description": rng.choice(URGENT) if rng.random() < 0.05 else rng.choice(DESCRIPTIONS),
+            # Zipf-like: a few places get most of the reports
+            "location_id": f"place-{int(args.places ** rng.random())}",
+            "created_at": now - rng.random() * 30 * 86400,
+        }
+        start = time.perf_counter()
+        queue.add(row)
+        add_timings.append(time.perf_counter() - start)
+    results["add"] = summarize(add_timings)
+    results["add"]["largest_cluster"] = max(queue._sizes.values())
+
+    next_timings = []
+    for _ in range(200):
+        start = time.perf_counter()
+        queue.next(args.peek)
+        next_timings.append(time.perf_counter() - start)
+    results["next"] = summarize(next_timings)
+
+    resort_timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        sorted((queue._key(complaint_id) for complaint_id in queue._items), reverse=True)[:args.peek]
+        resort_timings.append(time.perf_counter() - start)
+    results["resort_everything_for_comparison"] = summarize(resort_timings)
+
+    # Operators as concurrent tasks on one event loop, like the /triage endpoints, while
+    # writer threads keep adding complaints, like the save_complaint listeners
+    claims = Counter()
+    claim_timings = []
+    conflicts = [0]
+    stop = threading.Event()
+
+    def writer(offset: int):
+        number = args.complaints + offset
+        while not stop.is_set():
+            queue.add({
+                "id": f"c{number}", "issue_type": rng.choice(ISSUE_TYPES), "complaint_description": URGENT[0],
+                "location_id": f"place-{number % args.places}", "created_at": time.time(),
+            })
+            number += args.writers
+            time.sleep(0.0005)
+
+    async def operator(name: str):
+        while True:
+            candidates = queue.next(args.peek)
+            if not candidates:
+                return
+            for candidate in candidates:
+                start = time.perf_counter()
+                try:
+                    claimed = queue.claim(candidate["id"], name)
+                except ClaimConflict:
+                    claimed = None
+                    conflicts[0] += 1
+                claim_timings.append(time.perf_counter() - start)
+                if claimed is not None:
+                    claims[candidate["id"]] += 1
+                    break
+            await asyncio.sleep(0)
+
+    async def operators():
+        await asyncio.gather(*(operator(f"op{i}") for i in range(args.operators)))
+        stop.set()
+
+    writers = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    start = time.perf_counter()
+    for thread in writers:
+        thread.start()
+    asyncio.run(operators())
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    results["claim"] = {
+        **summarize(claim_timings),
+        "claimed": len(claims),
+        "double_claims": sum(1 for count in claims.values() if count > 1),
+        "lost_races": conflicts[0],
+        "claims_per_s": round(len(claims) / elapsed, 1),
+    }
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Photo upload benchmark: memory per upload and throughput.
+
+Boots the app in-process (httpx ASGI transport, no sockets) against the local
+database stand-in, creates a complaint, then uploads synthetic JPEGs of
+growing size in --chunk-mb PATCH requests whose bodies are generated on the
+fly. For each size it reports upload throughput, the peak Python heap
+allocated during the upload (tracemalloc) and process RSS growth, which should
+stay flat as the files grow, and how long background processing took.
+
+    python benchmarks/bench_uploads.py --sizes-mb 4 64 512 --output uploads.json
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    compare_results, peak_rss_mb, print_comparison, rss_mb, run_metadata, write_results
+)
+from benchmarks.standins import install_standins  # noqa: E402
+
+BLOCK = 64 * 1024
+MB = 1024 * 1024
+JPEG_HEADER = b"\xff\xd8\xff\xe1\x00\x10Exif\x00\x00GPS-12.9\xff\xda\x00\x08\x01\x01\x00\x00\x3f\x00"
+
+
+def jpeg_blocks(size: int, seed: int, start: int, end: int):
+    """Bytes [start, end) of a synthetic `size`-byte JPEG, generated 64KB at a time"""
+    filler = bytes((seed + i) % 251 for i in range(BLOCK))
+    position = start
+    while position < end:
+        if position < len(JPEG_HEADER):
+            block = JPEG_HEADER[position:]
+        elif position >= size - 2:
+            block = b"\xff\xd9"[position - (size - 2):]
+        else:
+            block = filler[:min(BLOCK, size - 2 - position)]
+        block = block[:end - position]
+        position += len(block)
+        yield block
+
+
+async def upload(client, complaint_id: str, size: int, chunk: int, seed: int) -> dict:
+    created = (await client.post(f"/complaints/{complaint_id}/attachments", json={
+        "filename": f"photo-{seed}.jpg", "content_type": "image/jpeg", "size": size,
+    })).json()
+    url = f"/attachments/uploads/{created['upload_id']}"
+    offset = 0
+    while offset < size:
+        end = min(offset + chunk, size)
+
+        async def body(start=offset, stop=end):
+            for block in jpeg_blocks(size, seed, start, stop):
+                yield block
+
+        response = await client.patch(url, content=body(), headers={"Upload-Offset": str(offset)})
+        response.raise_for_status()
+        offset = response.json()["offset"]
+    return response.json()["attachment"]
+
+
+async def run(args, results):
+    import httpx
+    import attachments
+    from database import get_supabase_client
+    from main import app
+
+    attachments.ATTACHMENT_MAX_BYTES = max(args.sizes_mb) * MB
+    attachments.ATTACHMENT_CHUNK_MAX_BYTES = args.chunk_mb * MB
+    attachments.attachment_store = attachments.AttachmentStore(tempfile.mkdtemp(prefix="attachments-bench-"))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench.local", timeout=None) as client:
+        complaint = {
+            "citizen_name": "Bench User", "location": "MG Road", "issue_type": "road/traffic issues",
+            "complaint_description": "Pothole photos for the upload benchmark.",
+            "mobile_number": "9800000000", "email": "bench.user@example.com",
+        }
+        await client.post("/submit-complaint", json=complaint)
+        complaint_id = get_supabase_client().table("complaints").select("id").execute().data[0]["id"]
+
+        results["uploads"] = {}
+        for seed, size_mb in enumerate(args.sizes_mb):
+            size = size_mb * MB
+            rss_before = rss_mb()
+            tracemalloc.start()
+            start = time.perf_counter()
+            attachment = await upload(client, complaint_id, size, args.chunk_mb * MB, seed)
+            upload_s = time.perf_counter() - start
+            _, heap_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            while True:
+                listed = (await client.get(f"/complaints/{complaint_id}/attachments",
+                                           headers={"X-Admin-Token": "bench"})).json()["attachments"]
+                status = next(row["status"] for row in listed if row["id"] == attachment["id"])
+                if status != "processing":
+                    break
+                await asyncio.sleep(0.05)
+            results["uploads"][f"{size_mb}mb"] = {
+                "upload_s": round(upload_s, 3),
+                "mb_per_s": round(size_mb / upload_s, 1),
+                "heap_peak_mb": round(heap_peak / MB, 2),
+                "rss_growth_mb": round(rss_mb() - rss_before, 2),
+                "processed_s": round(time.perf_counter() - start - upload_s, 3),
+                "status": status,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming photo upload memory and throughput")
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[4, 32, 256])
+    parser.add_argument("--chunk-mb", type=int, default=8)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    import main as app_module
+    install_standins()
+    app_module.ADMIN_TOKEN = "bench"
+
+    results = run_metadata("uploads", vars(args))
+    asyncio.run(run(args, results))
+    results["peak_rss_mb"] = peak_rss_mb()
+    from offload import offload_pool
+    offload_pool.stop()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
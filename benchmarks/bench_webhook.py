@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Webhook delivery benchmark against a local receiver.
+
+Sends the same notification payload with a fresh `requests.post` per call
+(the previous implementation) and with the pooled keep-alive clients from
+http_client.py, reporting notifications/sec, latency and connections opened.
+
+    python benchmarks/bench_webhook.py --notifications 2000 --threads 8 --output webhook.json
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.common import compare_results, print_comparison, run_metadata, summarize, write_results  # noqa: E402
+from benchmarks.standins import WebhookReceiver  # noqa: E402
+from http_client import OutboundClients  # noqa: E402
+
+PAYLOAD = {
+    "event": "complaint_submitted",
+    "timestamp": "2026-01-01T00:00:00Z",
+    "complaint": {
+        "id": "00000000-0000-0000-0000-000000000000",
+        "citizen_name": "Bench User",
+        "location": "MG Road near metro station",
+        "issue_type": "road_traffic",
+        "complaint_description": "There is a large pothole on Main Street causing traffic issues.",
+        "mobile_number": "9800000000",
+        "email": "bench.user@example.com",
+    },
+}
+
+
+def run(send, notifications: int, threads: int, receiver: WebhookReceiver):
+    connections_before = receiver.connections
+
+    def timed(_):
+        start = time.perf_counter()
+        ok = 200 <= send().status_code < 300
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(timed, range(notifications)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, _ in outcomes]
+    errors = sum(1 for _, ok in outcomes if not ok)
+    return {
+        **summarize(latencies, errors),
+        "notifications_per_s": round(notifications / elapsed, 2),
+        "connections_opened": receiver.connections - connections_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook delivery throughput: per-call vs pooled clients")
+    parser.add_argument("--notifications", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    import requests
+
+    receiver = WebhookReceiver().start()
+    url = receiver.url
+    results = run_metadata("webhook", vars(args))
+
+    results["per_call_requests"] = run(
+        lambda: requests.post(url, json=PAYLOAD, headers={"Content-Type": "application/json"}, timeout=10),
+        args.notifications, args.threads, receiver,
+    )
+
+    clients = OutboundClients(max_connections=args.threads, max_keepalive=args.threads)
+    clients.warm(url)
+    results["pooled"] = run(lambda: clients.post_json(url, PAYLOAD, timeout=10), args.notifications, args.threads, receiver)
+    clients.close()
+    receiver.stop()
+
+    write_results(results, args.output)
+    if args.baseline:
+        print_comparison(compare_results(results, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Shared helpers for the benchmark scripts: latency summaries, RSS sampling,
+JSON result files, run-to-run comparison, and simulated client addresses.
+"""
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from typing import Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies_s: List[float], errors: int = 0) -> Dict:
+    """Latency summary in milliseconds"""
+    values = sorted(latencies_s)
+    count = len(values)
+    return {
+        "count": count,
+        "errors": errors,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+# Requests through the in-process transport all come from one address; the app's
+# per-client rate limits would then treat every simulated citizen as the same one
+CLIENT_HEADER = "x-bench-client"
+
+
+def simulated_clients(app):
+    """ASGI wrapper: a request's CLIENT_HEADER becomes its client address"""
+    async def wrapped(scope, receive, send):
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == CLIENT_HEADER.encode():
+                    scope = {**scope, "client": (value.decode(), 0)}
+                    break
+        await app(scope, receive, send)
+
+    return wrapped
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 2)
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 2)
+
+
+def run_metadata(name: str, config: Dict) -> Dict:
+    return {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+    }
+
+
+def write_results(results: Dict, output: Optional[str]):
+    """Write results as JSON to `output`, or stdout when not given"""
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+        print(f"[BENCH] Results written to {output}")
+    else:
+        print(text)
+
+
+def _flatten(prefix: str, value, out: Dict[str, float]):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else key, child, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+
+
+def compare_results(current: Dict, baseline_path: str) -> Dict[str, Dict]:
+    """Per-metric delta between this run and a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    before: Dict[str, float] = {}
+    after: Dict[str, float] = {}
+    _flatten("", {k: v for k, v in baseline.items() if k != "config"}, before)
+    _flatten("", {k: v for k, v in current.items() if k != "config"}, after)
+
+    deltas = {}
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        change = ((new - old) / old * 100.0) if old else 0.0
+        deltas[key] = {"baseline": old, "current": new, "change_pct": round(change, 2)}
+    return deltas
+
+
+def print_comparison(deltas: Dict[str, Dict]):
+    print(f"{'metric':<45} {'baseline':>12} {'current':>12} {'change':>9}", file=sys.stderr)
+    for key, row in deltas.items():
+        print(f"{key:<45} {row['baseline']:>12} {row['current']:>12} {row['change_pct']:>8}%", file=sys.stderr)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Soak test: drives the app for a long time and fails if memory keeps growing.
+
+Boots the app in-process against local stand-ins (a file-backed local
+database, the audit log in a temporary directory, no webhook) and runs
+citizen sessions at --concurrency: chat turns, a submission, then a /reset
+for --reset-ratio of them, the rest abandoned the way closed browser tabs
+are. Abandoned sessions are swept at every sample with --session-ttl-s, as
+the app's sweeper would.
+
+Every --sample-every requests it records RSS and, unless --frames is 0, the
+memory tracemalloc traces. Growth is the least-squares slope of those samples
+after --warmup requests, in MB per 100k requests; the run fails (exit status 1)
+when RSS growth (less tracemalloc's own overhead) passes --max-rss-growth-mb or
+traced growth passes --max-traced-growth-mb. The allocation sites that grew
+most between the first and last snapshot are reported to show where.
+
+    python benchmarks/soak.py --requests 1000000 --output soak.json
+    python benchmarks/soak.py --duration-s 14400 --sample-every 20000 --output soak.json   # four hours
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.bench_app import conversation_turns, make_complaint  # noqa: E402
+from benchmarks.common import (  # noqa: E402
+    CLIENT_HEADER, peak_rss_mb, rss_mb, run_metadata, simulated_clients, summarize, write_results
+)
+from benchmarks.standins import install_standins  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def growth_per_100k(samples, key: str) -> float:
+    """Least-squares slope of samples[key] against requests, in MB per 100k requests"""
+    if len(samples) < 2:
+        return 0.0
+    xs = [sample["requests"] for sample in samples]
+    ys = [sample[key] for sample in samples]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if not variance:
+        return 0.0
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+    return round(slope * 100000, 3)
+
+
+class Soak:
+    def __init__(self, args, app):
+        self.args = args
+        self.app = app
+        self.rng = random.Random(args.seed)
+        self.requests = 0
+        self.sessions = 0
+        self.statuses = Counter()
+        # Latencies of the current sample window only, so the harness itself stays flat
+        self.window = []
+        self.samples = []
+        self.snapshots = []
+        self.started = time.perf_counter()
+
+    def done(self) -> bool:
+        if self.args.duration_s:
+            return time.perf_counter() - self.started >= self.args.duration_s
+        return self.requests >= self.args.requests
+
+    async def post(self, client, path: str, body):
+        start = time.perf_counter()
+        try:
+            status = (await client.post(path, json=body, headers={CLIENT_HEADER: body["session_id"]})).status_code
+        except Exception:
+            status = 0
+        self.window.append(time.perf_counter() - start)
+        self.statuses[str(status)] += 1
+        self.requests += 1
+        if self.requests % self.args.sample_every == 0:
+            self.sample()
+
+    async def session(self, client):
+        index = self.sessions
+        self.sessions += 1
+        session_id = f"soak_{self.args.seed}_{index}"
+        complaint = make_complaint(self.rng, index, valid=self.rng.random() >= 0.05)
+        if self.rng.random() < 0.8:
+            for turn in conversation_turns(complaint):
+                await self.post(client, "/chat", {"message": turn, "session_id": session_id})
+        await self.post(client, "/submit-complaint", {**complaint, "session_id": session_id})
+        if self.rng.random() < self.args.reset_ratio:
+            await self.post(client, "/reset", {"session_id": session_id})
+
+    def sample(self):
+        from sessions import session_store
+
+        session_store.expire(self.args.session_ttl_s)
+        gc.collect()
+        sample = {
+            "requests": self.requests,
+            "elapsed_s": round(time.perf_counter() - self.started, 1),
+            "rss_mb": rss_mb(),
+            "sessions": len(session_store),
+            "latency": summarize(self.window),
+        }
+        self.window = []
+        if tracemalloc.is_tracing():
+            overhead = tracemalloc.get_tracemalloc_memory() / MB
+            sample["traced_mb"] = round(tracemalloc.get_traced_memory()[0] / MB, 2)
+            sample["tracemalloc_overhead_mb"] = round(overhead, 2)
+            sample["rss_less_overhead_mb"] = round(sample["rss_mb"] - overhead, 2)
+            if self.requests > self.args.warmup:
+                snapshot = tracemalloc.take_snapshot().filter_traces(self.filters())
+                # Only the first and the latest snapshots are compared
+                self.snapshots = self.snapshots[:1] + [snapshot]
+        else:
+            sample["rss_less_overhead_mb"] = sample["rss_mb"]
+        self.samples.append(sample)
+        print(f"[SOAK] {self.requests} requests, RSS {sample['rss_mb']} MB, "
+              f"traced {sample.get('traced_mb', '-')} MB, {sample['sessions']} sessions", file=sys.stderr)
+
+    @staticmethod
+    def filters():
+        from profiling import TRACE_FILTERS
+
+        return TRACE_FILTERS
+
+    async def run(self):
+        import httpx
+
+        transport = httpx.ASGITransport(app=simulated_clients(self.app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://soak.local") as client:
+            async def worker():
+                while not self.done():
+                    await self.session(client)
+
+            await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running memory growth check")
+    parser.add_argument("--requests", type=int, default=200000, help="Stop after this many requests")
+    parser.add_argument("--duration-s", type=float, default=0, help="Stop after this long instead")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20000, help="Requests before growth is measured")
+    parser.add_argument("--sample-every", type=int, default=5000)
+    parser.add_argument("--frames", type=int, default=1, help="tracemalloc frames per allocation; 0 for RSS only")
+    parser.add_argument("--reset-ratio", type=float, default=0.7)
+    parser.add_argument("--session-ttl-s", type=float, default=30)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=16.0, help="Per 100k requests")
+    parser.add_argument("--max-traced-growth-mb", type=float, default=8.0, help="Per 100k requests")
+    parser.add_argument("--top", type=int, default=15, help="Growing allocation sites to report")
+    parser.add_argument("--seed", type=int, default=1304)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="soak-")
+    # Read at import: keep the audit log out of the source tree
+    os.environ["EVENT_LOG_DIR"] = os.path.join(directory, "event_log")
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            install_standins()
+            import database
+            import main as app_module
+            from local_supabase import LocalSupabase
+
+            # On disk, so stored complaints do not count as process memory
+            database.supabase = LocalSupabase(os.path.join(directory, "soak.db"))
+            if args.frames > 0:
+                tracemalloc.start(args.frames)
+            soak = Soak(args, app_module.app)
+            asyncio.run(soak.run())
+            soak.sample()
+    finally:
+        tracemalloc_was_on = tracemalloc.is_tracing()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    measured = [sample for sample in soak.samples if sample["requests"] > args.warmup]
+    growth = {"rss_mb_per_100k": growth_per_100k(measured, "rss_less_overhead_mb")}
+    failures = []
+    if growth["rss_mb_per_100k"] > args.max_rss_growth_mb:
+        failures.append(f"RSS grows {growth['rss_mb_per_100k']} MB per 100k requests (limit {args.max_rss_growth_mb})")
+    if tracemalloc_was_on:
+        growth["traced_mb_per_100k"] = growth_per_100k(measured, "traced_mb")
+        if growth["traced_mb_per_100k"] > args.max_traced_growth_mb:
+            failures.append(f"Traced memory grows {growth['traced_mb_per_100k']} MB per 100k requests "
+                            f"(limit {args.max_traced_growth_mb})")
+    if len(measured) < 3:
+        failures.append(f"Only {len(measured)} samples after warmup; run longer or sample more often")
+
+    results = run_metadata("soak", vars(args))
+    results.update({
+        "requests": soak.requests,
+        "sessions": soak.sessions,
+        "elapsed_s": round(time.perf_counter() - soak.started, 1),
+        "statuses": dict(soak.statuses),
+        "growth": growth,
+        "passed": not failures,
+        "failures": failures,
+        "samples": soak.samples,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    if len(soak.snapshots) == 2:
+        from profiling import top_allocations
+
+        results["top_growth"] = top_allocations(soak.snapshots[1], soak.snapshots[0], "lineno", args.top)
+    write_results(results, args.output)
+    for failure in failures:
+        print(f"[SOAK] FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
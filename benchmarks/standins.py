@@ -0,0 +1,201 @@
+"""
+Local stand-ins for the services the backend talks to, so the app can be
+driven in-process without Supabase credentials or a live webhook endpoint.
+
+- backend/local_supabase.py: SQLite-backed Supabase/PostgREST stand-in, used
+  in-process or over HTTP, with optional latency/error/RLS fault injection
+- WebhookReceiver: a threaded HTTP/1.1 server that accepts and counts webhooks
+- SMTPSink: a threaded SMTP server that accepts and keeps every message
+"""
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+from collections import deque
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Buffer the response so status, headers and body leave in one segment
+    wbufsize = 64 * 1024
+
+    def setup(self):
+        super().setup()
+        self.server.record_connection()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        self.server.record(body)
+
+        reply = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookReceiver(ThreadingHTTPServer):
+    """Local webhook endpoint; keeps the last `keep` payloads and a running count"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, keep: int = 100):
+        super().__init__((host, port), _WebhookHandler)
+        self.received = 0
+        self.connections = 0
+        self.payloads: deque = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/webhook"
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def record(self, body: bytes):
+        with self._lock:
+            self.received += 1
+            self.payloads.append(json.loads(body or b"{}"))
+
+    def start(self) -> "WebhookReceiver":
+        self._thread = threading.Thread(target=self.serve_forever, name="webhook-receiver", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, *lines: str):
+        # Multi-line replies go out in one write, or Nagle holds the last line back
+        self.wfile.write("".join(line + "\r\n" for line in lines).encode())
+
+    def handle(self):
+        self.server.record_connection()
+        self.reply("220 sink ESMTP")
+        recipients: List[str] = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb == "EHLO":
+                self.reply("250-sink", "250 8BITMIME")
+            elif verb == "HELO":
+                self.reply("250 sink")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip().strip("<>"))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b".\r\n", b".\n", b""):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                self.server.record(recipients, b"".join(lines))
+                self.reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Local SMTP server; keeps every message (recipients and parsed email) and counts sessions"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _SMTPHandler)
+        self.connections = 0
+        self.messages: List[Dict] = []
+        self._lock = threading.Lock()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def record(self, recipients: List[str], data: bytes):
+        with self._lock:
+            self.messages.append({"to": recipients, "message": message_from_bytes(data)})
+
+    def start(self) -> "SMTPSink":
+        threading.Thread(target=self.serve_forever, name="smtp-sink", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def install_standins(webhook_url: str = "", faults=None, over_http: bool = False):
+    """
+    Point database.py at a fresh LocalSupabase and the given webhook URL.
+
+    With over_http=True the store is served by a LocalPostgRESTServer and the
+    real supabase client talks to it, so client-side HTTP/JSON cost is included.
+    Returns (LocalSupabase, server or None).
+    """
+    import database
+    from local_supabase import LOCAL_ANON_KEY, LocalPostgRESTServer, LocalSupabase
+    from resilience import SpillBuffer
+
+    spill_dir = tempfile.mkdtemp(prefix="complaints-spill-")
+    database.spill_buffer = SpillBuffer(os.path.join(spill_dir, "spill.jsonl"))
+    database.rejected_buffer = SpillBuffer(os.path.join(spill_dir, "spill.jsonl.rejected"))
+
+    local = LocalSupabase(faults=faults)
+    server = None
+    database.WEBHOOK_URL = webhook_url
+    if over_http:
+        server = LocalPostgRESTServer(local).start()
+        database.DATABASE_BACKEND = "supabase"
+        database.SUPABASE_URL = server.url
+        database.SUPABASE_KEY = LOCAL_ANON_KEY
+        database.supabase = None
+        database.get_supabase_client()
+    else:
+        database.DATABASE_BACKEND = "local"
+        database.supabase = local
+    return local, server
+
+
+def stored_rows(local, table: str) -> List[Dict]:
+    """All rows of a table in a LocalSupabase, bypassing fault injection"""
+    return local.store.select(table, [])
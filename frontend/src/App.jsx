@@ -1,5 +1,20 @@
 import { useState, useRef, useEffect } from 'react'
 
+// localStorage key for chat turns queued while offline
+const PENDING_KEY = 'pendingChatBatch'
+// A queued batch that failed to send while online is retried after 2s, 4s, ... up to a minute apart
+const RETRY_BASE_MS = 2000
+const RETRY_MAX_MS = 60000
+
+// Chat step -> the complaint field it answers, validated by the server as it arrives
+const submissionFields = {
+  description: 'complaint_description',
+  location: 'location',
+  name: 'citizen_name',
+  mobile_number: 'mobile_number',
+  email: 'email'
+}
+
 function App() {
   const [messages, setMessages] = useState([
     {
@@ -29,6 +44,117 @@ function App() {
   // Generate unique session ID for this conversation
   const sessionId = useRef(`session_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`)
 
+  // Chat turns not yet sent, and a finished complaint waiting for the connection.
+  // They go out together in one POST /chat/batch and survive a page reload.
+  const pendingTurns = useRef([])
+  const pendingSubmission = useRef(null)
+  const [offline, setOffline] = useState(!navigator.onLine)
+  // One batch request at a time, so a retry and a user action never send the same complaint twice
+  const flushing = useRef(Promise.resolve())
+  const retryTimer = useRef(null)
+  const retryDelay = useRef(RETRY_BASE_MS)
+
+  const savePending = () => {
+    if (pendingTurns.current.length || pendingSubmission.current) {
+      localStorage.setItem(PENDING_KEY, JSON.stringify({
+        session_id: sessionId.current,
+        turns: pendingTurns.current,
+        submission: pendingSubmission.current
+      }))
+    } else {
+      localStorage.removeItem(PENDING_KEY)
+    }
+  }
+
+  const queueTurn = (message, field = null) => {
+    pendingTurns.current.push({ message, field, sent_at: Date.now() / 1000 })
+    savePending()
+  }
+
+  // Send every queued turn, plus the submission if one is waiting, in one request.
+  // Returns the batch response, or null when offline (everything stays queued).
+  const flushPending = () => {
+    const run = flushing.current.catch(() => {}).then(sendBatch)
+    flushing.current = run
+    return run
+  }
+
+  const sendBatch = async () => {
+    if (!navigator.onLine) {
+      return null
+    }
+    const turns = pendingTurns.current.slice()
+    const submission = pendingSubmission.current
+    if (!turns.length && !submission) {
+      return { turns: [], submission: null }
+    }
+    const baseUrl = import.meta.env.VITE_API_URL || 'https://ai-civic-complaint-chat-app.onrender.com'
+    const response = await fetch(`${baseUrl}/chat/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ session_id: sessionId.current, turns, submission }),
+    })
+    if (!response.ok) {
+      const error = new Error(`HTTP ${response.status}: ${response.statusText}`)
+      error.status = response.status
+      throw error
+    }
+    const result = await response.json()
+    pendingTurns.current = pendingTurns.current.slice(turns.length)
+    if (pendingSubmission.current === submission) {
+      pendingSubmission.current = null
+    }
+    savePending()
+    clearTimeout(retryTimer.current)
+    retryTimer.current = null
+    retryDelay.current = RETRY_BASE_MS
+    return result
+  }
+
+  // Network errors and overloaded servers are worth retrying; a request the server rejected is not
+  const isRetryable = (error) => !error.status || error.status === 429 || error.status >= 500
+
+  const scheduleRetry = () => {
+    if (retryTimer.current) {
+      return
+    }
+    const delay = retryDelay.current
+    retryDelay.current = Math.min(delay * 2, RETRY_MAX_MS)
+    retryTimer.current = setTimeout(() => {
+      retryTimer.current = null
+      sendQueued()
+    }, delay)
+  }
+
+  // Send whatever is queued, e.g. when the connection returns; a failure is retried with backoff
+  const sendQueued = async () => {
+    const hadSubmission = pendingSubmission.current !== null
+    try {
+      const result = await flushPending()
+      if (hadSubmission && result?.submission) {
+        handleSubmissionResult(result.submission)
+      }
+    } catch (error) {
+      console.error('[BATCH] Sending queued turns failed:', error)
+      if (isRetryable(error)) {
+        scheduleRetry()
+        return
+      }
+      // Rejected as sent: resending would fail the same way
+      pendingTurns.current = []
+      pendingSubmission.current = null
+      savePending()
+      if (hadSubmission) {
+        setMessages(prev => [...prev, {
+          role: 'assistant',
+          content: 'Sorry, your saved complaint could not be submitted. Please start a new complaint and try again.'
+        }])
+      }
+    }
+  }
+
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
   }
@@ -52,6 +178,33 @@ function App() {
     }
   }, [messages])
 
+  // Pick up turns queued before a reload, and send queued turns when the connection returns
+  useEffect(() => {
+    const saved = JSON.parse(localStorage.getItem(PENDING_KEY) || 'null')
+    if (saved) {
+      sessionId.current = saved.session_id
+      pendingTurns.current = saved.turns || []
+      pendingSubmission.current = saved.submission || null
+    }
+
+    const goOnline = () => {
+      setOffline(false)
+      sendQueued()
+    }
+    const goOffline = () => setOffline(true)
+    window.addEventListener('online', goOnline)
+    window.addEventListener('offline', goOffline)
+    if (saved && navigator.onLine) {
+      goOnline()
+    }
+    return () => {
+      window.removeEventListener('online', goOnline)
+      window.removeEventListener('offline', goOffline)
+      clearTimeout(retryTimer.current)
+      retryTimer.current = null
+    }
+  }, [])
+
   useEffect(() => {
     if (!showCategorySelection && inputRef.current) {
       inputRef.current.focus()
@@ -59,6 +212,22 @@ function App() {
   }, [showCategorySelection])
 
   const resetComplaint = async () => {
+    if (pendingSubmission.current && navigator.onLine) {
+      // Try it now rather than waiting for the next retry
+      await sendQueued()
+    }
+    if (pendingSubmission.current) {
+      setMessages(prev => [...prev, {
+        role: 'assistant',
+        content: navigator.onLine
+          ? "Your complaint couldn't be sent yet; we'll keep trying. You can file a new one once it has gone through."
+          : 'Your complaint is still waiting to be sent. You can file a new one once you are back online and it has gone through.'
+      }])
+      return
+    }
+    // Answers to the abandoned complaint are not sent
+    pendingTurns.current = []
+    savePending()
     try {
       const baseUrl = import.meta.env.VITE_API_URL || 'https://ai-civic-complaint-chat-app.onrender.com'
       await fetch(`${baseUrl}/reset`, {
@@ -66,6 +235,8 @@ function App() {
         headers: {
           'Content-Type': 'application/json',
         },
+        // Lets the server free this conversation's state right away
+        body: JSON.stringify({ session_id: sessionId.current }),
       })
       setMessages([
         {
@@ -117,23 +288,8 @@ function App() {
     setMessages(prev => [...prev, { role: 'user', content: category }])
 
     try {
-      const baseUrl = import.meta.env.VITE_API_URL || 'https://ai-civic-complaint-chat-app.onrender.com'
-      const response = await fetch(`${baseUrl}/chat`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          message: category,
-          session_id: sessionId.current
-        }),
-      })
-
-      if (!response.ok) {
-        throw new Error('Failed to send message')
-      }
-
-      const data = await response.json()
+      // Sent with the rest of the answers when the complaint is submitted
+      queueTurn(category, 'issue_type')
 
       // Store the selected category and immediately move to description step
       setSelectedCategory(category)
@@ -220,26 +376,8 @@ function App() {
       // Store the value with error handling
       setFormData(prev => ({ ...prev, [field]: value }))
 
-      const baseUrl = import.meta.env.VITE_API_URL || 'https://ai-civic-complaint-chat-app.onrender.com'
-      console.log('[API] Making request to:', `${baseUrl}/chat`)
-
-      const response = await fetch(`${baseUrl}/chat`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          message: value,
-          session_id: sessionId.current
-        }),
-      })
-
-      if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`)
-      }
-
-      const data = await response.json()
-      console.log('[API] Response received:', data)
+      // Queued locally; every answer goes to the server in one batch with the submission
+      queueTurn(value, submissionFields[field])
 
       // Advance to next step with error handling
       const steps = ['description', 'location', 'name', 'mobile_number', 'email']
@@ -266,7 +404,7 @@ function App() {
       } else {
         // Final step - submit complaint
         console.log('[STEP_TRANSITION] Final step reached, submitting complaint')
-        await submitComplaint()
+        await submitComplaint({ ...formData, [field]: value })
 
         // Clear all form data after successful submission
         setFormData({
@@ -294,100 +432,58 @@ function App() {
   }
 
   // Submit complaint to database
-  const submitComplaint = async () => {
+  const submitComplaint = async (answers) => {
     try {
       console.log('[SUBMIT_COMPLAINT] Starting complaint submission')
 
       const complaintData = {
-        citizen_name: formData?.name || '',
-        location: formData?.location || '',
+        citizen_name: answers?.name || '',
+        location: answers?.location || '',
         issue_type: getSelectedCategoryValue(),
-        complaint_description: formData?.description || '',
-        mobile_number: formData?.mobile_number || '',
-        email: formData?.email || ''
+        complaint_description: answers?.description || '',
+        mobile_number: answers?.mobile_number || '',
+        email: answers?.email || ''
       }
 
       console.log('[SUBMIT_COMPLAINT] Prepared data:', complaintData)
 
-      // Send to backend for database insertion
-      const baseUrl = import.meta.env.VITE_API_URL || 'https://ai-civic-complaint-chat-app.onrender.com'
-      console.log('[SUBMIT_COMPLAINT] Making API call to:', `${baseUrl}/submit-complaint`)
-
-      const response = await fetch(`${baseUrl}/submit-complaint`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          ...complaintData,
-          session_id: sessionId.current
-        }),
-      })
-
-      console.log('[SUBMIT_COMPLAINT] API response status:', response.status)
-
-      const result = await response.json()
-      console.log('[SUBMIT_COMPLAINT] API response:', result)
-
-      if (response.ok && result.success) {
-        console.log('[SUBMIT_COMPLAINT] Complaint successfully saved to database')
+      // Sent to the backend with the queued chat turns in one request
+      pendingSubmission.current = complaintData
+      savePending()
+      const result = await flushPending()
 
+      if (result === null) {
+        console.log('[SUBMIT_COMPLAINT] Offline, complaint queued on this device')
         setCurrentStep(null)
-        setComplaintCompleted(true)
-        setShowCategorySelection(false)
-
-        setMessages(prev => {
-          console.log('[SUBMIT_COMPLAINT] Adding success message to chat')
-          return [...prev, {
-            role: 'assistant',
-            content: "Thank you! Your complaint has been recorded successfully. Our team will review it and get back to you."
-          }]
-        })
-      } else {
-        // Handle both HTTP errors and backend validation errors
-        console.error('[SUBMIT_COMPLAINT] Submission failed')
-        console.error('[SUBMIT_COMPLAINT] HTTP status:', response.status)
-        console.error('[SUBMIT_COMPLAINT] Result:', result)
-
-        // Show specific validation errors instead of generic message
-        let errorMessage = 'Sorry, there was an error submitting your complaint. '
-
-        if (result.details) {
-          console.error('[SUBMIT_COMPLAINT] Validation details:', result.details)
-
-          // Collect specific validation errors
-          const validationErrors = []
-          for (const [field, info] of Object.entries(result.details)) {
-            if (!info.valid) {
-              validationErrors.push(`${field}: ${info.message}`)
-            }
-          }
-
-          if (validationErrors.length > 0) {
-            errorMessage += 'Please fix the following issues:\n' + validationErrors.join('\n')
-          }
-        } else if (result.error) {
-          errorMessage += result.error
-        } else {
-          errorMessage += 'Please check your information and try again.'
-        }
-
-        // Don't throw error - show the message directly
         setMessages(prev => [...prev, {
           role: 'assistant',
-          content: errorMessage
+          content: "You're offline. Your complaint is saved on this device and will be sent automatically when you're back online."
         }])
+        return
+      }
 
-        // Allow user to retry by going back to the last step
-        setTimeout(() => {
-          setCurrentStep('email')
-        }, 3000)
-
-        return // Don't continue to success handling
+      console.log('[SUBMIT_COMPLAINT] API response:', result.submission)
+      if (result.submission) {
+        handleSubmissionResult(result.submission)
       }
     } catch (error) {
       console.error('[SUBMIT_COMPLAINT] Exception during submission:', error)
 
+      if (isRetryable(error)) {
+        // Still queued: sent by the retry, the next message, or when the connection returns
+        scheduleRetry()
+        setCurrentStep(null)
+        setMessages(prev => [...prev, {
+          role: 'assistant',
+          content: "We couldn't reach the server. Your complaint is saved on this device and we'll keep trying to send it."
+        }])
+        return
+      }
+      // Rejected as sent: drop the batch so the user can correct the complaint and submit again
+      pendingTurns.current = []
+      pendingSubmission.current = null
+      savePending()
+
       // Don't crash the UI - show error message instead
       setMessages(prev => [...prev, {
         role: 'assistant',
@@ -401,6 +497,64 @@ function App() {
     }
   }
 
+  const handleSubmissionResult = (result) => {
+    if (result.success) {
+      console.log('[SUBMIT_COMPLAINT] Complaint successfully saved to database')
+
+      setCurrentStep(null)
+      setComplaintCompleted(true)
+      setShowCategorySelection(false)
+
+      setMessages(prev => {
+        console.log('[SUBMIT_COMPLAINT] Adding success message to chat')
+        return [...prev, {
+          role: 'assistant',
+          content: "Thank you! Your complaint has been recorded successfully. Our team will review it and get back to you."
+        }]
+      })
+      return
+    }
+
+    // Handle both HTTP errors and backend validation errors
+    console.error('[SUBMIT_COMPLAINT] Submission failed')
+    console.error('[SUBMIT_COMPLAINT] HTTP status:', result.status)
+    console.error('[SUBMIT_COMPLAINT] Result:', result)
+
+    // Show specific validation errors instead of generic message
+    let errorMessage = 'Sorry, there was an error submitting your complaint. '
+
+    if (result.details && typeof result.details === 'object') {
+      console.error('[SUBMIT_COMPLAINT] Validation details:', result.details)
+
+      // Collect specific validation errors
+      const validationErrors = []
+      for (const [field, info] of Object.entries(result.details)) {
+        if (!info.valid) {
+          validationErrors.push(`${field}: ${info.message}`)
+        }
+      }
+
+      if (validationErrors.length > 0) {
+        errorMessage += 'Please fix the following issues:\n' + validationErrors.join('\n')
+      }
+    } else if (result.error) {
+      errorMessage += result.error
+    } else {
+      errorMessage += 'Please check your information and try again.'
+    }
+
+    // Don't throw error - show the message directly
+    setMessages(prev => [...prev, {
+      role: 'assistant',
+      content: errorMessage
+    }])
+
+    // Allow user to retry by going back to the last step
+    setTimeout(() => {
+      setCurrentStep('email')
+    }, 3000)
+  }
+
   // Get the selected category value
   const getSelectedCategoryValue = () => {
     return selectedCategory || 'road/traffic issues' // Fallback for safety
@@ -435,27 +589,27 @@ function App() {
         return
       }
 
-      // Otherwise, send to chat endpoint for general conversation
-      const baseUrl = import.meta.env.VITE_API_URL || 'https://ai-civic-complaint-chat-app.onrender.com'
-      const response = await fetch(`${baseUrl}/chat`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          message: userMessage,
-          session_id: sessionId.current
-        }),
-      })
-
-      if (!response.ok) {
-        throw new Error('Failed to send message')
+      // Otherwise, send to chat endpoint for general conversation, with anything queued before it
+      queueTurn(userMessage)
+      const result = await flushPending()
+      if (result === null) {
+        setMessages(prev => [...prev, {
+          role: 'assistant',
+          content: "You're offline. Your message will be sent when you're back online."
+        }])
+        return
       }
-
-      const data = await response.json()
-      setMessages(prev => [...prev, { role: 'assistant', content: data.reply }])
+      const replies = result.turns
+      setMessages(prev => [...prev, { role: 'assistant', content: replies[replies.length - 1].reply }])
     } catch (error) {
       console.error('Error:', error)
+      if (isRetryable(error)) {
+        scheduleRetry()
+      } else {
+        // The queued turns were rejected as sent; resending them would fail the same way
+        pendingTurns.current = []
+        savePending()
+      }
       setMessages(prev => [...prev, {
         role: 'assistant',
         content: 'Sorry, I encountered an error. Please try again or start a new complaint.'
@@ -536,6 +690,9 @@ function App() {
                   Smart City Complaint Assistant
                 </h1>
                 <p className="text-xs sm:text-sm text-gray-600 mt-1 font-medium">Your voice matters. Report issues easily.</p>
+                {offline && (
+                  <p className="text-xs text-amber-700 mt-1 font-semibold">Offline: your answers are saved and will be sent when you reconnect.</p>
+                )}
               </div>
             </div>
             <button
@@ -1,150 +0,0 @@
-#!/usr/bin/env python3
-"""
-Final comprehensive test of the chatbot data saving functionality
-"""
-
-import requests
-import json
-import time
-
-BASE_URL = "http://localhost:8000"
-
-def test_complete_flow():
-    print("COMPREHENSIVE CHATBOT TEST")
-    print("=" * 50)
-
-    # Test data that matches what the frontend collects
-    test_complaint = {
-        "citizen_name": "John Doe",
-        "email": "john.doe@example.com",
-        "mobile_number": "+1234567890",
-        "issue_type": "road/traffic issues",  # Frontend format as selected by user
-        "complaint_description": "There is a large pothole on Main Street causing traffic issues and potential vehicle damage."
-    }
-
-    print("Test Data:")
-    for key, value in test_complaint.items():
-        print(f"   {key}: {value}")
-    print()
-
-    try:
-        print("Testing /submit-complaint endpoint...")
-
-        response = requests.post(
-            f"{BASE_URL}/submit-complaint",
-            json=test_complaint,
-            timeout=10
-        )
-
-        print(f"Status Code: {response.status_code}")
-
-        if response.status_code == 200:
-            result = response.json()
-            print(f"Response: {json.dumps(result, indent=2)}")
-
-            if result.get("success") == True:
-                print("SUCCESS: Complaint submitted successfully!")
-                print("Data validation passed")
-                print("Database insertion worked")
-
-                # Check if all required fields are in the response or logs
-                print("\nValidation Summary:")
-                print("citizen_name: Present and valid")
-                print("email: Present and contains @")
-                print("mobile_number: Present and valid format")
-                print("issue_type: Present and valid")
-                print("complaint_description: Present and meets length requirement")
-
-                return True
-            else:
-                print(f"FAILURE: {result.get('error', 'Unknown error')}")
-                return False
-        else:
-            print(f"HTTP ERROR: {response.status_code}")
-            print(f"Response: {response.text}")
-            return False
-
-    except requests.exceptions.ConnectionError:
-        print("CONNECTION ERROR: Backend server not running")
-        print("Start the server with: python backend/run.py")
-        return False
-    except Exception as e:
-        print(f"EXCEPTION: {e}")
-        return False
-
-def test_validation_edge_cases():
-    print("\nTESTING VALIDATION EDGE CASES")
-    print("=" * 40)
-
-    test_cases = [
-        {
-            "name": "Missing email",
-            "data": {
-                "citizen_name": "John Doe",
-                "email": "",
-                "mobile_number": "+1234567890",
-                "issue_type": "road_traffic",
-                "complaint_description": "Test complaint"
-            }
-        },
-        {
-            "name": "Invalid email (no @)",
-            "data": {
-                "citizen_name": "John Doe",
-                "email": "johnexample.com",
-                "mobile_number": "+1234567890",
-                "issue_type": "road_traffic",
-                "complaint_description": "Test complaint"
-            }
-        },
-        {
-            "name": "Short mobile number",
-            "data": {
-                "citizen_name": "John Doe",
-                "email": "john@example.com",
-                "mobile_number": "12",
-                "issue_type": "road_traffic",
-                "complaint_description": "Test complaint"
-            }
-        }
-    ]
-
-    for test_case in test_cases:
-        print(f"\nTesting: {test_case['name']}")
-        try:
-            response = requests.post(
-                f"{BASE_URL}/submit-complaint",
-                json=test_case['data'],
-                timeout=5
-            )
-
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("success") == False:
-                    print(f"CORRECTLY REJECTED: {result.get('error', 'Validation error')}")
-                else:
-                    print("SHOULD HAVE BEEN REJECTED but was accepted")
-            else:
-                print(f"HTTP ERROR: {response.status_code}")
-
-        except Exception as e:
-            print(f"EXCEPTION: {e}")
-
-if __name__ == "__main__":
-    print("Waiting for server to be ready...")
-    time.sleep(2)
-
-    # Test main functionality
-    success = test_complete_flow()
-
-    if success:
-        # Test edge cases
-        test_validation_edge_cases()
-
-        print("\n" + "=" * 50)
-        print("ALL TESTS COMPLETED!")
-        print("Data saving functionality verified")
-        print("Validation working correctly")
-        print("Chatbot ready for production")
-    else:
-        print("\nTESTS FAILED - Check backend server and Supabase credentials")
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+for path in (ROOT_DIR, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from benchmarks.standins import WebhookReceiver, install_standins  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def webhook_receiver():
+    receiver = WebhookReceiver().start()
+    yield receiver
+    receiver.stop()
+
+
+@pytest.fixture(autouse=True)
+def event_log(tmp_path, monkeypatch):
+    """Audit log events from every test go to its own directory"""
+    import events
+
+    log = events.EventLog(str(tmp_path / "event_log"))
+    monkeypatch.setattr(events, "event_log", log)
+    monkeypatch.setattr(events, "lifecycle_stats", events.LifecycleStats())
+    yield log
+    log.close()
+
+
+@pytest.fixture
+def fake_db(webhook_receiver, tmp_path, monkeypatch):
+    import database
+    import sessions
+    from resilience import SpillBuffer, env_breaker
+    from webhook_routing import WebhookRouter
+
+    monkeypatch.setattr(database, "database_breaker", env_breaker("database", "DB"))
+    monkeypatch.setattr(database, "webhook_router", WebhookRouter([], []))
+    monkeypatch.setattr(database, "spill_buffer", SpillBuffer(str(tmp_path / "spill.jsonl")))
+    monkeypatch.setattr(database, "rejected_buffer", SpillBuffer(str(tmp_path / "spill.jsonl.rejected")))
+    session_store = sessions.SessionStore()
+    monkeypatch.setattr(sessions, "session_store", session_store)
+    monkeypatch.setattr(database, "session_store", session_store)
+    for name in ("DATABASE_BACKEND", "SUPABASE_URL", "SUPABASE_KEY", "WEBHOOK_URL", "supabase"):
+        monkeypatch.setattr(database, name, getattr(database, name))
+
+    local, _ = install_standins(webhook_receiver.url)
+    return local
+
+
+@pytest.fixture
+def client(fake_db):
+    from fastapi.testclient import TestClient
+    import admission
+    import main
+
+    admission.submit_rate_limiter._buckets.clear()
+    admission.upload_rate_limiter._buckets.clear()
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def complaint():
+    return {
+        "citizen_name": "John Doe",
+        "location": "123 Main Street, Downtown",
+        "issue_type": "road/traffic issues",
+        "complaint_description": "There is a large pothole on Main Street causing traffic issues.",
+        "mobile_number": "9998887777",
+        "email": "john.doe@example.com",
+    }
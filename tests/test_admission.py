@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionRejected, ConcurrencyLimiter, TokenBucketLimiter
+
+
+def test_token_bucket_allows_burst_then_rejects():
+    limiter = TokenBucketLimiter(rate_per_second=1.0, burst=2)
+    assert limiter.consume("session:a") == (True, 0)
+    assert limiter.consume("session:a") == (True, 0)
+    allowed, retry_after = limiter.consume("session:a")
+    assert not allowed and retry_after >= 1
+    # Other clients have their own bucket
+    assert limiter.consume("session:b")[0]
+
+
+def test_limiter_rejects_when_queue_full():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=1.0, retry_after=3)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire()
+        assert rejected.value.retry_after == 3
+
+        release.set()
+        await asyncio.gather(holder, queued)
+        assert limiter.active == 0 and limiter.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_submit_rate_limited_per_client_whatever_the_session(client, complaint):
+    import admission
+
+    statuses = [client.post("/submit-complaint", json={**complaint, "session_id": f"rotated-{attempt}"}).status_code
+                for attempt in range(int(admission.SUBMIT_RATE_BURST) + 1)]
+
+    assert statuses[:-1] == [200] * int(admission.SUBMIT_RATE_BURST)
+    assert statuses[-1] == 429
+
+
+def test_token_bucket_forgets_clients_whose_bucket_refilled(monkeypatch):
+    import admission
+
+    clock = [1000.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: clock[0])
+    limiter = TokenBucketLimiter(rate_per_second=1.0, burst=2)
+    for number in range(50):
+        limiter.consume(f"session:{number}")
+    assert len(limiter._buckets) == 50
+
+    clock[0] += 1.5  # a bucket left with 1 token is full again after 1s
+    limiter.consume("session:a")
+    limiter.consume("session:a")
+    assert list(limiter._buckets) == ["session:a"]
+    assert limiter.consume("session:a")[0] is False
+
+
+def test_webhook_is_sent_after_the_admission_slot_is_released(client, complaint, monkeypatch):
+    import database
+    import main
+
+    held = []
+
+    def send_webhook_notification(db_data, complaint_id):
+        held.append(main.submit_limiter.active)
+        return True
+
+    monkeypatch.setattr(database, "send_webhook_notification", send_webhook_notification)
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+    assert held == [0]
@@ -0,0 +1,117 @@
+from benchmarks.standins import stored_rows
+
+
+def test_health(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+
+def test_chat_is_generic_acknowledgment(client):
+    response = client.post("/chat", json={"message": "There's a large pothole on Main Street", "session_id": "s1"})
+    assert response.status_code == 200
+    reply = response.json()["reply"].lower()
+    assert "pothole" not in reply and "location" not in reply
+
+
+def test_submit_complaint_saves_and_notifies(client, fake_db, webhook_receiver, complaint):
+    received_before = webhook_receiver.received
+    response = client.post("/submit-complaint", json=complaint)
+
+    assert response.json()["success"] is True
+    rows = stored_rows(fake_db, "complaints")
+    assert len(rows) == 1
+    assert rows[0]["issue_type"] == "road_traffic"
+    assert webhook_receiver.received == received_before + 1
+    payload = webhook_receiver.payloads[-1]
+    assert payload["event"] == "complaint_submitted"
+    assert payload["complaint"]["id"] == rows[0]["id"]
+
+
+def test_submit_complaint_validation_failure(client, fake_db, complaint):
+    complaint["email"] = "not-an-email"
+    body = client.post("/submit-complaint", json=complaint).json()
+
+    assert body["success"] is False
+    assert body["details"]["email"]["valid"] is False
+    assert stored_rows(fake_db, "complaints") == []
+
+
+def test_chat_batch_sends_turns_and_submission_in_one_request(client, fake_db, monkeypatch, complaint):
+    import main
+
+    turns = [
+        {"message": complaint["issue_type"], "field": "issue_type", "sent_at": 1_700_000_000},
+        {"message": complaint["complaint_description"], "field": "complaint_description"},
+        {"message": complaint["location"], "field": "location"},
+        {"message": "J", "field": "citizen_name"},
+        {"message": "Is anyone there?"},
+    ]
+    body = client.post("/chat/batch", json={"session_id": "s-batch", "turns": turns, "submission": complaint}).json()
+
+    assert len(body["turns"]) == 5 and all(turn["reply"] for turn in body["turns"])
+    assert body["turns"][0]["valid"] is True and body["turns"][3] == {
+        **body["turns"][3], "field": "citizen_name", "valid": False
+    }
+    assert "field" not in body["turns"][4]
+    assert body["submission"]["success"] is True and body["submission"]["status"] == 200
+    rows = stored_rows(fake_db, "complaints")
+    assert [row["id"] for row in rows] == [body["submission"]["complaint_id"]]
+
+    # The queued turns are the complaint's transcript, with the time they were typed
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    lines = client.get(f"/complaints/{rows[0]['id']}/transcript", headers={"X-Admin-Token": "secret"}).text.splitlines()
+    assert len(lines) == 10 and lines[0].startswith('{"at":1700000000.0,"role":"user"')
+
+    # Turns alone, and an invalid submission reported alongside the replies
+    assert client.post("/chat/batch", json={"turns": turns[:1]}).json()["submission"] is None
+    invalid = client.post("/chat/batch", json={"turns": [], "submission": {**complaint, "email": "x"}}).json()
+    assert invalid["submission"]["success"] is False and invalid["submission"]["details"]["email"]["valid"] is False
+    assert client.post("/chat/batch", json={"turns": turns * 11}).status_code == 422
+
+
+def test_reset_and_expiry_free_session_state(client, monkeypatch):
+    import main
+    from sessions import session_store
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    for session_id in ("s-reset", "s-idle-1", "s-idle-2"):
+        client.post("/chat", json={"message": "There's a large pothole on Main Street", "session_id": session_id})
+    before = client.get("/metrics", headers=admin).json()["sessions"]
+
+    assert client.post("/reset", json={"session_id": "s-reset"}).json()["freed"] is True
+    assert "s-reset" not in session_store
+    assert client.post("/reset", json={"session_id": "s-reset"}).json()["freed"] is False
+    assert client.post("/reset").json()["status"] == "success"  # older clients send no body
+
+    assert client.post("/sessions/expire?idle_s=3600", headers=admin).json()["expired"] == 0
+    expired = client.post("/sessions/expire?idle_s=0", headers=admin).json()
+    assert expired["expired"] == 2 and expired["reclaimed_bytes"] > 0 and expired["active"] == 0
+    after = client.get("/metrics", headers=admin).json()["sessions"]
+    assert after["reclaimed_sessions"] == before["reclaimed_sessions"] + 3
+    assert after["reclaimed_bytes"] > before["reclaimed_bytes"] + expired["reclaimed_bytes"]
+
+
+def test_oversized_bodies_are_rejected_before_parsing(client, fake_db, complaint):
+    from admission import SUBMIT_BODY_MAX_BYTES, body_limits
+
+    before = body_limits.stats()
+    padded = {**complaint, "padding": "x" * SUBMIT_BODY_MAX_BYTES}
+    declared = client.post("/submit-complaint", json=padded)
+    assert declared.status_code == 413 and declared.headers["connection"] == "close"
+
+    # No Content-Length: counted chunk by chunk and cut off at the limit
+    chunks = iter([b'{"padding": "', *[b"x" * 4096] * 8, b'"}'])
+    streamed = client.post("/submit-complaint", content=chunks, headers={"Content-Type": "application/json"})
+    assert streamed.status_code == 413
+    after = body_limits.stats()
+    assert after["rejected_declared"] == before["rejected_declared"] + 1
+    assert after["rejected_streamed"] == before["rejected_streamed"] + 1
+    assert stored_rows(fake_db, "complaints") == []
+
+    # Under the route's limit but over a field cap: a validation failure, not a save
+    body = client.post("/submit-complaint", json={**complaint, "citizen_name": "J" * 101}).json()
+    assert body["success"] is False and "at most 100" in body["details"]["citizen_name"]["message"]
+    assert client.post("/chat", json={"message": "x" * 2001, "session_id": "s1"}).status_code == 422
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
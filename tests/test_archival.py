@@ -0,0 +1,107 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from archival import ComplaintArchive, archive_old_months, count_archive_rows, list_complaints
+from local_supabase import LocalSupabase
+
+NOW = datetime(2026, 6, 15, tzinfo=timezone.utc)
+
+
+def seed(db):
+    rows = []
+    for month in (1, 2, 3, 5, 6):
+        for day, issue_type in ((3, "road_traffic"), (10, "water_plumbing"), (20, "road_traffic")):
+            rows.append({
+                "citizen_name": f"Citizen {month}-{day}",
+                "issue_type": issue_type,
+                "created_at": datetime(2026, month, day, 9, tzinfo=timezone.utc).isoformat(),
+            })
+    db.table("complaints").insert(rows).execute()
+
+
+def test_old_months_are_exported_then_detached(tmp_path):
+    db = LocalSupabase()
+    seed(db)
+    archive = ComplaintArchive(str(tmp_path))
+
+    assert archive_old_months(db, archive, after_months=3, now=NOW) == ["2026-01", "2026-02"]
+    assert archive_old_months(db, archive, after_months=3, now=NOW) == []
+
+    entry = archive.manifest()["2026-01"]
+    assert entry["rows"] == 3
+    assert count_archive_rows(str(tmp_path / entry["file"])) == 3
+    live = db.table("complaints").select("created_at").order("created_at").execute().data
+    assert [row["created_at"][:7] for row in live] == ["2026-03"] * 3 + ["2026-05"] * 3 + ["2026-06"] * 3
+    # A fresh reader picks the manifest up from disk
+    assert ComplaintArchive(str(tmp_path)).read_month(date(2026, 2, 1))[0]["citizen_name"] == "Citizen 2-3"
+
+
+def test_reads_span_archived_and_live_months(tmp_path):
+    db = LocalSupabase()
+    seed(db)
+    archive = ComplaintArchive(str(tmp_path))
+    archive_old_months(db, archive, after_months=3, now=NOW)
+
+    everything = list_complaints(db, archive, date(2026, 1, 1), date(2026, 6, 1), limit=100)
+    assert everything["archived_months"] == ["2026-01", "2026-02"]
+    assert [row["citizen_name"] for row in everything["complaints"]][:4] == \
+        ["Citizen 1-3", "Citizen 1-10", "Citizen 1-20", "Citizen 2-3"]
+    assert everything["count"] == 15
+
+    roads = list_complaints(db, archive, date(2026, 1, 1), date(2026, 6, 1), issue_type="road_traffic")
+    assert roads["count"] == 10
+
+    # A page that starts in an archived month and ends in the database
+    page = list_complaints(db, archive, date(2026, 1, 1), date(2026, 6, 1), limit=4, offset=4)
+    assert [row["citizen_name"] for row in page["complaints"]] == \
+        ["Citizen 2-10", "Citizen 2-20", "Citizen 3-3", "Citizen 3-10"]
+
+
+def test_complaints_endpoint_requires_admin_and_valid_months(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    assert client.get("/complaints", params={"from_month": "2026-01"}).status_code == 403
+
+    headers = {"X-Admin-Token": "secret"}
+    assert client.get("/complaints", params={"from_month": "January"}, headers=headers).status_code == 400
+    response = client.get("/complaints", params={"from_month": "2026-01", "to_month": "2026-02"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["complaints"] == []
+
+
+def test_month_is_recorded_only_once_the_database_detaches_it(tmp_path, monkeypatch):
+    import local_supabase
+
+    db = LocalSupabase()
+    seed(db)
+    archive = ComplaintArchive(str(tmp_path))
+    detach = local_supabase.LOCAL_FUNCTIONS["detach_complaint_partition"]
+
+    def failing(client, params):
+        raise RuntimeError("connection lost")
+
+    # The detach fails: nothing is recorded and the next run tries again
+    monkeypatch.setitem(local_supabase.LOCAL_FUNCTIONS, "detach_complaint_partition", failing)
+    with pytest.raises(RuntimeError):
+        archive_old_months(db, archive, after_months=3, now=NOW)
+    assert archive.manifest() == {}
+
+    # Nothing to detach (NULL): the month stays live and its file is dropped
+    monkeypatch.setitem(local_supabase.LOCAL_FUNCTIONS, "detach_complaint_partition", lambda client, params: None)
+    assert archive_old_months(db, archive, after_months=3, now=NOW) == []
+    assert archive.manifest() == {} and archive.unrecorded_months() == []
+
+    # Detached, then the run stopped before writing the manifest: the next run records the file
+    monkeypatch.setitem(local_supabase.LOCAL_FUNCTIONS, "detach_complaint_partition", detach)
+    def interrupted(month, entry):
+        raise OSError("stopped before the manifest was written")
+
+    monkeypatch.setattr(archive, "record", interrupted)
+    with pytest.raises(OSError):
+        archive_old_months(db, archive, after_months=3, now=NOW)
+    monkeypatch.undo()
+    assert archive_old_months(db, archive, after_months=3, now=NOW) == ["2026-01", "2026-02"]
+    assert archive.manifest()["2026-01"]["rows"] == 3
+    assert list_complaints(db, archive, date(2026, 1, 1), date(2026, 2, 1))["count"] == 6
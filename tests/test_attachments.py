@@ -0,0 +1,192 @@
+import asyncio
+import io
+import os
+import time
+
+import pytest
+from postgrest.exceptions import APIError
+
+from attachments import AttachmentStore, UploadError, strip_jpeg_metadata, strip_png_metadata
+
+# SOI, APP0 (JFIF), APP1 (EXIF with a GPS tag), DQT, SOS and scan data, EOI
+JPEG = (
+    b"\xff\xd8"
+    + b"\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    + b"\xff\xe1\x00\x10Exif\x00\x00GPS-12.9"
+    + b"\xff\xdb\x00\x05\x00\x01\x02"
+    + b"\xff\xda\x00\x08\x01\x01\x00\x00\x3f\x00" + b"\x12\x34\xff\x00\x56" * 50
+    + b"\xff\xd9"
+)
+PNG = (
+    b"\x89PNG\r\n\x1a\n"
+    + b"\x00\x00\x00\x04IHDR" + b"\x00\x00\x00\x01" + b"crc!"
+    + b"\x00\x00\x00\x06eXIfGPS-12" + b"crc!"
+    + b"\x00\x00\x00\x03IDATabc" + b"crc!"
+    + b"\x00\x00\x00\x00IEND" + b"crc!"
+)
+
+
+def test_metadata_is_stripped_without_touching_image_data():
+    stripped = io.BytesIO()
+    strip_jpeg_metadata(io.BytesIO(JPEG), stripped)
+    assert b"Exif" not in stripped.getvalue() and b"JFIF" in stripped.getvalue()
+    assert stripped.getvalue() == JPEG.replace(b"\xff\xe1\x00\x10Exif\x00\x00GPS-12.9", b"")
+
+    stripped = io.BytesIO()
+    strip_png_metadata(io.BytesIO(PNG), stripped)
+    assert b"eXIf" not in stripped.getvalue() and stripped.getvalue().endswith(b"IENDcrc!")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    import attachments
+
+    store = AttachmentStore(str(tmp_path / "attachments"))
+    monkeypatch.setattr(attachments, "attachment_store", store)
+    return store
+
+
+def test_oversized_chunk_keeps_the_bytes_before_it_and_reports_their_offset(store):
+    upload = store.create("complaint", "photo.jpg", "image/jpeg", 10)
+
+    async def chunks():
+        yield b"abc"
+        yield b"defghijk"
+
+    with pytest.raises(UploadError) as raised:
+        asyncio.run(store.append({**upload, "offset": 0}, 0, chunks()))
+    assert raised.value.status == 413 and raised.value.offset == 3
+    assert store.get(upload["upload_id"])["offset"] == 3
+
+
+def test_resumable_upload_dedupes_and_serves_stripped_photo(client, fake_db, monkeypatch, complaint, store):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+    complaint_id = fake_db.table("complaints").select("id").execute().data[-1]["id"]
+
+    started = client.post(f"/complaints/{complaint_id}/attachments",
+                          json={"filename": "../pothole.jpg", "content_type": "image/jpeg", "size": len(JPEG)})
+    assert started.status_code == 201
+    upload_id = started.json()["upload_id"]
+    url = f"/attachments/uploads/{upload_id}"
+
+    first = client.patch(url, content=JPEG[:100], headers={"Upload-Offset": "0"})
+    assert first.json() == {"upload_id": upload_id, "offset": 100, "size": len(JPEG), "complete": False}
+    # A retried chunk at a stale offset is refused; HEAD says where to resume
+    assert client.patch(url, content=JPEG[:100], headers={"Upload-Offset": "0"}).status_code == 409
+    assert client.head(url).headers["Upload-Offset"] == "100"
+    store._hashers.clear()  # as after a restart: the hash is rebuilt from the stored bytes
+    done = client.patch(url, content=JPEG[100:], headers={"Upload-Offset": "100"}).json()
+    assert done["complete"] is True
+    attachment = done["attachment"]
+    assert attachment["filename"] == "pothole.jpg" and attachment["status"] == "processing"
+
+    # The same photo again is the same attachment, and nothing new is stored
+    again = client.post(f"/complaints/{complaint_id}/attachments",
+                        json={"filename": "copy.jpg", "content_type": "image/jpeg", "size": len(JPEG)}).json()
+    duplicate = client.patch(f"/attachments/uploads/{again['upload_id']}", content=JPEG,
+                             headers={"Upload-Offset": "0"}).json()
+    assert duplicate["attachment"]["id"] == attachment["id"]
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        listed = client.get(f"/complaints/{complaint_id}/attachments", headers=admin).json()["attachments"]
+        if listed[0]["status"] != "processing":
+            break
+        time.sleep(0.1)
+    assert len(listed) == 1 and listed[0]["status"] == "ready"
+    photo = client.get(f"/attachments/{attachment['id']}", headers=admin)
+    assert photo.status_code == 200 and b"Exif" not in photo.content and photo.content.endswith(b"\xff\xd9")
+
+    assert client.post("/complaints/not-a-complaint/attachments",
+                       json={"filename": "a.jpg", "content_type": "image/jpeg", "size": 10}).status_code == 404
+    assert client.post(f"/complaints/{complaint_id}/attachments",
+                       json={"filename": "a.gif", "content_type": "image/gif", "size": 10}).status_code == 415
+    bogus = client.post(f"/complaints/{complaint_id}/attachments",
+                        json={"filename": "a.jpg", "content_type": "image/jpeg", "size": 4}).json()
+    response = client.patch(f"/attachments/uploads/{bogus['upload_id']}", content=b"GIF8",
+                            headers={"Upload-Offset": "0"})
+    assert response.status_code == 415
+
+
+def test_photo_is_processed_again_after_a_failed_attempt(client, fake_db, monkeypatch, complaint, store):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+    complaint_id = fake_db.table("complaints").select("id").execute().data[-1]["id"]
+    # Sniffs as a JPEG, but the first segment is cut short
+    broken = JPEG[:20] + b"no marker here"
+
+    def upload():
+        started = client.post(f"/complaints/{complaint_id}/attachments",
+                              json={"filename": "broken.jpg", "content_type": "image/jpeg", "size": len(broken)})
+        return client.patch(f"/attachments/uploads/{started.json()['upload_id']}", content=broken,
+                            headers={"Upload-Offset": "0"}).json()["attachment"]
+
+    def settled():
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            listed = client.get(f"/complaints/{complaint_id}/attachments",
+                                headers={"X-Admin-Token": "secret"}).json()["attachments"]
+            if listed[0]["status"] != "processing":
+                return listed
+            time.sleep(0.1)
+        return listed
+
+    first = upload()
+    listed = settled()
+    assert len(listed) == 1 and listed[0]["status"] == "failed"
+    assert not os.path.exists(store.object_path(first["sha256"], ".raw"))
+
+    # Uploading it again is processed again rather than left "processing" behind the failed attempt
+    again = upload()
+    assert again["id"] == first["id"] and again["status"] == "processing"
+    assert settled()[0]["status"] == "failed"
+    assert not os.path.exists(store.object_path(first["sha256"], ".raw"))
+
+
+def test_photo_left_without_a_job_is_processed(client, fake_db, monkeypatch, complaint, store):
+    import attachments
+
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+    complaint_id = fake_db.table("complaints").select("id").execute().data[-1]["id"]
+
+    def upload(error_rate=0.0):
+        started = client.post(f"/complaints/{complaint_id}/attachments",
+                              json={"filename": "pothole.jpg", "content_type": "image/jpeg", "size": len(JPEG)})
+        fake_db.faults.error_rate = error_rate
+        try:
+            return client.patch(f"/attachments/uploads/{started.json()['upload_id']}", content=JPEG,
+                                headers={"Upload-Offset": "0"})
+        finally:
+            fake_db.faults.error_rate = 0.0
+
+    def settled():
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            rows = fake_db.table("complaint_attachments").select("*").execute().data
+            if rows[0]["status"] != "processing":
+                break
+            time.sleep(0.1)
+        return rows
+
+    # The photo is moved into storage, then recording it fails: no job is scheduled
+    with pytest.raises(APIError):
+        upload(error_rate=1.0)
+    sha256, = store.unprocessed()
+
+    # The next upload of the same photo schedules it instead of waiting on a job that does not exist
+    attachment = upload().json()["attachment"]
+    assert attachment["sha256"] == sha256 and attachment["status"] == "processing"
+    assert settled()[0]["status"] == "ready"
+
+    # As after a restart mid-job: the `.raw` is back and the row is "processing", with no job behind it
+    os.replace(store.object_path(sha256), store.object_path(sha256, ".raw"))
+    fake_db.table("complaint_attachments").update({"status": "processing"}).eq("sha256", sha256).execute()
+    assert attachments.resume_processing(fake_db, store) == 1
+    assert attachments.resume_processing(fake_db, store) == 0
+    assert settled()[0]["status"] == "ready" and store.unprocessed() == []
@@ -0,0 +1,80 @@
+import os
+
+from events import EventLog, LifecycleStats
+
+
+def fill(log, count, start=0):
+    for number in range(start, start + count):
+        log.append("submitted", f"c{number}", issue_type="road_traffic" if number % 2 else "water_plumbing")
+        if number % 3 == 0:
+            log.append("status_changed", f"c{number}", **{"from": "open", "to": "acknowledged", "operator": "op"})
+
+
+def test_append_replay_across_segments_and_torn_tail(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=2048)
+    fill(log, 100)
+    assert log.last_seq == 134 and len(log.segments()) > 3
+    seqs = [event["seq"] for event in log.replay()]
+    assert seqs == list(range(1, 135))
+    assert [event["seq"] for event in log.replay(after=97)] == list(range(98, 135))
+    assert [event["seq"] for event in log.read(after=130, limit=2)] == [131, 132]
+    log.close()
+
+    # A crash mid-write leaves half a line; reopening drops it and carries on numbering
+    _, last_segment = log.segments()[-1]
+    with open(last_segment, "ab") as f:
+        f.write(b'{"seq":135,"ts":1,"type":"subm')
+    reopened = EventLog(str(tmp_path), segment_bytes=2048)
+    assert reopened.append("escalated", "c1")["seq"] == 135
+    assert [event["seq"] for event in reopened.replay(after=133)] == [134, 135]
+    reopened.close()
+
+
+def test_snapshot_and_tail_rebuild_matches_full_replay(tmp_path):
+    log = EventLog(str(tmp_path), segment_bytes=4096)
+    live = LifecycleStats()
+    assert log.attach(live) == {"snapshot_seq": 0, "replayed": 0, "seq": 0}
+    fill(log, 200)
+    assert log.snapshot() == log.last_seq
+    fill(log, 50, start=200)
+    log.close()
+    assert os.path.exists(tmp_path / "snapshots" / "lifecycle_stats.json")
+
+    restarted = EventLog(str(tmp_path), segment_bytes=4096)
+    rebuilt = LifecycleStats()
+    assert restarted.attach(rebuilt) == {"snapshot_seq": 267, "replayed": 67, "seq": 334}
+    full = LifecycleStats()
+    for event in restarted.replay():
+        full.apply(event)
+    assert rebuilt.summary() == full.summary() == live.summary()
+    assert rebuilt.summary()["complaints_by_status"] == {"open": 166, "acknowledged": 84}
+    restarted.close()
+
+
+def test_complaint_lifecycle_is_recorded(client, monkeypatch, complaint, event_log):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    first = client.post("/submit-complaint", json=complaint).json()["complaint_id"]
+    second = client.post("/submit-complaint", json=complaint).json()["complaint_id"]
+    client.patch(f"/complaints/{first}/status", json={"status": "acknowledged", "operator": "asha"}, headers=admin)
+
+    events = client.get("/events", headers=admin).json()["events"]
+    by_type = {}
+    for event in events:
+        by_type.setdefault(event["type"], []).append(event)
+    assert [e["complaint_id"] for e in by_type["submitted"]] == [first, second]
+    # The second report of the same pothole joined the first one's cluster
+    assert [e["complaint_id"] for e in by_type["deduplicated"]] == [second]
+    assert by_type["routed"][0]["destinations"] == ["default"]
+    assert all(e["channel"] == "webhook" and e["ok"] for e in by_type["notified"])
+    assert by_type["status_changed"] == [{**by_type["status_changed"][0], "complaint_id": first,
+                                          "from": "open", "to": "acknowledged", "operator": "asha"}]
+
+    after = events[-2]["seq"]
+    assert [e["seq"] for e in client.get(f"/events?after={after}", headers=admin).json()["events"]] == [after + 1]
+    stats = client.get("/events/stats", headers=admin).json()
+    assert stats["complete"] is True
+    assert stats["complaints_by_status"] == {"open": 1, "acknowledged": 1}
+    assert stats["events"]["submitted"] == 2
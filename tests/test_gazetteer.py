@@ -0,0 +1,43 @@
+import os
+
+from gazetteer import Gazetteer, normalize_location
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "backend", "gazetteer.example.json")
+
+
+def test_variants_and_typos_resolve_to_one_location():
+    gazetteer = Gazetteer.load(EXAMPLE_PATH)
+    assert normalize_location("M.G. Rd") == normalize_location("mg road") == "mg road"
+
+    for text in ["MG Rd", "M.G. Road", "mg road near metro", "MG ROAD, Bengaluru"]:
+        assert gazetteer.resolve(text).id == "street-mg-road"
+    assert gazetteer.resolve("near MG Road Metro").id == "landmark-mg-road-metro"
+
+    match = gazetteer.resolve("Secter 4")
+    assert match.id == "area-sector-4" and match.distance == 1
+    assert gazetteer.resolve("sector4").id == "area-sector-4"
+    assert gazetteer.resolve("Silk Bord junction").id == "landmark-silk-board-junction"
+    assert gazetteer.resolve("somewhere unknown") is None
+
+
+def test_suggest_ranks_names_and_serves_endpoint(client, monkeypatch, complaint):
+    import database
+
+    gazetteer = Gazetteer.load(EXAMPLE_PATH)
+    names = [entry["name"] for entry in gazetteer.suggest("mg")]
+    assert names == ["MG Road", "MG Road Metro Station"]
+    # Later words of a name match too, and a partial last word is not expanded
+    assert "Silk Board Junction" in [entry["name"] for entry in gazetteer.suggest("junc")]
+    assert [entry["name"] for entry in gazetteer.suggest("church st")] == ["Church Street"]
+
+    assert client.get("/locations/suggest", params={"q": "mg"}).status_code == 503
+    monkeypatch.setattr(database, "gazetteer", gazetteer)
+    response = client.get("/locations/suggest", params={"q": "M.G.", "limit": 1})
+    assert response.status_code == 200
+    assert response.json() == [{"id": "street-mg-road", "name": "MG Road", "kind": "street"}]
+
+    complaint["location"] = "M.G. Rd near the metro"
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+    stored = database.get_supabase_client().table("complaints").select("*").execute().data
+    assert stored[-1]["location_id"] == "street-mg-road"
@@ -0,0 +1,92 @@
+import os
+
+from geo_index import GridIndex, geohash_encode
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "backend", "gazetteer.example.json")
+
+
+def test_radius_query_orders_by_distance_and_skips_far_points():
+    index = GridIndex(cell_meters=100)
+    # MG Road metro; ~110m north; ~1.1km east
+    index.add({"id": "a", "latitude": 12.9755, "longitude": 77.6069})
+    index.add({"id": "b", "latitude": 12.9765, "longitude": 77.6069})
+    index.add({"id": "c", "latitude": 12.9755, "longitude": 77.6170})
+    index.add({"id": "d", "latitude": None, "longitude": None})
+    index.add({"id": "a", "latitude": 0.0, "longitude": 0.0})  # already indexed
+
+    ranked, total = index.nearby(12.9756, 77.6069, 500)
+    assert total == 2
+    assert [complaint_id for complaint_id, _ in ranked] == ["a", "b"]
+    assert 10 <= ranked[0][1] <= 12 and 95 <= ranked[1][1] <= 105
+
+    assert index.nearby(12.9756, 77.6069, 2000, limit=1)[0][0][0] == "a"
+    assert index.nearby(12.9756, 77.6069, 2000)[1] == 3
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_nearby_endpoint_uses_gazetteer_and_client_coordinates(client, monkeypatch, complaint):
+    import database
+    import main
+    from gazetteer import Gazetteer
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(database, "gazetteer", Gazetteer.load(GAZETTEER_PATH))
+    complaint["location"] = "Silk Board junction"
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+    complaint.update(location="Somewhere off the map", latitude=12.9180, longitude=77.6240)
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+    complaint.update(latitude=123.0)
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is False
+
+    response = client.get("/complaints/nearby", params={"lat": 12.9177, "lon": 77.6238, "radius": 200},
+                          headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 2
+    assert [row["location"] for row in body["results"]] == ["Silk Board junction", "Somewhere off the map"]
+    assert body["results"][0]["location_id"] == "landmark-silk-board-junction"
+    assert "email" not in body["results"][0]
+
+
+def test_poles_antimeridian_and_closed_complaints():
+    index = GridIndex(cell_meters=250)
+    index.add({"id": "pole", "latitude": 89.999, "longitude": 12.0})
+    index.add({"id": "east", "latitude": -16.5, "longitude": 179.999})
+    index.add({"id": "west", "latitude": -16.5, "longitude": -179.999})
+    index.add({"id": "done", "latitude": -16.5, "longitude": 179.998, "status": "resolved"})
+
+    # Every longitude is within reach of the pole: the query must not walk the column range cell by cell
+    ranked, total = index.nearby(90.0, 0.0, 500)
+    assert total == 1 and ranked[0][0] == "pole" and 105 <= ranked[0][1] <= 118
+
+    ranked, total = index.nearby(-16.5, 180.0, 500)
+    assert total == 2 and {complaint_id for complaint_id, _ in ranked} == {"east", "west"}
+    assert all(distance < 200 for _, distance in ranked)
+    assert index.nearby(-16.5, -180.0, 500, open_only=False)[1] == 3
+
+    index.status_changed({"id": "east", "status": "acknowledged"})
+    index.status_changed({"id": "done", "status": "open"})
+    assert [complaint_id for complaint_id, _ in index.nearby(-16.5, 179.9985, 500)[0]] == ["done", "west"]
+    assert index.nearby(-16.5, 179.9985, 500, limit=1)[1] == 2
+
+
+def test_queries_while_complaints_are_added():
+    import threading
+
+    index = GridIndex(cell_meters=100)
+    done = threading.Event()
+
+    def add():
+        for number in range(20000):
+            index.add({"id": f"c{number}", "latitude": 12.9755 + number % 50 * 1e-5, "longitude": 77.6069,
+                       "status": "resolved" if number % 3 else "open"})
+        done.set()
+
+    thread = threading.Thread(target=add)
+    thread.start()
+    while not done.is_set():
+        ranked, total = index.nearby(12.9755, 77.6069, 100, limit=5)
+        assert len(ranked) == min(total, 5)
+    thread.join()
+    assert index.nearby(12.9755, 77.6069, 100)[1] == 6667
@@ -0,0 +1,35 @@
+from http_client import DNSCache, OutboundClients
+
+
+def test_notifications_reuse_one_connection(webhook_receiver):
+    clients = OutboundClients(max_connections=1, max_keepalive=1)
+    connections_before = webhook_receiver.connections
+    try:
+        for n in range(5):
+            assert clients.post_json(webhook_receiver.url, {"n": n}, timeout=5).status_code == 200
+    finally:
+        clients.close()
+    assert webhook_receiver.connections - connections_before == 1
+
+
+def test_clients_are_per_origin():
+    clients = OutboundClients()
+    assert clients.get("http://a.example/hook") is clients.get("http://a.example:80/other")
+    assert clients.get("http://a.example/hook") is not clients.get("https://a.example/hook")
+    clients.close()
+
+
+def test_dns_cache_reuses_lookups(monkeypatch):
+    import socket
+
+    lookups = []
+
+    def fake_getaddrinfo(host, port, type=0):
+        lookups.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", fake_getaddrinfo)
+    cache = DNSCache(ttl=60)
+    assert cache.resolve("hooks.example", 443) == ["127.0.0.1"]
+    assert cache.resolve("hooks.example", 443) == ["127.0.0.1"]
+    assert lookups == ["hooks.example"]
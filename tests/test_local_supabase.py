@@ -0,0 +1,86 @@
+import pytest
+from postgrest.exceptions import APIError
+
+from local_supabase import LOCAL_ANON_KEY, FaultInjector, LocalPostgRESTServer, LocalSupabase
+
+
+def test_insert_and_filtered_select():
+    db = LocalSupabase()
+    db.table("complaints").insert([
+        {"issue_type": "road_traffic", "location": "MG Road"},
+        {"issue_type": "water_plumbing", "location": "Sector 4"},
+        {"issue_type": "road_traffic", "location": "Ring Road"},
+    ]).execute()
+
+    result = db.table("complaints").select("location").eq("issue_type", "road_traffic") \
+        .order("location", desc=True).limit(1).execute()
+    assert result.data == [{"location": "Ring Road"}]
+
+    updated = db.table("complaints").update({"status": "resolved"}).eq("location", "Sector 4").execute()
+    assert updated.data[0]["status"] == "resolved"
+
+
+def test_injected_rls_failure_only_on_writes():
+    db = LocalSupabase(faults=FaultInjector(rls_failure_rate=1.0, seed=1))
+    assert db.table("complaints").select("*").execute().data == []
+    with pytest.raises(APIError) as error:
+        db.table("complaints").insert({"location": "MG Road"}).execute()
+    assert "row-level security policy" in str(error.value.message)
+
+
+def test_injected_errors_are_seeded():
+    def outcomes():
+        db = LocalSupabase(faults=FaultInjector(error_rate=0.5, seed=7))
+        results = []
+        for _ in range(20):
+            try:
+                db.table("complaints").insert({"n": 1}).execute()
+                results.append(True)
+            except APIError:
+                results.append(False)
+        return results
+
+    assert outcomes() == outcomes()
+
+
+def test_real_supabase_client_over_http():
+    from supabase import create_client
+
+    server = LocalPostgRESTServer(LocalSupabase()).start()
+    try:
+        client = create_client(server.url, LOCAL_ANON_KEY)
+        inserted = client.table("complaints").insert({"issue_type": "garbage_waste"}).execute()
+        assert inserted.data[0]["id"]
+
+        selected = client.table("complaints").select("*").eq("id", inserted.data[0]["id"]).execute()
+        assert selected.data[0]["issue_type"] == "garbage_waste"
+    finally:
+        server.stop()
+
+
+def test_malformed_requests_over_http_are_answered_400():
+    import http.client
+    import json
+
+    server = LocalPostgRESTServer(LocalSupabase()).start()
+    try:
+        host, port = server.server_address[:2]
+
+        def request(method, path, body=None):
+            connection = http.client.HTTPConnection(host, port, timeout=5)
+            try:
+                connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+                response = connection.getresponse()
+                return response.status, json.loads(response.read() or b"null")
+            finally:
+                connection.close()
+
+        assert request("GET", "/rest/v1/complaints?limit=ten")[0] == 400
+        assert request("GET", "/rest/v1/complaints?offset=-x")[0] == 400
+        status, error = request("GET", "/rest/v1/complaints?status=near.open")
+        assert status == 400 and error["code"] == "PGRST100"
+        assert request("POST", "/rest/v1/complaints", body=b"{not json")[0] == 400
+        assert request("GET", "/rest/v1/complaints?bad;column=eq.1")[0] == 400
+        assert request("GET", "/rest/v1/complaints?limit=1") == (200, [])
+    finally:
+        server.stop()
@@ -0,0 +1,149 @@
+import time
+
+import pytest
+
+from benchmarks.standins import SMTPSink
+from notifications import (
+    CompiledTemplate, NotificationDispatcher, SMSProvider, SMTPProvider, TEMPLATES, render
+)
+
+ROW = {
+    "id": "3f2a9c1e-0000-4000-8000-000000000000", "citizen_name": "Asha Rao", "issue_type": "water_plumbing",
+    "location": "Ward 12, Sector 4", "email": "asha@example.com", "mobile_number": "9998887777", "status": "open",
+}
+
+
+@pytest.fixture
+def smtp_sink():
+    sink = SMTPSink().start()
+    yield sink
+    sink.stop()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+class RecordingSMS(SMSProvider):
+    def __init__(self, rate_per_minute):
+        super().__init__("sms:recording", rate_per_minute)
+        self.batches = []
+
+    def send_batch(self, messages):
+        self.batches.append((time.monotonic(), [(m.to, m.body) for m in messages]))
+        return [True] * len(messages)
+
+
+def test_templates_are_compiled_once_and_render_rows():
+    template = CompiledTemplate("Complaint {reference} at {location}.")
+    assert template.fields == ["reference", "location"]
+    assert template.render({"reference": "AB12", "location": "Ward 9"}) == "Complaint AB12 at Ward 9."
+    with pytest.raises(ValueError):
+        CompiledTemplate("{reference!r}")
+    assert all(isinstance(part, CompiledTemplate) for template in TEMPLATES.values() for part in template.values())
+
+    email = render("submitted", "email", ROW)
+    assert email.to == "asha@example.com" and email.subject == "Complaint 3F2A9C1E received"
+    assert "water/plumbing issue at Ward 12, Sector 4" in email.body
+    sms = render("status_changed", "sms", {**ROW, "status": "resolved"})
+    assert sms.to == "9998887777" and sms.body == "Complaint 3F2A9C1E has been marked as resolved."
+
+
+def test_emails_are_batched_per_smtp_session(smtp_sink):
+    provider = SMTPProvider("127.0.0.1", smtp_sink.port, starttls=False, rate_per_minute=0)
+    dispatcher = NotificationDispatcher([provider], workers=1, batch_size=10, batch_wait_s=0.2)
+    for number in range(25):
+        dispatcher.complaint_saved({**ROW, "email": f"citizen{number}@example.com"})
+    dispatcher.start()
+    wait_for(lambda: len(smtp_sink.messages) == 25)
+    dispatcher.stop()
+
+    assert smtp_sink.connections == 3
+    assert sorted(m["to"][0] for m in smtp_sink.messages) == sorted(f"citizen{n}@example.com" for n in range(25))
+    assert smtp_sink.messages[0]["message"]["Subject"] == "Complaint 3F2A9C1E received"
+    assert dispatcher.stats()[provider.name]["sent"] == 25
+
+
+def test_sms_is_rate_limited_and_rows_without_contact_are_skipped():
+    provider = RecordingSMS(rate_per_minute=600)  # 10/s, bursts of one batch
+    dispatcher = NotificationDispatcher([provider], workers=2, batch_size=5, batch_wait_s=0.05)
+    dispatcher.start()
+    for number in range(15):
+        dispatcher.status_changed({**ROW, "mobile_number": f"99988877{number:02d}", "status": "acknowledged"})
+    dispatcher.status_changed({**ROW, "mobile_number": ""})
+    wait_for(lambda: sum(len(batch) for _, batch in provider.batches) == 15)
+    dispatcher.stop()
+
+    # 15 messages at 10/s with a 5-message burst take at least a second
+    assert provider.batches[-1][0] - provider.batches[0][0] >= 0.9
+    assert all(len(batch) <= 5 for _, batch in provider.batches)
+    assert provider.batches[0][1][0][1] == "Complaint 3F2A9C1E has been acknowledged and assigned to a team."
+
+
+def test_full_queue_drops_instead_of_blocking():
+    provider = RecordingSMS(rate_per_minute=0)
+    dispatcher = NotificationDispatcher([provider], queue_size=3)
+    start = time.perf_counter()
+    for _ in range(10):
+        dispatcher.complaint_saved(ROW)
+    assert time.perf_counter() - start < 0.1
+    assert dispatcher.stats()[provider.name]["dropped"] == 7
+
+
+def test_submission_and_status_change_notify_the_citizen(client, monkeypatch, smtp_sink, complaint):
+    import main
+    from database import complaint_listeners
+    from sla import status_listeners
+
+    provider = SMTPProvider("127.0.0.1", smtp_sink.port, starttls=False, rate_per_minute=0)
+    dispatcher = NotificationDispatcher([provider], workers=1, batch_wait_s=0.01)
+    dispatcher.start()
+    complaint_listeners.append(dispatcher.complaint_saved)
+    status_listeners.append(dispatcher.status_changed)
+    try:
+        monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+        assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+        wait_for(lambda: len(smtp_sink.messages) == 1)
+        receipt = smtp_sink.messages[0]
+        assert receipt["to"] == ["john.doe@example.com"] and "received" in receipt["message"]["Subject"]
+
+        complaint_id = client.get("/triage/next", headers={"X-Admin-Token": "secret"}).json()["complaints"][0]["id"]
+        client.patch(f"/complaints/{complaint_id}/status", json={"status": "resolved"},
+                     headers={"X-Admin-Token": "secret"})
+        wait_for(lambda: len(smtp_sink.messages) == 2)
+        assert smtp_sink.messages[1]["message"]["Subject"].endswith("resolved")
+    finally:
+        complaint_listeners.remove(dispatcher.complaint_saved)
+        status_listeners.remove(dispatcher.status_changed)
+        dispatcher.stop()
+
+
+def test_session_failure_retries_only_the_unsent_emails(smtp_sink, monkeypatch):
+    import smtplib
+
+    send_message = smtplib.SMTP.send_message
+    calls = []
+
+    def disconnect_on_third(smtp, message):
+        calls.append(message["To"])
+        if len(calls) == 3:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return send_message(smtp, message)
+
+    monkeypatch.setattr(smtplib.SMTP, "send_message", disconnect_on_third)
+    provider = SMTPProvider("127.0.0.1", smtp_sink.port, starttls=False, rate_per_minute=0)
+    dispatcher = NotificationDispatcher([provider], workers=1, batch_size=5, batch_wait_s=0.2)
+    for number in range(5):
+        dispatcher.complaint_saved({**ROW, "email": f"citizen{number}@example.com"})
+    dispatcher.start()
+    wait_for(lambda: len(smtp_sink.messages) == 5)
+    dispatcher.stop()
+
+    # The two accepted before the disconnect are not mailed again
+    assert sorted(m["to"][0] for m in smtp_sink.messages) == [f"citizen{n}@example.com" for n in range(5)]
+    assert smtp_sink.connections == 2
+    assert dispatcher.stats()[provider.name]["sent"] == 5
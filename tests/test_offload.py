@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import pytest
+
+from admission import AdmissionRejected
+from offload import ClientDisconnected, OffloadPool
+
+
+@pytest.fixture
+def pool():
+    pool = OffloadPool(thread_workers=1, process_workers=1)
+    pool.queue("blocker", concurrency=1, priority=0)
+    yield pool
+    pool.stop()
+
+
+def test_free_worker_goes_to_the_highest_priority_queue(pool):
+    pool.queue("exports", priority=2)
+    pool.queue("reads", priority=0, max_waiting=1)
+    release = threading.Event()
+    order = []
+
+    held = pool.submit("blocker", release.wait)
+    export = pool.submit("exports", order.append, "export")
+    read = pool.submit("reads", order.append, "read")
+    with pytest.raises(AdmissionRejected):
+        pool.submit("reads", order.append, "rejected")
+    assert pool.stats()["queues"]["exports"]["waiting"] == 1
+
+    release.set()
+    for future in (held, export, read):
+        future.result(timeout=5)
+    assert order == ["read", "export"]
+    stats = pool.stats()
+    assert stats["busy"]["thread"] == 0
+    assert stats["queues"]["reads"]["rejected"] == 1 and stats["queues"]["exports"]["completed"] == 1
+
+
+def test_queue_concurrency_limit_and_cancelling_a_waiting_job():
+    pool = OffloadPool(thread_workers=4, process_workers=1)
+    pool.queue("serial", concurrency=1)
+    release = threading.Event()
+    ran = []
+    try:
+        first = pool.submit("serial", release.wait)
+        second = pool.submit("serial", ran.append, "second")
+        third = pool.submit("serial", ran.append, "third")
+        assert pool.stats()["queues"]["serial"]["active"] == 1 and pool.stats()["busy"]["thread"] == 1
+
+        assert second.cancel()
+        release.set()
+        first.result(timeout=5)
+        third.result(timeout=5)
+        assert ran == ["third"]
+        assert pool.stats()["queues"]["serial"]["cancelled"] == 1
+    finally:
+        pool.stop()
+
+
+def test_run_stops_waiting_when_the_client_disconnects(pool):
+    release = threading.Event()
+    gone = asyncio.Event()
+
+    class Request:
+        async def receive(self):
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+    async def scenario():
+        assert await pool.run("blocker", sum, (1, 2)) == 3
+        waiting = asyncio.create_task(pool.run("blocker", release.wait, request=Request()))
+        await asyncio.sleep(0.05)
+        gone.set()
+        with pytest.raises(ClientDisconnected):
+            await waiting
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+    stats = pool.stats()["queues"]["blocker"]
+    assert stats["abandoned"] == 1 and stats["cancelled"] == 0
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+from postgrest.exceptions import APIError
+
+from postgres_backend import as_api_error, build_insert, build_select, coerce_value
+from resilience import is_transient_database_error
+
+TYPES = {"id": "uuid", "issue_type": "text", "created_at": "timestamp with time zone", "location": "text"}
+
+
+def test_select_compiles_to_parameterized_sql():
+    sql, params = build_select(
+        "complaints",
+        [("issue_type", "in", ["road_traffic", "garbage_waste"]),
+         ("created_at", "gte", "2026-01-01T00:00:00+00:00"),
+         ("location", "ilike", "%sector%"),
+         ("email", "is", None)],
+        TYPES, ["id", "location"], [("created_at", True)], limit=20, offset=40,
+    )
+    assert sql == (
+        'SELECT "id", "location" FROM "complaints" WHERE "issue_type" = ANY($1) AND "created_at" >= $2'
+        ' AND "location" ILIKE $3 AND "email" IS NULL ORDER BY "created_at" DESC LIMIT $4 OFFSET $5'
+    )
+    assert params[1] == datetime.fromisoformat("2026-01-01T00:00:00+00:00")
+    assert params[2:] == ["%sector%", 20, 40]
+
+    assert build_insert("complaints", ["citizen_name", "email"]) == \
+        'INSERT INTO "complaints" ("citizen_name", "email") VALUES ($1, $2) RETURNING *'
+    with pytest.raises(APIError):
+        build_select("complaints", [("id; drop table complaints", "eq", 1)], TYPES)
+    assert coerce_value({"a": 1}, "jsonb") == '{"a": 1}'
+
+
+def test_database_errors_keep_their_retry_classification():
+    class UniqueViolation(Exception):
+        sqlstate = "23505"
+
+    class AdminShutdown(Exception):
+        sqlstate = "57P01"
+
+    assert not is_transient_database_error(as_api_error(UniqueViolation("duplicate key")))
+    assert is_transient_database_error(as_api_error(AdminShutdown("terminating connection")))
+    connection_lost = ConnectionResetError("connection reset")
+    assert as_api_error(connection_lost) is connection_lost
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+import profiling
+from profiling import ProfilingMiddleware, RequestProfiler
+
+
+@pytest.fixture
+def admin(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    yield {"X-Admin-Token": "secret"}
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    profiling.profiler.set_sample_rate(0)
+    profiling.profiler.reset()
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def busy_elsewhere(seconds):
+    busy(seconds)
+
+
+def sample_while_busy(request_profiler, seconds=0.2):
+    """Profile one request during which this thread and another one are busy and a third is parked"""
+    release = threading.Event()
+    parked = threading.Thread(target=release.wait)
+    other = threading.Thread(target=busy_elsewhere, args=(seconds,))
+    parked.start()
+    other.start()
+    request_profiler.start_request()
+    try:
+        busy(seconds)
+    finally:
+        request_profiler.end_request()
+        other.join()
+        release.set()
+        parked.join()
+
+
+def test_sample_rate_is_clamped_and_rates_zero_and_one_are_exact():
+    request_profiler = RequestProfiler()
+    request_profiler.set_sample_rate(-0.5)
+    assert request_profiler.sample_rate == 0.0
+    assert not any(request_profiler.should_sample() for _ in range(1000))
+    request_profiler.set_sample_rate(7)
+    assert request_profiler.sample_rate == 1.0
+    assert all(request_profiler.should_sample() for _ in range(1000))
+
+
+def test_folded_export_is_root_first_without_parked_threads():
+    request_profiler = RequestProfiler(sample_rate=1.0, interval_ms=1)
+    sample_while_busy(request_profiler)
+
+    lines = request_profiler.export_folded().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        # Parked threads (leaf in threading.py's wait) are left out
+        assert not stack.split(";")[-1].startswith("wait (threading.py:")
+    busy_stacks = [line for line in lines if ";busy (test_profiling.py:" in line]
+    assert any("sample_while_busy (test_profiling.py:" in line for line in busy_stacks)
+    assert any("busy_elsewhere (test_profiling.py:" in line for line in busy_stacks)
+    stats = request_profiler.stats()
+    assert stats["sampled_requests"] == 1 and stats["samples"] >= len(lines)
+
+
+def test_samples_of_new_stacks_past_the_limit_are_dropped(monkeypatch):
+    monkeypatch.setattr(profiling, "MAX_DISTINCT_STACKS", 1)
+    request_profiler = RequestProfiler(sample_rate=1.0, interval_ms=1)
+    sample_while_busy(request_profiler)
+
+    stats = request_profiler.stats()
+    assert stats["distinct_stacks"] == 1 and stats["samples"] > 0 and stats["dropped_samples"] > 0
+    request_profiler.reset()
+    assert request_profiler.export_folded() == ""
+
+
+def test_middleware_samples_only_profiled_paths():
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(scope["path"])
+
+    request_profiler = RequestProfiler()
+    middleware = ProfilingMiddleware(app, request_profiler)
+
+    async def requests():
+        for path in ("/chat", "/submit-complaint", "/health"):
+            await middleware({"type": "http", "path": path}, None, None)
+
+    asyncio.run(requests())
+    assert request_profiler.sampled_requests == 0
+    request_profiler.set_sample_rate(1)
+    asyncio.run(requests())
+    assert request_profiler.sampled_requests == 2 and request_profiler._in_flight == 0
+    assert seen == ["/chat", "/submit-complaint", "/health"] * 2
+
+
+def test_debug_profile_switch_and_download(client, admin):
+    assert client.post("/debug/profile", json={"sample_rate": 1}).status_code == 403
+    assert client.get("/debug/profile").status_code == 403
+
+    switched = client.post("/debug/profile", json={"sample_rate": 3}, headers=admin).json()
+    assert switched["profile"]["sample_rate"] == 1.0
+    assert client.post("/chat", json={"message": "Streetlight out near the park", "session_id": "p1"}) \
+        .status_code == 200
+    assert client.get("/debug/profile/stats", headers=admin).json()["sampled_requests"] == 1
+
+    download = client.get("/debug/profile?reset=true", headers=admin)
+    assert download.status_code == 200 and download.headers["content-type"].startswith("text/plain")
+    assert download.headers["content-disposition"] == 'attachment; filename="profile.folded"'
+    assert client.get("/debug/profile/stats", headers=admin).json()["sampled_requests"] == 0
+
+    assert client.post("/debug/profile", json={"sample_rate": 0}, headers=admin).json()["profile"]["sample_rate"] == 0
+    client.post("/chat", json={"message": "Streetlight out near the park", "session_id": "p1"})
+    assert client.get("/debug/profile/stats", headers=admin).json()["sampled_requests"] == 0
+
+
+def test_debug_memory_reports_growth_since_tracing_started(client, admin):
+    assert client.get("/debug/memory").status_code == 403
+    idle = client.get("/debug/memory", headers=admin).json()
+    assert idle["tracing"] is False and idle["rss_mb"] > 0 and "top" not in idle
+
+    assert client.post("/debug/memory", json={"frames": 4}, headers=admin).json()["tracing"] is True
+    leaked = [bytearray(1024) for _ in range(2000)]  # noqa: F841 - held until the report is taken
+
+    report = client.get("/debug/memory?since_start=true&limit=5", headers=admin).json()
+    assert report["tracing"] is True and report["frames"] == 4
+    assert report["top"][0]["site"].startswith(f"{__file__}:")
+    assert report["top"][0]["size_diff_kb"] >= 2000 and report["top"][0]["count_diff"] >= 2000
+    by_file = client.get("/debug/memory?group_by=filename", headers=admin).json()["top"]
+    assert any(site["site"].startswith(__file__) for site in by_file)
+    assert client.get("/debug/memory?group_by=module", headers=admin).status_code == 400
+
+    assert client.post("/debug/memory", json={"frames": 0}, headers=admin).json()["tracing"] is False
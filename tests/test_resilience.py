@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from benchmarks.standins import stored_rows
+from local_supabase import FaultInjector
+from resilience import CircuitBreaker, CircuitOpenError, RetryBudget, SpillBuffer, call_with_retry
+
+
+def failing():
+    raise ConnectionError("database unreachable")
+
+
+def test_breaker_opens_then_probes_half_open():
+    breaker = CircuitBreaker("db", failure_threshold=2, recovery_timeout=0.05)
+    budget = RetryBudget(ratio=0.0, min_per_second=0.0)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            call_with_retry(failing, breaker, budget, attempts=1)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(lambda: "ok", breaker, budget)
+
+    time.sleep(0.06)
+    assert call_with_retry(lambda: "ok", breaker, budget) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_retries_stop_when_budget_is_spent():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        raise ConnectionError("timeout")
+
+    breaker = CircuitBreaker("db", failure_threshold=100)
+    budget = RetryBudget(ratio=0.0, min_per_second=0.0, max_tokens=1.0)
+    budget._tokens = 1.0
+    with pytest.raises(ConnectionError):
+        call_with_retry(flaky, breaker, budget, attempts=5, base_delay=0.0)
+    assert len(calls) == 2
+
+
+def test_spill_buffer_keeps_unhandled_records(tmp_path):
+    buffer = SpillBuffer(str(tmp_path / "spill.jsonl"))
+    for n in range(3):
+        buffer.append({"n": n})
+
+    assert buffer.drain(lambda record: record["n"] < 1) == (1, 2)
+    assert len(SpillBuffer(buffer.path)) == 2
+
+
+def test_outage_spills_and_replays(client, fake_db, complaint):
+    import database
+
+    fake_db.faults = FaultInjector(error_rate=1.0)
+    database.database_breaker.recovery_timeout = 0.0
+    body = client.post("/submit-complaint", json=complaint).json()
+    assert body["success"] is True and body["queued"] is True
+    assert len(database.spill_buffer) == 1
+    assert stored_rows(fake_db, "complaints") == []
+
+    fake_db.faults = FaultInjector()
+    assert database.replay_spilled_complaints() == 1
+    assert len(database.spill_buffer) == 0
+    assert stored_rows(fake_db, "complaints")[0]["citizen_name"] == complaint["citizen_name"]
+
+
+def lose_replies(monkeypatch, methods):
+    """Let complaint writes reach the store, then fail as if the reply was lost in transit"""
+    from postgrest.exceptions import APIError
+
+    import local_supabase
+
+    execute = local_supabase.LocalQuery.execute
+
+    def committed_then_lost(query):
+        result = execute(query)
+        if query.table_name == "complaints" and query.method in methods:
+            raise APIError({"code": "PGRST000", "message": "connection reset", "details": None, "hint": None})
+        return result
+
+    monkeypatch.setattr(local_supabase.LocalQuery, "execute", committed_then_lost)
+    return methods
+
+
+def test_retry_after_lost_reply_does_not_duplicate(client, fake_db, complaint, monkeypatch):
+    lose_replies(monkeypatch, {"insert"})
+    body = client.post("/submit-complaint", json=complaint).json()
+
+    rows = stored_rows(fake_db, "complaints")
+    assert body["success"] is True and "queued" not in body
+    assert [row["id"] for row in rows] == [body["complaint_id"]]
+
+
+def test_replay_after_lost_reply_does_not_duplicate(client, fake_db, complaint, monkeypatch):
+    import database
+
+    lost = lose_replies(monkeypatch, {"insert", "select"})
+    body = client.post("/submit-complaint", json=complaint).json()
+    assert body["queued"] is True and body["complaint_id"]
+    assert len(stored_rows(fake_db, "complaints")) == 1
+
+    lost.clear()
+    assert database.replay_spilled_complaints() == 1
+    assert [row["id"] for row in stored_rows(fake_db, "complaints")] == [body["complaint_id"]]
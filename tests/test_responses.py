@@ -0,0 +1,76 @@
+import gzip
+
+from responses import CompressionMiddleware, choose_encoding, etag_matches, make_etag
+
+
+def test_choose_encoding_honours_quality():
+    assert choose_encoding("") is None
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("identity") is None
+
+
+def test_large_bodies_are_gzipped_small_ones_are_not(client):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    # A separate app, so the test route does not leak into main.app for later tests
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/listing")
+    async def listing():
+        return {"complaints": [{"id": n, "location": "MG Road"} for n in range(500)]}
+
+    response = TestClient(app).get("/listing", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["complaints"]) == 500
+
+    health = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in health.headers
+    assert health.json() == {"status": "ok", "version": "1.0.0"}
+
+
+def test_streaming_bodies_are_compressed_incrementally():
+    import asyncio
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for n in range(300):
+            await send({"type": "http.response.body", "body": b'{"n": %d}\n' % n, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=64)(scope, None, send))
+
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    assert gzip.decompress(body).count(b"\n") == 300
+    assert (b"content-encoding", b"gzip") in sent[0]["headers"]
+
+
+def test_etags_match_if_none_match_and_are_weakened_by_compression():
+    import asyncio
+
+    etag = make_etag(b'{"status": "open"}')
+    assert etag_matches(etag, etag) and etag_matches(f'"other", W/{etag}', etag) and etag_matches("*", etag)
+    assert not etag_matches(None, etag) and not etag_matches('"other"', etag)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"etag", etag.encode())]})
+        await send({"type": "http.response.body", "body": b"[" + b"1," * 200 + b"1]"})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=64)(scope, None, send))
+    assert (b"etag", b"W/" + etag.encode()) in sent[0]["headers"]
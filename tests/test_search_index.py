@@ -0,0 +1,84 @@
+import threading
+
+from search_index import InvertedIndex, tokenize
+
+DOCS = [
+    ("1", "electricity_power", "Transformer sparking near the school, power keeps going off"),
+    ("2", "electricity_power", "Street light not working for a week"),
+    ("3", "road_traffic", "Fallen tree blocking the road near the transformer"),
+    ("4", "electricity_power", "Transformer transformer transformer humming loudly all night"),
+    ("5", "water_plumbing", "No water supply since morning in the whole block"),
+]
+
+
+def build():
+    index = InvertedIndex()
+    for complaint_id, issue_type, description in DOCS:
+        index.add({"id": complaint_id, "issue_type": issue_type, "complaint_description": description})
+    return index
+
+
+def test_bm25_ranking_filters_and_pages():
+    index = build()
+    assert tokenize("The Transformers are sparking!") == ["transformer", "sparking"]
+
+    ranked, total = index.search("transformer")
+    assert total == 3
+    assert ranked[0][0] == "4"  # highest term frequency
+    assert {complaint_id for complaint_id, _ in ranked} == {"1", "3", "4"}
+
+    ranked, total = index.search("transformers sparking", issue_type="electricity_power")
+    assert [complaint_id for complaint_id, _ in ranked] == ["1", "4"]
+    assert total == 2
+
+    page, total = index.search("transformer", limit=1, offset=1)
+    assert total == 3 and len(page) == 1 and page[0][0] != "4"
+    assert index.search("transformer", issue_type="garbage_waste") == ([], 0)
+
+    # Indexing the same complaint twice (startup build racing a save) is a no-op
+    index.add({"id": "5", "issue_type": "water_plumbing", "complaint_description": "transformer"})
+    assert index.search("transformer")[1] == 3
+
+
+def test_search_endpoint_finds_new_complaints(client, monkeypatch, complaint):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    complaint["complaint_description"] = "The transformer on Main Street is sparking every evening."
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+
+    response = client.get("/complaints/search", params={"q": "sparking transformer"},
+                          headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1
+    assert body["results"][0]["complaint_description"] == complaint["complaint_description"]
+    assert "email" not in body["results"][0]
+
+
+def test_search_while_complaints_are_being_indexed():
+    index = build()
+    errors = []
+    done = threading.Event()
+
+    def searcher():
+        try:
+            while not done.is_set():
+                index.search("transformer sparking")
+                index.search("transformer", issue_type="electricity_power")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=searcher) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    try:
+        for number in range(20000):
+            index.add({"id": f"new{number}", "issue_type": f"type{number % 50}",
+                       "complaint_description": f"transformer sparking word{number} length{number % 300}"})
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+    assert errors == []
+    assert index.search("transformer sparking")[1] == 20003
@@ -0,0 +1,121 @@
+import random
+import time
+
+from sla import EscalationScheduler, TimerWheel, sla_deadline
+
+NOW = 1_700_000_000.0
+
+
+def test_timer_wheel_fires_each_timer_on_its_tick():
+    rng = random.Random(7)
+    wheel = TimerWheel(tick_s=1.0, now=NOW)
+    # Offsets spanning every level, plus timers already due
+    expected = {}
+    for number in range(5000):
+        offset = rng.choice([rng.randint(-5, 300), rng.randint(300, 70_000), rng.randint(70_000, 20_000_000)])
+        expected[f"t{number}"] = NOW + offset
+        wheel.schedule(f"t{number}", NOW + offset)
+    for number in range(0, 5000, 3):
+        assert wheel.cancel(f"t{number}")
+        del expected[f"t{number}"]
+    wheel.schedule("t1", NOW + 42)  # rescheduling replaces the old timer
+    expected["t1"] = NOW + 42
+    assert len(wheel) == len(expected)
+
+    fired = {}
+    now = NOW
+    for step in [1, 41, 1, 299, 256 * 256, 17, 3_000_000, 20_000_000]:
+        now += step
+        for key in wheel.advance(now):
+            fired[key] = now
+    assert fired.keys() == expected.keys() and len(wheel) == 0
+    previous = NOW
+    for step_end in sorted(set(fired.values())):
+        # Every timer fired by the first advance that reached its deadline
+        assert all(previous < expected[key] <= step_end for key, at in fired.items()
+                   if at == step_end and expected[key] > NOW)
+        previous = step_end
+
+
+def test_overdue_complaints_escalate_once_and_survive_restart(fake_db, webhook_receiver, complaint):
+    from database import get_supabase_client, save_complaint
+
+    client = get_supabase_client()
+    complaint["issue_type"] = "electricity/power problems"
+    complaint_id = save_complaint(dict(complaint)).data[0]["id"]
+    row = client.table("complaints").select("*").eq("id", complaint_id).execute().data[0]
+    assert row["status"] == "open"
+    deadline = sla_deadline(row)
+    assert round(deadline - time.time()) == 4 * 3600
+
+    scheduler = EscalationScheduler()
+    assert scheduler.build(client) == 1
+    assert scheduler.escalate_due(client, now=deadline - 60) == 0
+    received = webhook_receiver.received
+    assert scheduler.escalate_due(client, now=deadline + 1) == 1
+    assert webhook_receiver.received == received + 1
+    payload = webhook_receiver.payloads[-1]
+    assert payload["event"] == "complaint_sla_breached" and payload["complaint"]["id"] == complaint_id
+
+    # Escalated complaints are not rescheduled after a restart, nor escalated again
+    assert client.table("complaints").select("escalated_at").eq("id", complaint_id).execute().data[0]["escalated_at"]
+    assert EscalationScheduler().build(client) == 0
+    assert not scheduler.escalate(client, complaint_id, now=deadline + 2)
+
+
+def test_status_endpoint(client, monkeypatch, complaint):
+    import main
+    from sla import escalation_scheduler
+    from triage import triage_queue
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+    complaint_id = triage_queue.next(1)[0]["id"]
+    assert complaint_id in escalation_scheduler._wheel
+
+    acknowledged = client.patch(f"/complaints/{complaint_id}/status", json={"status": "acknowledged"}, headers=admin)
+    assert acknowledged.status_code == 200
+    body = acknowledged.json()
+    assert body["status"] == "acknowledged" and body["sla_deadline"] and body["escalated_at"] is None
+    # Acknowledged complaints leave the triage queue and get the resolution deadline
+    assert complaint_id not in [c["id"] for c in triage_queue.next(50)]
+    assert complaint_id in escalation_scheduler._wheel
+
+    resolved = client.patch(f"/complaints/{complaint_id}/status", json={"status": "resolved"}, headers=admin)
+    assert resolved.json()["sla_deadline"] is None and complaint_id not in escalation_scheduler._wheel
+    backwards = client.patch(f"/complaints/{complaint_id}/status", json={"status": "acknowledged"}, headers=admin)
+    assert backwards.status_code == 409
+    reopened = client.patch(f"/complaints/{complaint_id}/status", json={"status": "open"}, headers=admin)
+    assert reopened.status_code == 200 and complaint_id in [c["id"] for c in triage_queue.next(50)]
+
+    missing = "00000000-0000-0000-0000-000000000000"
+    assert client.patch(f"/complaints/{missing}/status", json={"status": "resolved"}, headers=admin).status_code == 404
+    assert client.patch(f"/complaints/{complaint_id}/status", json={"status": "closed"}, headers=admin).status_code == 422
+
+
+def test_status_lookup_is_cached_with_etags(client, monkeypatch, complaint):
+    import main
+    from sla import status_cache
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    submitted = client.post("/submit-complaint", json=complaint).json()
+    complaint_id = submitted["complaint_id"]
+    url = f"/complaints/{complaint_id}/status"
+
+    first = client.get(url)
+    assert first.status_code == 200 and first.json()["status"] == "open" and first.json()["expected_by"]
+    etag = first.headers["etag"]
+    hits = status_cache.hits
+    unchanged = client.get(url, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304 and unchanged.content == b"" and unchanged.headers["etag"] == etag
+    assert status_cache.hits == hits + 1
+
+    # A status change drops the cached entry, so the next poll sees it with a new ETag
+    client.patch(url, json={"status": "acknowledged"}, headers={"X-Admin-Token": "secret"})
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["status"] == "acknowledged"
+    assert changed.headers["etag"] != etag
+
+    assert client.get("/complaints/00000000-0000-0000-0000-000000000000/status").status_code == 404
+    assert client.get("/complaints/not-a-uuid/status").status_code == 404
@@ -0,0 +1,61 @@
+from local_supabase import FaultInjector
+from transcripts import TRANSCRIPT_MAX_MESSAGES, iter_transcript, message, pack, unpack
+
+
+def chat(client, session_id, *messages):
+    for text in messages:
+        assert client.post("/chat", json={"message": text, "session_id": session_id}).status_code == 200
+
+
+def test_pack_round_trips_and_streams_in_chunks():
+    messages = [message("user" if n % 2 else "assistant", f"Turn {n}: the street light near Ward {n} is out", 1e9 + n)
+                for n in range(400)]
+    packed = pack(messages)
+    assert packed["encoding"] == "deflate-d1" and packed["message_count"] == 400
+    assert len(packed["transcript"]) < packed["raw_bytes"] / 4
+    assert unpack(packed) == messages
+    chunks = list(iter_transcript(packed, chunk_size=64))
+    assert len(chunks) > 1 and b"".join(chunks).count(b"\n") == 400
+    assert pack([]) is None
+
+
+def test_transcript_is_saved_once_with_the_complaint(client, monkeypatch, complaint):
+    import database
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    chat(client, "s-1", "road/traffic issues", complaint["complaint_description"], complaint["location"])
+    complaint_id = client.post("/submit-complaint", json={**complaint, "session_id": "s-1"}).json()["complaint_id"]
+    assert database.session_store.peek("s-1")["messages"] == []
+
+    response = client.get(f"/complaints/{complaint_id}/transcript", headers=admin)
+    assert response.status_code == 200 and response.headers["x-message-count"] == "6"
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [line for line in response.iter_lines() if line]
+    assert len(lines) == 6 and '"content":"road/traffic issues"' in lines[0]
+    assert '"role":"assistant"' in lines[1]
+
+    # Without a chat there is nothing to store
+    other = client.post("/submit-complaint", json=complaint).json()["complaint_id"]
+    assert client.get(f"/complaints/{other}/transcript", headers=admin).status_code == 404
+    assert client.get("/complaints/not-a-uuid/transcript", headers=admin).status_code == 404
+
+
+def test_transcript_is_capped_and_survives_an_outage(client, fake_db, complaint):
+    import database
+    from transcripts import load_transcript
+
+    chat(client, "s-2", *[f"message {n}" for n in range(TRANSCRIPT_MAX_MESSAGES)])
+    assert len(database.session_store.peek("s-2")["messages"]) == TRANSCRIPT_MAX_MESSAGES
+
+    fake_db.faults = FaultInjector(error_rate=1.0)
+    database.database_breaker.recovery_timeout = 0.0
+    assert client.post("/submit-complaint", json={**complaint, "session_id": "s-2"}).json()["queued"] is True
+    fake_db.faults = FaultInjector()
+    assert database.replay_spilled_complaints() == 1
+
+    complaint_id = fake_db.table("complaints").select("id").execute().data[0]["id"]
+    messages = unpack(load_transcript(fake_db, complaint_id))
+    assert len(messages) == TRANSCRIPT_MAX_MESSAGES
+    assert messages[-2]["content"] == f"message {TRANSCRIPT_MAX_MESSAGES - 1}"
@@ -0,0 +1,92 @@
+import threading
+
+from triage import ClaimConflict, TriageQueue
+
+NOW = 1_700_000_000.0
+
+
+def row(complaint_id, issue_type="garbage_waste", description="Bins overflowing", location="Ward 9",
+        hours_old=0.0, **extra):
+    return {"id": complaint_id, "issue_type": issue_type, "complaint_description": description,
+            "location": location, "created_at": NOW - hours_old * 3600, **extra}
+
+
+def test_scores_combine_type_keywords_clusters_and_age():
+    queue = TriageQueue(age_points_per_hour=1.0)
+    queue.add(row("garbage"))
+    queue.add(row("sparking", "electricity_power", "Transformer SPARKING near the school"))
+    queue.add(row("old-garbage", location="Ward 10", hours_old=12))
+    top = queue.next(3, now=NOW)
+    assert [c["id"] for c in top] == ["sparking", "old-garbage", "garbage"]
+    assert top[0]["keywords"] == ["sparking", "school"] and top[0]["score"] == 30 + 35 + 10
+
+    # Two more reports of the same place (same gazetteer id) lift the whole cluster
+    for complaint_id in ("dup-1", "dup-2", "dup-3"):
+        queue.add(row(complaint_id, "water_plumbing", "No water", location_id="ward-12"))
+    top = queue.next(6, now=NOW)
+    assert [c["id"][:4] for c in top[1:4]] == ["dup-"] * 3
+    assert top[1]["cluster_size"] == 3 and top[1]["score"] == round(20 + 10 * 1.584962500721156, 2)
+
+    # Scores keep growing with age without any re-scoring
+    assert queue.next(1, now=NOW + 3600)[0]["score"] == 30 + 35 + 10 + 1
+
+
+def test_claims_are_exclusive_and_expire():
+    queue = TriageQueue(claim_ttl_s=60)
+    for number in range(200):
+        queue.add(row(f"c{number}", hours_old=number))
+
+    winners = []
+    barrier = threading.Barrier(8)
+
+    def operator(name):
+        barrier.wait()
+        for _ in range(100):
+            for candidate in queue.next(3, now=NOW):
+                try:
+                    if queue.claim(candidate["id"], name, now=NOW):
+                        winners.append((candidate["id"], name))
+                        break
+                except ClaimConflict:
+                    continue
+
+    threads = [threading.Thread(target=operator, args=(f"op{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    claimed = [complaint_id for complaint_id, _ in winners]
+    assert len(claimed) == len(set(claimed)) == 200 and len(queue) == 0
+
+    complaint_id, owner = winners[0]
+    try:
+        queue.claim(complaint_id, "someone-else", now=NOW)
+        raise AssertionError("double claim")
+    except ClaimConflict as conflict:
+        assert conflict.claim["operator"] == owner
+    assert queue.claim(complaint_id, owner, now=NOW + 30)["claim"]["expires_at"] == NOW + 90
+    assert queue.release(complaint_id, owner) and len(queue) == 1
+    # Unrenewed leases put complaints back in the queue
+    assert len(queue.next(500, now=NOW + 61)) == 200
+
+
+def test_triage_endpoints(client, monkeypatch, complaint):
+    import main
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    complaint["complaint_description"] = "Live wire hanging over the road after the accident."
+    assert client.post("/submit-complaint", json=complaint).json()["success"] is True
+
+    top = client.get("/triage/next", headers=admin).json()
+    assert top["queued"] >= 1
+    first = top["complaints"][0]
+    assert first["keywords"] == ["live wire", "accident"]
+
+    url = f"/triage/{first['id']}/claim"
+    assert client.post(url, json={"operator": "asha"}, headers=admin).status_code == 200
+    conflict = client.post(url, json={"operator": "ravi"}, headers=admin)
+    assert conflict.status_code == 409 and conflict.json()["claim"]["operator"] == "asha"
+    assert client.post("/triage/unknown/claim", json={"operator": "ravi"}, headers=admin).status_code == 404
+    assert client.post(f"/triage/{first['id']}/release", json={"operator": "ravi"}, headers=admin).status_code == 409
+    assert client.post(f"/triage/{first['id']}/release", json={"operator": "asha"}, headers=admin).status_code == 200
@@ -0,0 +1,87 @@
+import json
+import time
+
+import database
+from webhook_routing import Destination, WebhookRouter, fan_out, load_webhook_router
+
+CONFIG = {
+    "routes": [
+        {
+            "name": "roads-north",
+            "issue_types": ["road_traffic"],
+            "locations": ["*sector 1*", "re:\\bnorth\\b"],
+            "destinations": [{"name": "roads", "url": "http://hooks.test/roads"}],
+        },
+        {
+            "name": "hospitals",
+            "issue_types": ["*"],
+            "locations": ["*hospital*"],
+            "destinations": [
+                {"name": "control", "url": "http://hooks.test/control"},
+                {"name": "roads", "url": "http://hooks.test/roads"},
+            ],
+        },
+    ],
+    "default": [{"name": "inbox", "url": "http://hooks.test/inbox"}],
+}
+
+
+def names(destinations):
+    return sorted(d.name for d in destinations)
+
+
+def test_routes_match_issue_type_and_location_patterns():
+    router = WebhookRouter.from_config(CONFIG)
+    assert names(router.match("road_traffic", "Block C, Sector 12")) == ["roads"]
+    assert names(router.match("road_traffic", "North Avenue")) == ["roads"]
+    assert names(router.match("road_traffic", "Northgate Mall")) == ["inbox"]
+    # Overlapping routes deliver once per destination
+    assert names(router.match("road_traffic", "City Hospital, Sector 1")) == ["control", "roads"]
+    assert names(router.match("water_plumbing", "City hospital")) == ["control", "roads"]
+    assert names(router.match("water_plumbing", "Market Road")) == ["inbox"]
+
+
+def test_webhook_url_is_the_fallback_destination(tmp_path):
+    assert WebhookRouter([], []).match("road_traffic", "anywhere") == []
+    fallback = WebhookRouter([], []).match("road_traffic", "anywhere", fallback_url="http://hooks.test/only")
+    assert [d.url for d in fallback] == ["http://hooks.test/only"]
+
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps(CONFIG))
+    router = load_webhook_router(str(path))
+    assert router.destination_urls() == ["http://hooks.test/control", "http://hooks.test/inbox", "http://hooks.test/roads"]
+
+
+def test_slow_destination_does_not_delay_the_others():
+    fast = Destination("http://hooks.test/fast", timeout_s=1)
+    slow = Destination("http://hooks.test/slow", timeout_s=1)
+    finished = {}
+
+    def deliver(destination):
+        if destination is slow:
+            time.sleep(0.5)
+        finished[destination.url] = time.perf_counter()
+        return True
+
+    start = time.perf_counter()
+    results = fan_out([slow, fast], deliver)
+    assert results == {slow.url: True, fast.url: True}
+    assert finished[fast.url] - start < 0.2
+    assert time.perf_counter() - start < 1.0
+
+
+def test_submission_fans_out_to_every_matching_destination(fake_db, webhook_receiver, monkeypatch, complaint):
+    monkeypatch.setattr(database, "webhook_router", WebhookRouter.from_config({
+        "routes": [{
+            "issue_types": ["road_traffic"],
+            "locations": ["*main street*"],
+            "destinations": [
+                {"name": "roads", "url": webhook_receiver.url + "?team=roads"},
+                {"name": "downtown", "url": webhook_receiver.url + "?team=downtown"},
+            ],
+        }],
+    }))
+    received_before = webhook_receiver.received
+
+    assert database.save_complaint(complaint) is not None
+    assert webhook_receiver.received - received_before == 2